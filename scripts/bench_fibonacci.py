@@ -0,0 +1,121 @@
+"""F(n) for n = 10^3 .. 10^7: the original list builder vs fibonacci.py's engine.
+
+Per n it reports:
+
+  list       fibonacci(n + 1)[n], the original: n big-int additions and the
+             whole sequence in memory (MB held by the finished list)
+  loop       the same additions with two variables (constant memory)
+  doubling   fib_pair(n), fast doubling: O(log n) multiplications
+  cached     fib(n) again after a first call (lru_cache hit)
+  mod        fib_mod(n, 10^9 + 7)
+
+list and loop grow roughly quadratically; once the next n would exceed
+--budget seconds they are extrapolated from the last two measurements
+(marked "~"). A last line gives fib_stream's throughput for a modular stream.
+
+    python scripts/bench_fibonacci.py
+    python scripts/bench_fibonacci.py --max-exponent 6 --json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fibonacci as fb
+
+MOD = 10 ** 9 + 7
+
+
+def loop_fib(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def list_fib(n):
+    """F(n) the original way, and the bytes its list holds."""
+    sequence = fb.fibonacci(n + 1)
+    return sequence[n], sys.getsizeof(sequence) + sum(map(sys.getsizeof, sequence))
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t, result
+
+
+class Extrapolated:
+    """Times a growing-cost function per n until it would pass the budget, then extrapolates."""
+
+    def __init__(self, fn, budget):
+        self.fn = fn
+        self.budget = budget
+        self.points = []
+
+    def _predict(self, n):
+        (n1, t1), (n2, t2) = self.points[-2:]
+        return t2 * (n / n2) ** (math.log(t2 / t1) / math.log(n2 / n1))
+
+    def run(self, n):
+        """(seconds, measured, result or None)."""
+        if len(self.points) >= 2 and self._predict(n) > self.budget:
+            return self._predict(n), False, None
+        seconds, result = timed(self.fn, n)
+        self.points.append((n, seconds))
+        return seconds, True, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-exponent', type=int, default=7, help='largest n is 10^this (default: 7)')
+    parser.add_argument('--budget', type=float, default=10.0,
+                        help='seconds one list/loop run may take before extrapolating (default: 10)')
+    parser.add_argument('--stream-terms', type=int, default=1_000_000, help='terms for the stream test')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    legacy = Extrapolated(list_fib, args.budget)
+    loop = Extrapolated(loop_fib, args.budget)
+    rows = []
+    for exponent in range(3, args.max_exponent + 1):
+        n = 10 ** exponent
+        list_s, list_measured, list_result = legacy.run(n)
+        loop_s, loop_measured, _ = loop.run(n)
+        fb.fib.cache_clear()
+        doubling_s, value = timed(fb.fib, n)
+        cached_s, _ = timed(fb.fib, n)
+        mod_s, residue = timed(fb.fib_mod, n, MOD)
+        assert residue == value % MOD
+        rows.append({
+            "n": n, "bits": value.bit_length(),
+            "list_s": list_s, "list_measured": list_measured,
+            "list_mb": list_result[1] / 2 ** 20 if list_result else None,
+            "loop_s": loop_s, "loop_measured": loop_measured,
+            "doubling_s": doubling_s, "cached_us": cached_s * 1e6, "mod_us": mod_s * 1e6,
+        })
+
+    stream_s, _ = timed(lambda: sum(1 for _ in fb.fib_stream(0, args.stream_terms, mod=MOD)))
+    result = {"rows": rows, "stream": {"terms": args.stream_terms, "terms_per_s": args.stream_terms / stream_s}}
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{'n':>10} {'bits':>9} {'list s':>11} {'list MB':>8} {'loop s':>11} {'doubling s':>11} "
+          f"{'speedup':>9} {'cached us':>10} {'mod us':>8}")
+    for r in rows:
+        list_col = ('' if r["list_measured"] else '~') + f"{r['list_s']:.4f}"
+        loop_col = ('' if r["loop_measured"] else '~') + f"{r['loop_s']:.4f}"
+        held = f"{r['list_mb']:.1f}" if r["list_mb"] is not None else "-"
+        print(f"{r['n']:>10,} {r['bits']:>9,} {list_col:>11} {held:>8} {loop_col:>11} {r['doubling_s']:>11.4f} "
+              f"{r['list_s'] / r['doubling_s']:>8.0f}x {r['cached_us']:>10.1f} {r['mod_us']:>8.1f}")
+    print(f"fib_stream mod 10^9+7: {result['stream']['terms_per_s']:,.0f} terms/s in constant memory")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Peak memory of the image load -> EXIF -> decode path, before and after mmap.
+
+Generates (or takes) a large image and runs each loading strategy in a fresh
+interpreter, reporting peak RSS and the growth over the interpreter's RSS
+after imports:
+
+  legacy   f.read() -> BytesIO for exifread -> np.frombuffer -> IMREAD_COLOR -> cvtColor
+  mmap     ImageSource.open -> exifread on the mapping -> IMREAD_GRAYSCALE
+  reduced  as mmap, plus reduced-resolution decode above OCR_MAX_DECODE_PIXELS
+
+Note that touched pages of a file mapping count towards RSS but are clean
+page cache the kernel can drop, unlike the heap copies of the legacy path.
+OCR itself is not run; it is the same for every strategy.
+
+    python scripts/bench_image_memory.py --width 12000 --height 9000 --format bmp
+    python scripts/bench_image_memory.py --image huge_scan.jpg
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r'''
+import io, json, resource, sys, time
+sys.path.insert(0, {script_dir!r})
+import cv2, numpy as np, exifread
+import starkosint
+from image_source import ImageSource
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+base = rss_mb()
+t = time.perf_counter()
+path, strategy = {path!r}, {strategy!r}
+if strategy == 'legacy':
+    with open(path, 'rb') as f:
+        data = f.read()
+    exifread.process_file(io.BytesIO(data), details=False, strict=False)
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+else:
+    source = ImageSource.open(path)
+    exifread.process_file(source.file(), details=False, strict=False)
+    max_pixels = starkosint.OCR_MAX_DECODE_PIXELS if strategy == 'reduced' else None
+    gray = source.decode(gray=True, max_pixels=max_pixels)
+elapsed = time.perf_counter() - t
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"strategy": strategy, "seconds": elapsed, "base_mb": base, "peak_mb": peak,
+                   "decoded": list(gray.shape)}}))
+'''
+
+
+def make_image(width, height, fmt, directory):
+    """Writes a synthetic text-like test image and returns its path."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    img = np.full((height, width, 3), 255, np.uint8)
+    # Dark rectangles as stand-in text lines keep JPEG/PNG sizes realistic.
+    for y in range(40, height - 40, 60):
+        for x in range(40, width - 200, 260):
+            img[y:y + 24, x:x + int(rng.integers(80, 220))] = 30
+    path = os.path.join(directory, f"bench_{width}x{height}.{fmt}")
+    cv2.imwrite(path, img)
+    return path
+
+
+def run(path, strategy):
+    code = CHILD.format(script_dir=SCRIPT_DIR, path=path, strategy=strategy)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', help='existing image to measure')
+    parser.add_argument('--width', type=int, default=12000)
+    parser.add_argument('--height', type=int, default=9000)
+    parser.add_argument('--format', default='bmp', choices=('bmp', 'jpg', 'png'),
+                        help='synthetic image format (bmp = uncompressed, largest file)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.image or make_image(args.width, args.height, args.format, tmp)
+        print(f"Image: {path} ({os.path.getsize(path) / 1e6:.0f} MB on disk)")
+        print(f"{'strategy':<9} {'seconds':>8} {'peak RSS MB':>12} {'growth MB':>10} {'decoded':>14}")
+        for strategy in ('legacy', 'mmap', 'reduced'):
+            r = run(path, strategy)
+            decoded = 'x'.join(map(str, r['decoded'][::-1]))
+            print(f"{strategy:<9} {r['seconds']:>8.2f} {r['peak_mb']:>12.0f} "
+                  f"{r['peak_mb'] - r['base_mb']:>10.0f} {decoded:>14}")
+
+
+if __name__ == '__main__':
+    main()
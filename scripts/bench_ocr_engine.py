@@ -0,0 +1,93 @@
+"""Per-image OCR latency: in-process Tesseract (tesserocr) vs pytesseract.
+
+Small images are where the per-call cost of pytesseract (temp file, process
+start, model load) dominates, so the default corpus is seeded text snippets
+of a few lines (captions, screenshots of a chat message, an ID line). Each
+backend OCRs every image --rounds times on one thread; the first call is
+reported separately since it includes loading the engine.
+
+    python scripts/bench_ocr_engine.py --images 40
+    TESSDATA_PREFIX=/usr/share/tesseract-ocr/5/tessdata python scripts/bench_ocr_engine.py
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+
+import ocr_engine
+import starkosint
+
+WORDS = ("account transfer branch mobile number address district verified pending amount "
+         "received invoice customer station vehicle owner registration network session").split()
+
+
+def snippets(count, seed=5):
+    """Small grayscale text images (1-4 lines, 300-900 px wide)."""
+    rng = random.Random(seed)
+    images = []
+    for _ in range(count):
+        lines = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))) for _ in range(rng.randint(1, 4))]
+        width = max(300, max(len(line) for line in lines) * 19 + 40)
+        image = np.full((30 + 42 * len(lines), width), 255, np.uint8)
+        for i, line in enumerate(lines):
+            cv2.putText(image, line, (20, 40 + 42 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2, cv2.LINE_AA)
+        images.append((image, '\n'.join(lines)))
+    return images
+
+
+def run_backend(name, images, rounds):
+    ocr_engine.configure(name, tesseract_cmd=starkosint.TESSERACT_CMD, tessdata=starkosint.TESSDATA_DIR)
+    if ocr_engine.backend() != name:
+        return None
+    t = time.perf_counter()
+    ocr_engine.image_to_string(images[0][0])
+    first_ms = (time.perf_counter() - t) * 1000
+    latencies, texts = [], []
+    for _ in range(rounds):
+        for image, _ in images:
+            t = time.perf_counter()
+            texts.append(ocr_engine.image_to_string(image).strip())
+            latencies.append((time.perf_counter() - t) * 1000)
+    latencies.sort()
+    return {
+        "first_ms": first_ms,
+        "p50_ms": statistics.median(latencies),
+        "p90_ms": statistics.quantiles(latencies, n=10)[8] if len(latencies) > 1 else latencies[0],
+        "mean_ms": statistics.fmean(latencies),
+        "texts": texts[:len(images)],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=30, help='number of small images (default: 30)')
+    parser.add_argument('--rounds', type=int, default=3, help='passes over the images (default: 3)')
+    args = parser.parse_args(argv)
+
+    images = snippets(args.images)
+    results = {name: run_backend(name, images, args.rounds) for name in ("pytesseract", "tesserocr")}
+
+    print(f"{args.images} images x {args.rounds} rounds, "
+          f"{min(i.shape[1] for i, _ in images)}-{max(i.shape[1] for i, _ in images)} px wide")
+    print(f"{'backend':<12} {'first ms':>9} {'p50 ms':>8} {'p90 ms':>8} {'mean ms':>8}")
+    for name, r in results.items():
+        if r is None:
+            print(f"{name:<12} not available")
+            continue
+        print(f"{name:<12} {r['first_ms']:>9.1f} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} {r['mean_ms']:>8.1f}")
+    if all(results.values()):
+        same = sum(a == b for a, b in zip(results["pytesseract"]["texts"], results["tesserocr"]["texts"]))
+        print(f"speedup (mean): {results['pytesseract']['mean_ms'] / results['tesserocr']['mean_ms']:.1f}x; "
+              f"identical text on {same}/{len(images)} images")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Latency and accuracy of tiled OCR vs the single-pass path.
+
+By default a synthetic "long screenshot" is rendered with known text (seeded,
+so runs are comparable); --image/--truth benchmark a real image against its
+transcription instead. Accuracy is the word-level similarity ratio between
+the OCR output and the ground truth (1.0 = identical word sequence).
+
+    python scripts/bench_ocr_tiles.py --lines 400 --width 1400
+    python scripts/bench_ocr_tiles.py --image scan.png --truth scan.txt
+"""
+
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+
+import starkosint
+from ocr_tiles import ocr_tiled
+
+WORDS = ("account transfer branch mobile number address district verified pending amount "
+         "received invoice customer station vehicle owner registration network session").split()
+
+
+def synthetic_page(lines, width, seed=7, scale=1.0):
+    """Renders ``lines`` lines of random words; returns (gray image, ground-truth text)."""
+    rng = random.Random(seed)
+    line_height = int(48 * scale)
+    image = np.full((line_height * lines + 2 * line_height, width), 255, np.uint8)
+    truth = []
+    for i in range(lines):
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 7)))
+        truth.append(text)
+        y = line_height * (i + 1) + int(32 * scale)
+        cv2.putText(image, text, (int(30 * scale), y), cv2.FONT_HERSHEY_SIMPLEX, 1.0 * scale, 0, max(1, int(2 * scale)),
+                    cv2.LINE_AA)
+    return image, '\n'.join(truth)
+
+
+def word_accuracy(text, truth):
+    return difflib.SequenceMatcher(None, text.split(), truth.split(), autojunk=False).ratio()
+
+
+def single_pass(gray):
+    return starkosint.get_ocr_engine().image_to_string(gray, lang='eng').strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=300, help='synthetic text lines (default: 300)')
+    parser.add_argument('--width', type=int, default=1400, help='synthetic image width (default: 1400)')
+    parser.add_argument('--scale', type=float, default=1.0, help='synthetic font scale (e.g. 3 for a hi-res scan)')
+    parser.add_argument('--image', help='real image to OCR instead of the synthetic page')
+    parser.add_argument('--truth', help='ground-truth text file for --image')
+    parser.add_argument('--workers', type=int, help='tile workers (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    if args.image:
+        gray = cv2.imread(args.image, cv2.IMREAD_GRAYSCALE)
+        truth = open(args.truth, encoding='utf-8').read() if args.truth else None
+    else:
+        gray, truth = synthetic_page(args.lines, args.width, scale=args.scale)
+    print(f"Image: {gray.shape[1]}x{gray.shape[0]} px, workers: {args.workers or os.cpu_count()}")
+
+    rows = []
+    for label, fn in (("single-pass", single_pass),
+                      ("tiled", lambda g: ocr_tiled(g, workers=args.workers))):
+        t = time.perf_counter()
+        text = fn(gray)
+        elapsed = time.perf_counter() - t
+        accuracy = word_accuracy(text, truth) if truth else None
+        rows.append((label, elapsed, accuracy, len(text.split())))
+
+    print(f"{'path':<12} {'seconds':>8} {'words':>7} {'word accuracy':>14}")
+    for label, elapsed, accuracy, words in rows:
+        acc = f"{accuracy:.4f}" if accuracy is not None else "n/a"
+        print(f"{label:<12} {elapsed:>8.2f} {words:>7} {acc:>14}")
+    print(f"speedup: {rows[0][1] / rows[1][1]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Prime generation and testing: the segmented sieve vs trial division.
+
+Three comparisons, each against is_prime_trial (the original implementation):
+
+  all primes below N   trial division over 2..N, measured on growing N until
+                       --trial-budget seconds is used up and extrapolated to
+                       --limit with the fitted growth rate,
+                       vs count_primes and PrimeTable over the full range
+  single values        is_prime (Miller–Rabin) vs trial division on random
+                       numbers of increasing size
+  queries              pi(x) / nth / is_prime on a PrimeTable vs streaming
+
+    python scripts/bench_primes.py --limit 1000000000
+    python scripts/bench_primes.py --limit 100000000 --json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import prime_numbers as pn
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t, result
+
+
+def trial_count(n):
+    return sum(1 for k in range(2, n) if pn.is_prime_trial(k))
+
+
+def trial_estimate(limit, budget):
+    """(seconds, measured) for counting primes below ``limit`` by trial division.
+
+    Runs limits 10^3, 10^4, ... while the next one fits the budget; beyond the
+    last measured limit the time is extrapolated as a power law fitted to the
+    last two points.
+    """
+    points = []
+    n = 1000
+    spent = 0.0
+    while n <= limit:
+        if points and len(points) >= 2:
+            (n1, t1), (n2, t2) = points[-2:]
+            predicted = t2 * (n / n2) ** (math.log(t2 / t1) / math.log(n2 / n1))
+            if spent + predicted > budget:
+                break
+        seconds, _ = timed(trial_count, n)
+        points.append((n, seconds))
+        spent += seconds
+        n *= 10
+    last_n, last_t = points[-1]
+    if last_n == limit:
+        return last_t, True
+    (n1, t1), (n2, t2) = points[-2:]
+    exponent = math.log(t2 / t1) / math.log(n2 / n1)
+    return t2 * (limit / n2) ** exponent, False
+
+
+def bench_ranges(limit, budget):
+    trial_s, measured = trial_estimate(limit, budget)
+    sieve_s, count = timed(pn.count_primes, 0, limit)
+    table_s, table = timed(pn.PrimeTable, limit)
+    return {
+        "limit": limit, "primes": count,
+        "trial_s": trial_s, "trial_measured": measured,
+        "count_primes_s": sieve_s,
+        "table_build_s": table_s, "table_mb": table.nbytes / 2 ** 20,
+    }, table
+
+
+def bench_single(rng, digits_list, samples):
+    rows = []
+    for digits in digits_list:
+        values = [rng.randrange(10 ** (digits - 1), 10 ** digits) | 1 for _ in range(samples)]
+        mr_s, _ = timed(lambda: [pn.is_prime(v) for v in values])
+        row = {"digits": digits, "miller_rabin_us": mr_s / samples * 1e6, "trial_us": None}
+        if digits <= 12:
+            trial_s, _ = timed(lambda: [pn.is_prime_trial(v) for v in values])
+            row["trial_us"] = trial_s / samples * 1e6
+        rows.append(row)
+    return rows
+
+
+def bench_queries(rng, table, queries):
+    xs = [rng.randrange(2, table.limit) for _ in range(queries)]
+    pi_s, _ = timed(lambda: [table.pi(x) for x in xs])
+    test_s, _ = timed(lambda: [table.is_prime(x) for x in xs])
+    total = table.pi(table.limit - 1)
+    ns = [rng.randrange(1, total + 1) for _ in range(queries)]
+    nth_s, _ = timed(lambda: [table.nth(n) for n in ns])
+    stream_n = ns[0]
+    stream_s, _ = timed(pn.nth_prime, stream_n)
+    return {
+        "table_pi_us": pi_s / queries * 1e6,
+        "table_is_prime_us": test_s / queries * 1e6,
+        "table_nth_us": nth_s / queries * 1e6,
+        "streaming_nth_ms": stream_s * 1000, "streaming_nth_n": stream_n,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--limit', type=int, default=10 ** 9, help='range upper bound (default: 10^9)')
+    parser.add_argument('--trial-budget', type=float, default=20.0,
+                        help='seconds trial division may run before extrapolating (default: 20)')
+    parser.add_argument('--samples', type=int, default=200, help='values per size for single tests (default: 200)')
+    parser.add_argument('--queries', type=int, default=2000, help='PrimeTable queries (default: 2000)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    ranges, table = bench_ranges(args.limit, args.trial_budget)
+    result = {
+        "ranges": ranges,
+        "single": bench_single(rng, (6, 9, 12, 18, 30, 100), args.samples),
+        "queries": bench_queries(rng, table, args.queries),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    r = ranges
+    print(f"all primes below {r['limit']:,} ({r['primes']:,} primes)")
+    print(f"  trial division    {r['trial_s']:>12.2f} s" + ("" if r["trial_measured"] else "   (extrapolated)"))
+    print(f"  count_primes      {r['count_primes_s']:>12.2f} s   {r['trial_s'] / r['count_primes_s']:>10.0f}x")
+    print(f"  PrimeTable build  {r['table_build_s']:>12.2f} s   ({r['table_mb']:.1f} MB)")
+    print("single values (per test)")
+    print(f"  {'digits':>6} {'Miller-Rabin us':>16} {'trial us':>12}")
+    for row in result["single"]:
+        trial = f"{row['trial_us']:>12.1f}" if row["trial_us"] is not None else f"{'-':>12}"
+        print(f"  {row['digits']:>6} {row['miller_rabin_us']:>16.1f} {trial}")
+    q = result["queries"]
+    print(f"PrimeTable queries: pi(x) {q['table_pi_us']:.1f} us, is_prime {q['table_is_prime_us']:.2f} us, "
+          f"nth {q['table_nth_us']:.1f} us (streaming nth_prime({q['streaming_nth_n']:,}): "
+          f"{q['streaming_nth_ms']:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
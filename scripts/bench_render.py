@@ -0,0 +1,106 @@
+"""Time to render a leak report of N records, old renderer vs render.py.
+
+The old path concatenated strings with += and printed every character with
+its own flush and sleep (type_effect / print_colored). It is measured twice:
+
+  legacy-animated  the real thing, with the typing delays; timed on a sample
+                   of --sample records and extrapolated to N (marked "~")
+  legacy-nodelay   the same per-character print+flush loop with delay=0,
+                   i.e. the cost of the output pattern alone
+
+against the Renderer backends (one buffered write per report). Output goes to
+/dev/null (or --output, e.g. /dev/tty to include terminal cost).
+
+    python scripts/bench_render.py --records 300
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from colorama import Fore
+
+from render import FORMATS, Renderer, format_as_js
+
+FIELDS = ("FullName", "Phone", "Email", "Address", "Region", "NickName", "Password(SHA1)", "RegDate")
+
+
+def fake_records(n, seed=11):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        records.append({field: f"{field.lower()}-{i}-{rng.randrange(10 ** 8):08d}"
+                        for field in rng.sample(FIELDS, rng.randint(4, len(FIELDS)))})
+    return records
+
+
+def legacy_report(databases, delay_scale=1.0):
+    """The pre-render.py generate_report output loop, with the original helpers."""
+    def type_effect(text, delay=0.002):
+        for char in str(text):
+            print(char, end='', flush=True)
+            time.sleep(delay * delay_scale)
+        print()
+
+    def print_colored(text, delay=0.005):
+        colors = [Fore.YELLOW, Fore.CYAN, Fore.MAGENTA, Fore.LIGHTBLUE_EX, Fore.LIGHTGREEN_EX]
+        for line in str(text).splitlines():
+            color = random.choice(colors)
+            for char in line:
+                print(color + char, end='', flush=True)
+                time.sleep(delay * delay_scale)
+            print()
+
+    for name, records in databases:
+        type_effect(f"{Fore.LIGHTRED_EX}\n=== [ SOURCE 2: LEAK DATABASE: {name} ] ===\n")
+        for entry in records:
+            print_colored(format_as_js(entry))
+
+
+def timed(fn, out):
+    with contextlib.redirect_stdout(out):
+        t = time.perf_counter()
+        fn()
+        out.flush()
+        return time.perf_counter() - t
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=300, help='records in the report (default: 300)')
+    parser.add_argument('--sample', type=int, default=5, help='records actually rendered for legacy-animated')
+    parser.add_argument('--output', default=os.devnull, help='where rendered output goes (default: /dev/null)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    records = fake_records(args.records)
+    databases = [("Bench DB", records)]
+    sample = [("Bench DB", records[:args.sample])]
+    results = {}
+    with open(args.output, 'w', encoding='utf-8') as out:
+        sample_time = timed(lambda: legacy_report(sample), out)
+        results['legacy-animated'] = sample_time * args.records / max(1, args.sample)
+        results['legacy-nodelay'] = timed(lambda: legacy_report(databases, delay_scale=0), out)
+        for fmt in FORMATS:
+            renderer = Renderer(fmt, animate=False, stream=out)
+            results[fmt] = timed(lambda: renderer.leak_report("bench", databases), out)
+
+    if args.json:
+        print(json.dumps({"records": args.records, "seconds": results}, indent=2))
+        return
+    base = results['legacy-animated']
+    print(f"{args.records} records -> {args.output}")
+    print(f"{'renderer':<16} {'seconds':>10} {'speedup':>10}")
+    for name, seconds in results.items():
+        mark = '~' if name == 'legacy-animated' else ' '
+        print(f"{name:<16} {mark}{seconds:>9.4f} {base / seconds:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""Load test for the HTTP/JSON service (starkosint.py serve).
+
+Opens --connections keep-alive connections and sends a weighted mix of
+requests for --duration seconds, then reports requests/sec, latency
+percentiles per endpoint and the status codes seen (503 = shed by the
+service's backpressure).
+
+Without --url the script starts its own stub upstreams (stub_servers.py all)
+and a service routed to them, so nothing leaves the machine.
+
+    python scripts/bench_service.py --connections 64 --duration 10
+    python scripts/bench_service.py --url http://127.0.0.1:8787 --mix ip=60,ifsc=30,image=10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+IPS = ["%d.%d.%d.%d" % (11 + i % 200, i * 7 % 256, i * 13 % 256, i % 250 + 1) for i in range(500)]
+IFSC_CODES = ["HDFC0000001", "SBIN0000691", "ICIC0000011", "PUNB0012000"] + \
+             ["UTIB0%06d" % i for i in range(200)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_mix(spec):
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {'ip', 'ifsc', 'image', 'health'}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown endpoint(s) in mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def make_requests(image_bytes):
+    """Request builders per endpoint: () -> (method, path, body)."""
+    return {
+        'ip': lambda: ('GET', f"/ip/{random.choice(IPS)}", b""),
+        'ifsc': lambda: ('GET', f"/ifsc/{random.choice(IFSC_CODES)}", b""),
+        'image': lambda: ('POST', "/image", random.choice(image_bytes)),
+        'health': lambda: ('GET', "/health", b""),
+    }
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        key, _, value = line.partition(b":")
+        if key.strip().lower() == b"content-length":
+            length = int(value)
+    body = await reader.readexactly(length)
+    return status, body
+
+
+async def client(host, port, builders, names, weights, stop_at, samples, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < stop_at:
+            name = random.choices(names, weights)[0]
+            method, path, body = builders[name]()
+            request = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n"
+                       .encode() + body)
+            t = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, _ = await read_response(reader)
+            samples.setdefault(name, []).append((time.perf_counter() - t) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 503:
+                await asyncio.sleep(0.05)
+    finally:
+        writer.close()
+
+
+async def load(url, connections, duration, mix, image_bytes):
+    parts = urlsplit(url)
+    builders = make_requests(image_bytes)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples, statuses = {}, {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(parts.hostname, parts.port, builders, names, weights, start + duration,
+                                  samples, statuses) for _ in range(connections)))
+    return time.perf_counter() - start, samples, statuses
+
+
+def wait_ready(url, timeout=30.0):
+    import urllib.request
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1) as r:
+                if r.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"service at {url} did not become ready")
+
+
+def start_local_service(ocr_workers, per_host_limit, tmp):
+    """Starts stub upstreams and a service routed to them; returns (url, processes)."""
+    from stub_servers import HOSTS
+
+    stub_port = free_port()
+    stub_names = sorted(set(HOSTS.values()))
+    stubs = subprocess.Popen([sys.executable, os.path.join(SCRIPT_DIR, 'stub_servers.py'), 'all',
+                              '--port', str(stub_port)], stdout=subprocess.DEVNULL)
+    routes = ','.join(f"{host}=http://127.0.0.1:{stub_port + stub_names.index(name)}" for host, name in HOSTS.items())
+    port = free_port()
+    env = dict(os.environ, STARK_HTTP_ROUTES=routes, STARK_DATA_DIR=tmp, STARK_IMAGE_CACHE='0',
+               STARK_NEAR_DUP='off')
+    cmd = [sys.executable, os.path.join(SCRIPT_DIR, 'starkosint.py'), 'serve', '--port', str(port)]
+    if ocr_workers:
+        cmd += ['--ocr-workers', str(ocr_workers)]
+    if per_host_limit:
+        cmd += ['--per-host-limit', str(per_host_limit)]
+    service = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    wait_ready(url)
+    return url, [service, stubs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='running service to test (default: start a local one on stubs)')
+    parser.add_argument('--connections', type=int, default=32, help='concurrent keep-alive connections (default: 32)')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load (default: 10)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('ip=60,ifsc=38,image=2'),
+                        help='endpoint weights (default: ip=60,ifsc=38,image=2)')
+    parser.add_argument('--ocr-workers', type=int, help='--ocr-workers for the locally started service')
+    parser.add_argument('--per-host-limit', type=int, help='--per-host-limit for the locally started service')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    processes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        image_bytes = []
+        if args.mix.get('image'):
+            from bench_suite import build_corpus
+            for path in build_corpus(tmp):
+                with open(path, 'rb') as f:
+                    image_bytes.append(f.read())
+        try:
+            url = args.url
+            if url is None:
+                url, processes = start_local_service(args.ocr_workers, args.per_host_limit, tmp)
+            elapsed, samples, statuses = asyncio.run(
+                load(url, args.connections, args.duration, args.mix, image_bytes))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+    total = sum(statuses.values())
+    result = {
+        "url": url, "connections": args.connections, "seconds": round(elapsed, 2),
+        "requests": total, "requests_per_s": round(total / elapsed, 1),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "endpoints": {},
+    }
+    for name, values in sorted(samples.items()):
+        values.sort()
+        q = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else values * 99
+        result["endpoints"][name] = {"requests": len(values), "p50_ms": round(q[49], 2),
+                                     "p90_ms": round(q[89], 2), "p99_ms": round(q[98], 2)}
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{total} requests in {elapsed:.1f} s over {args.connections} connections: "
+          f"{result['requests_per_s']:.0f} requests/s")
+    print(f"statuses: {', '.join(f'{k}: {v}' for k, v in result['statuses'].items())}")
+    print(f"{'endpoint':<10} {'requests':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for name, r in result["endpoints"].items():
+        print(f"{name:<10} {r['requests']:>9} {r['p50_ms']:>9.2f} {r['p90_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
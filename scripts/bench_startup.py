@@ -0,0 +1,91 @@
+"""Startup benchmark for starkosint.py: time-to-menu and peak RSS.
+
+Each run happens in a fresh interpreter that imports the script and draws the
+menu (output discarded). Two variants are measured by default:
+
+  lazy   - the current script, heavy dependencies deferred
+  eager  - the same script with numpy/cv2/pytesseract/exifread/bs4/PIL/requests
+           imported up front, i.e. the pre-lazy-loading behaviour
+
+Use --script to benchmark another copy of the file instead, e.g. an older
+revision: git show <rev>:scripts/starkosint.py > /tmp/old/starkosint.py
+
+    python scripts/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EAGER_MODULES = ['requests', 'bs4', 'numpy', 'cv2', 'pytesseract', 'exifread', 'PIL.Image']
+
+CHILD = r'''
+import contextlib, importlib, io, json, resource, sys, time
+t0 = time.perf_counter()
+for name in {preload!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+sys.path.insert(0, {script_dir!r})
+with contextlib.redirect_stdout(io.StringIO()):
+    import starkosint
+    starkosint.display_menu()
+elapsed = time.perf_counter() - t0
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"menu_s": elapsed, "peak_rss_kb": rss_kb}}))
+'''
+
+
+def run_once(script_dir, preload):
+    """Runs one cold start in a subprocess and returns its measurements."""
+    code = CHILD.format(preload=preload, script_dir=script_dir)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(label, script_dir, preload, runs):
+    samples = [run_once(script_dir, preload) for _ in range(runs)]
+    times = [s['menu_s'] * 1000 for s in samples]
+    rss = [s['peak_rss_kb'] / 1024 for s in samples]
+    return {
+        "variant": label,
+        "runs": runs,
+        "time_to_menu_ms_median": round(statistics.median(times), 1),
+        "time_to_menu_ms_min": round(min(times), 1),
+        "peak_rss_mb_median": round(statistics.median(rss), 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='cold starts per variant (default: 5)')
+    parser.add_argument('--script', help='benchmark this starkosint.py instead of the eager/lazy pair')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    if args.script:
+        script_dir = os.path.dirname(os.path.abspath(args.script))
+        variants = [("script", script_dir, []), ("lazy", SCRIPT_DIR, [])]
+    else:
+        variants = [("eager", SCRIPT_DIR, EAGER_MODULES), ("lazy", SCRIPT_DIR, [])]
+
+    results = [measure(label, d, preload, args.runs) for label, d, preload in variants]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'variant':<8} {'runs':>4} {'menu ms (med)':>14} {'menu ms (min)':>14} {'peak RSS MB':>12}")
+    for r in results:
+        print(f"{r['variant']:<8} {r['runs']:>4} {r['time_to_menu_ms_median']:>14} "
+              f"{r['time_to_menu_ms_min']:>14} {r['peak_rss_mb_median']:>12}")
+
+
+if __name__ == '__main__':
+    main()
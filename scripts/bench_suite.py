@@ -0,0 +1,318 @@
+"""Offline benchmark suite for the starkosint.py lookup functions.
+
+Every network lookup is routed to the local stub servers (stub_servers.py,
+replaying the pages in fixtures/) through the shared transport, and the image
+functions run over a generated corpus of photos with EXIF and text images
+(seeded, so every run sees identical bytes). Nothing leaves the machine.
+
+For each function it reports latency percentiles (p50/p90/p99), sequential
+throughput, the peak RSS growth while the function ran and the Python heap
+peak (tracemalloc, measured in a separate short pass). --output saves the
+results as JSON; --compare prints the change against an earlier file and flags
+anything slower than --threshold percent.
+
+    python scripts/bench_suite.py --output bench/$(git rev-parse --short HEAD).json
+    python scripts/bench_suite.py --compare bench/baseline.json --only ifsc,ip
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+PHONES = ["98765432%02d" % i for i in range(50)]
+VEHICLES = ["MH12AB%04d" % (1000 + 37 * i) for i in range(50)]
+IPS = ["%d.%d.%d.%d" % (11 + i % 200, i * 7 % 256, i * 13 % 256, i % 250 + 1) for i in range(50)]
+IFSC_CODES = ["HDFC0000001", "SBIN0000691", "ICIC0000011", "PUNB0012000"]
+IFSC_QUERIES = ["hdfc mumbai", "state bank", "ludhiyana", "bank:icici"]
+TRACKED_KEYS = ("p50_ms", "p90_ms", "p99_ms", "throughput_per_s", "peak_rss_mb")
+
+
+# --- image corpus -------------------------------------------------------------
+
+def build_corpus(directory, seed=3):
+    """Writes the benchmark images (photos with EXIF, screenshots, a receipt, a long page)."""
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    words = random.Random(seed)
+    vocab = "account transfer branch mobile number address district verified amount invoice".split()
+    paths = []
+
+    for i in range(3):
+        # Camera-like photo: smooth noise, JPEG with Make/Model/DateTime/GPS tags.
+        photo = cv2.GaussianBlur(rng.integers(0, 255, (1200, 1600, 3), np.uint8), (0, 0), 6)
+        image = Image.fromarray(photo[:, :, ::-1])
+        exif = Image.Exif()
+        exif[0x010F] = "BenchCam"
+        exif[0x0110] = f"Model {i + 1}"
+        exif[0x0132] = f"2024:0{i + 1}:1{i} 10:20:30"
+        exif[0x8825] = {1: "N", 2: (19.0, 4.0, 12.0), 3: "E", 4: (72.0, 52.0, 30.0)}
+        path = os.path.join(directory, f"photo_{i}.jpg")
+        image.save(path, quality=90, exif=exif)
+        paths.append(path)
+
+    def text_image(name, width, lines, scale=0.9):
+        img = np.full((60 + 40 * lines, width), 255, np.uint8)
+        for line in range(lines):
+            text = ' '.join(words.choice(vocab) for _ in range(words.randint(3, 6)))
+            cv2.putText(img, text, (20, 45 + 40 * line), cv2.FONT_HERSHEY_SIMPLEX, scale, 0, 2, cv2.LINE_AA)
+        path = os.path.join(directory, name)
+        cv2.imwrite(path, img)
+        paths.append(path)
+
+    text_image("screenshot_small.png", 900, 12)
+    text_image("receipt.jpg", 700, 40)
+    text_image("long_screenshot.png", 1100, 110)
+    return paths
+
+
+# --- measurement ----------------------------------------------------------------
+
+def _status_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_peak_rss():
+    """Resets VmHWM (Linux >= 4.0); returns False where that is not possible."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def percentile(sorted_values, q):
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method='inclusive')[q - 1]
+
+
+def measure(fn, inputs, calls, heap_calls):
+    """Runs ``fn`` over ``inputs`` (cycled) ``calls`` times; returns the result row."""
+    fn(inputs[0])  # warm-up: lazy imports, connection setup
+    can_reset = _reset_peak_rss()
+    rss_before = _status_kb('VmRSS')
+    latencies = []
+    start = time.perf_counter()
+    for i in range(calls):
+        t = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        latencies.append((time.perf_counter() - t) * 1000)
+    wall = time.perf_counter() - start
+    peak_rss = (_status_kb('VmHWM') - rss_before) / 1024 if can_reset else None
+
+    tracemalloc.start()
+    for i in range(min(heap_calls, calls)):
+        fn(inputs[i % len(inputs)])
+    heap_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "calls": calls,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "throughput_per_s": round(calls / wall, 1),
+        "peak_rss_mb": round(max(peak_rss, 0.0), 1) if peak_rss is not None else None,
+        "py_heap_peak_kb": round(heap_peak / 1024, 1),
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# --- suite ----------------------------------------------------------------------
+
+def benchmarks(starkosint, corpus, devnull):
+    """(name, group, function, inputs, setup) for every benchmarked lookup, in run order."""
+    import ifsc_index
+    from render import Renderer
+    from stub_servers import FIXTURES_DIR
+
+    renderer = Renderer("pretty", animate=False, stream=devnull)
+
+    def build_ifsc_index():
+        # Runs after the network IFSC benchmark, which must not find an index.
+        ifsc_index.build_index(os.path.join(FIXTURES_DIR, 'ifsc.json'), starkosint.IFSC_INDEX_PATH)
+        starkosint._ifsc_index = None
+
+    def warm_lookup_cache(lookup, inputs):
+        # Memory + SQLite cache in the temporary data dir, holding every input.
+        def setup():
+            from lookup_cache import LookupCache
+            if starkosint._lookup_cache is None:
+                starkosint._lookup_cache = LookupCache(os.path.join(starkosint.DATA_DIR, 'lookup-cache.sqlite3'),
+                                                       starkosint.LOOKUP_CACHE_TTLS)
+            for value in inputs:
+                lookup(value)
+        return setup
+
+    def offline_ifsc(code):
+        return starkosint.lookup_ifsc_info(code, offline_only=True)
+
+    def leak_report(query):
+        starkosint.generate_report(query, renderer)
+
+    def image_source(path):
+        from image_source import ImageSource
+        return ImageSource.open(path)
+
+    def exif(path):
+        with image_source(path) as source:
+            return starkosint.extract_exif_data(source)
+
+    def ocr(path):
+        with image_source(path) as source:
+            return starkosint.extract_text_from_image(source)
+
+    return [
+        ("trace_number", "phone", starkosint.trace_number, PHONES, None),
+        ("generate_report", "leaks", leak_report, PHONES, None),
+        ("lookup_vehicle_info_api", "vehicle", starkosint.lookup_vehicle_info_api, VEHICLES, None),
+        ("get_vehicle_details_vahanx", "vehicle", starkosint.get_vehicle_details_vahanx, VEHICLES, None),
+        ("lookup_ip_info", "ip", starkosint.lookup_ip_info, IPS, None),
+        ("lookup_ifsc_info", "ifsc", starkosint.lookup_ifsc_info, IFSC_CODES, None),
+        ("lookup_ip_info[cached]", "ip", starkosint.lookup_ip_info, IPS,
+         warm_lookup_cache(starkosint.lookup_ip_info, IPS)),
+        ("lookup_ifsc_info[cached]", "ifsc", starkosint.lookup_ifsc_info, IFSC_CODES,
+         warm_lookup_cache(starkosint.lookup_ifsc_info, IFSC_CODES)),
+        ("lookup_ifsc_info[offline]", "ifsc", offline_ifsc, IFSC_CODES, build_ifsc_index),
+        ("search_ifsc_branches", "ifsc", starkosint.search_ifsc_branches, IFSC_QUERIES, None),
+        ("extract_exif_data", "image", exif, corpus, None),
+        ("extract_text_from_image", "image", ocr, corpus, None),
+    ]
+
+
+def run_suite(args):
+    from stub_servers import StubSet
+
+    with tempfile.TemporaryDirectory() as data_dir, StubSet() as stubs, open(os.devnull, 'w') as devnull:
+        # Before importing starkosint: no local indexes, no result caches
+        # (the [cached] benchmarks install their own lookup cache).
+        os.environ['STARK_DATA_DIR'] = data_dir
+        os.environ['STARK_IMAGE_CACHE'] = '0'
+        os.environ['STARK_LOOKUP_CACHE'] = '0'
+        os.environ['STARK_NEAR_DUP'] = 'off'
+        import starkosint
+
+        logging.getLogger('exifread').setLevel(logging.ERROR)  # "PNG file does not have exif data."
+        for host, url in stubs.routes.items():
+            starkosint.http().route(host, url)
+        corpus = [] if args.skip_images else (
+            sorted(os.path.join(args.corpus, n) for n in os.listdir(args.corpus)) if args.corpus
+            else build_corpus(data_dir))
+
+        results = {}
+        for name, group, fn, inputs, setup in benchmarks(starkosint, corpus, devnull):
+            if not inputs or args.only and group not in args.only and name not in args.only:
+                continue
+            if setup:
+                setup()
+            calls = args.image_passes * len(inputs) if group == "image" else args.iterations
+            results[name] = measure(fn, inputs, calls, args.heap_calls)
+            print(f"  {name:<28} p50 {results[name]['p50_ms']:>9.2f} ms", file=sys.stderr)
+        return {"meta": metadata(), "http": starkosint.http().stats(), "results": results}
+
+
+def print_results(report):
+    print(f"{'function':<28} {'calls':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'ops/s':>9} {'RSS+ MB':>8} {'heap KB':>9}")
+    for name, r in report["results"].items():
+        rss = f"{r['peak_rss_mb']:.1f}" if r['peak_rss_mb'] is not None else "n/a"
+        print(f"{name:<28} {r['calls']:>6} {r['p50_ms']:>9.2f} {r['p90_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['throughput_per_s']:>9.1f} {rss:>8} {r['py_heap_peak_kb']:>9.1f}")
+
+
+def compare(report, baseline, threshold):
+    """Prints the change per function and metric; returns the regressed (name, metric) pairs."""
+    regressions = []
+    print(f"\nvs {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'function':<28} " + ' '.join(f"{k:>17}" for k in TRACKED_KEYS))
+    for name, r in report["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        cells = []
+        for key in TRACKED_KEYS:
+            if not old.get(key) or r.get(key) is None:
+                cells.append(f"{'n/a':>17}")
+                continue
+            change = 100.0 * (r[key] - old[key]) / old[key]
+            # Higher throughput is better; for every other metric lower is better.
+            worse = -change if key == "throughput_per_s" else change
+            flag = '!' if worse > threshold else ' '
+            if flag == '!':
+                regressions.append((name, key))
+            cells.append(f"{change:>+15.1f}%{flag}")
+        print(f"{name:<28} " + ' '.join(cells))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200, help='calls per network lookup (default: 200)')
+    parser.add_argument('--image-passes', type=int, default=2, help='passes over the image corpus (default: 2)')
+    parser.add_argument('--heap-calls', type=int, default=5, help='calls traced with tracemalloc (default: 5)')
+    parser.add_argument('--corpus', help='directory of images to use instead of the generated corpus')
+    parser.add_argument('--skip-images', action='store_true', help='skip the EXIF/OCR benchmarks')
+    parser.add_argument('--only', type=lambda s: set(s.split(',')),
+                        help='comma-separated groups (phone,leaks,vehicle,ip,ifsc,image) or function names')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='percent change counted as a regression (default: 10)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit with status 1 on regressions')
+    args = parser.parse_args(argv)
+
+    report = run_suite(args)
+    print_results(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:g}%")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Streaming bulk IP enrichment for web-server logs.
+
+Reads log lines from a file or stdin, pulls out IPv4 addresses, dedupes them
+and resolves each unique address once: from the local range index when it
+covers the address, otherwise through ip-api.com's batch endpoint (up to 100
+addresses per POST) on a pooled transport (see transport.py) with a bounded
+number of batches in flight. Results are written as NDJSON in completion order
+as soon as each batch returns, so memory grows with the number of unique IPs,
+not the log size.
+
+Used by ``python scripts/starkosint.py bulk-ip access.log -o enriched.ndjson``.
+"""
+
+import json
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from transport import Transport
+
+IP_API_BATCH_URL = "http://ip-api.com/batch"
+IP_API_FIELDS = "status,message,country,countryCode,region,regionName,city,zip,lat,lon,timezone,isp,org,as,query"
+MAX_BATCH_SIZE = 100
+
+IPV4_RE = re.compile(r'(?<![\d.])(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(?![\d.])')
+
+
+def iter_ips(lines):
+    """Yields every IPv4 address found in ``lines``, in order of appearance."""
+    for line in lines:
+        yield from IPV4_RE.findall(line)
+
+
+def resolve_batch(transport, endpoint, ips):
+    """POSTs one batch to an ip-api style endpoint; returns a list of result dicts."""
+    try:
+        response = transport.post(endpoint, params={"fields": IP_API_FIELDS}, json=ips)
+        response.raise_for_status()
+        results = response.json()
+        # ip-api reports the remaining request budget; wait out the window instead of getting banned.
+        if response.headers.get('X-Rl') == '0':
+            time.sleep(int(response.headers.get('X-Ttl', '1')))
+    except Exception as e:
+        return [{"query": ip, "status": "fail", "message": f"batch request failed: {e}"} for ip in ips]
+    if not isinstance(results, list) or len(results) != len(ips):
+        return [{"query": ip, "status": "fail", "message": "unexpected batch response"} for ip in ips]
+    return results
+
+
+def _write(out, ip, backend, fields):
+    record = {"ip": ip, "backend": backend}
+    record.update((k, v) for k, v in fields.items() if k != "query")
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def enrich(lines, out, endpoint=IP_API_BATCH_URL, batch_size=MAX_BATCH_SIZE, concurrency=4,
+           local_index=None, transport=None):
+    """Enriches every unique IP in ``lines`` and writes NDJSON to ``out``.
+
+    Returns a stats dict: occurrences seen, unique IPs, how many were answered
+    by the local index vs the remote endpoint, the cache hit ratio (share of
+    occurrences answered without a remote lookup) and throughput.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    # A dedicated transport so the per-host limit and pool match the requested concurrency.
+    transport = transport or Transport(per_host_limit=concurrency, pool_size=concurrency)
+    seen = set()
+    stats = {"occurrences": 0, "unique": 0, "local": 0, "remote": 0, "failed": 0}
+    start = time.perf_counter()
+
+    def drain(futures, block_until):
+        while len(futures) > block_until:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                for result in future.result():
+                    if result.get("status") != "success":
+                        stats["failed"] += 1
+                    _write(out, result.get("query"), "ip-api", result)
+                out.flush()
+
+    futures = set()
+    batch = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ip in iter_ips(lines):
+            stats["occurrences"] += 1
+            if ip in seen:
+                continue
+            seen.add(ip)
+            stats["unique"] += 1
+
+            if local_index is not None:
+                record = local_index.get(ip)
+                if record is not None:
+                    stats["local"] += 1
+                    record["status"] = "success"
+                    _write(out, ip, local_index.backend, record)
+                    continue
+
+            batch.append(ip)
+            if len(batch) == batch_size:
+                stats["remote"] += len(batch)
+                futures.add(pool.submit(resolve_batch, transport, endpoint, batch))
+                batch = []
+                # Bound memory and upstream load: at most 2 batches queued per worker.
+                drain(futures, 2 * concurrency - 1)
+
+        if batch:
+            stats["remote"] += len(batch)
+            futures.add(pool.submit(resolve_batch, transport, endpoint, batch))
+        drain(futures, 0)
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["ips_per_sec"] = round(stats["occurrences"] / elapsed, 1) if elapsed else None
+    stats["unique_ips_per_sec"] = round(stats["unique"] / elapsed, 1) if elapsed else None
+    stats["http"] = transport.stats()
+    answered_without_remote = stats["occurrences"] - stats["remote"]
+    stats["cache_hit_ratio"] = round(answered_without_remote / stats["occurrences"], 4) if stats["occurrences"] else 0.0
+    return stats
+
+
+def print_summary(stats, stream=sys.stderr):
+    print(f"IPs seen: {stats['occurrences']} | unique: {stats['unique']} | local: {stats['local']} | "
+          f"remote: {stats['remote']} | failed: {stats['failed']}", file=stream)
+    print(f"Throughput: {stats['ips_per_sec']} IPs/sec ({stats['unique_ips_per_sec']} unique/sec) "
+          f"in {stats['elapsed_s']}s | cache hit ratio: {stats['cache_hit_ratio']:.1%}", file=stream)
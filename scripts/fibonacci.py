@@ -1,12 +1,200 @@
+"""Fibonacci numbers: fast doubling, streaming and modular (Pisano-aware).
+
+  fib(n)            F(n) by fast doubling: O(log n) big-int multiplications
+                    instead of n additions, memoised for repeated queries
+  fib_stream()      the sequence as a generator in constant memory
+  fib_mod(n, m)     F(n) mod m without ever building F(n); very large n is
+                    first reduced modulo the Pisano period of m
+  pisano_period(m)  the period of F mod m, from the factorisation of m
+
+fibonacci(n) is the original list builder, kept for the script output and
+as the baseline in bench_fibonacci.py.
+
+    python scripts/fibonacci.py              # the first 15 numbers
+    python scripts/fibonacci.py --nth 1000
+    python scripts/fibonacci.py --nth 10**18 --mod 1000000007
+"""
+
+import argparse
+import functools
+import math
+import random
+
+from prime_numbers import is_prime
+
+FIB_CACHE_SIZE = 256
+
+
 def fibonacci(n):
+    """The first n Fibonacci numbers as a list (at least [0, 1]; the original implementation)."""
     fib_sequence = [0, 1]
     for i in range(2, n):
         fib_sequence.append(fib_sequence[i-1] + fib_sequence[i-2])
     return fib_sequence
 
-print("=== Fibonacci Sequence ===")
-n = 15
-sequence = fibonacci(n)
-print(f"First {n} Fibonacci numbers:")
-print(", ".join(map(str, sequence)))
-print(f"\nSum of sequence: {sum(sequence)}")
+
+def fib_pair(n, mod=None):
+    """(F(n), F(n+1)) for n >= 0 by fast doubling, optionally modulo ``mod``.
+
+    Walks the bits of n from the top: from k to 2k uses
+    F(2k) = F(k) * (2F(k+1) - F(k)) and F(2k+1) = F(k)^2 + F(k+1)^2.
+    """
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if mod is not None:
+            c %= mod
+            d %= mod
+        if bit == '1':
+            a, b = d, c + d
+            if mod is not None:
+                b %= mod
+        else:
+            a, b = c, d
+    return a, b
+
+
+@functools.lru_cache(maxsize=FIB_CACHE_SIZE)
+def fib(n):
+    """F(n) for any integer n (F(-n) = (-1)^(n+1) F(n)), memoised."""
+    if n < 0:
+        value = fib(-n)
+        return value if n % 2 else -value
+    return fib_pair(n)[0]
+
+
+def fib_stream(start=0, stop=None, mod=None):
+    """Yields F(start), F(start+1), ... up to F(stop-1) (forever without ``stop``)."""
+    a, b = fib_pair(start, mod)
+    n = start
+    while stop is None or n < stop:
+        yield a
+        a, b = b, a + b
+        if mod is not None:
+            b %= mod
+        n += 1
+
+
+# --- Pisano periods ---------------------------------------------------------------
+
+def _pollard_rho(n):
+    """A non-trivial factor of the composite n (Brent's variant)."""
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(n)
+    while True:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def factorize(n):
+    """{prime: exponent} for n >= 1 (trial division by small primes, then Pollard rho)."""
+    factors = {}
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            d = _pollard_rho(m)
+            stack += [d, m // d]
+    return factors
+
+
+def _minimal_period(candidate, modulus):
+    """The smallest divisor d of ``candidate`` with (F(d), F(d+1)) = (0, 1) mod ``modulus``."""
+    period = candidate
+    for q in factorize(candidate):
+        while period % q == 0 and fib_pair(period // q, modulus) == (0, 1 % modulus):
+            period //= q
+    return period
+
+
+@functools.lru_cache(maxsize=FIB_CACHE_SIZE)
+def _prime_power_period(p, k):
+    if p == 2:
+        base = 3
+    elif p == 5:
+        base = 20
+    else:
+        # pi(p) divides p - 1 when p = +-1 (mod 5), and 2(p + 1) otherwise.
+        base = _minimal_period(p - 1 if p % 5 in (1, 4) else 2 * (p + 1), p)
+    # pi(p^k) divides p^(k-1) * pi(p).
+    return _minimal_period(p ** (k - 1) * base, p ** k) if k > 1 else base
+
+
+@functools.lru_cache(maxsize=FIB_CACHE_SIZE)
+def pisano_period(m):
+    """Period of the Fibonacci sequence modulo m (m >= 1)."""
+    if m < 1:
+        raise ValueError("the modulus must be positive")
+    period = 1
+    for p, k in factorize(m).items():
+        period = math.lcm(period, _prime_power_period(p, k))
+    return period
+
+
+def fib_mod(n, m):
+    """F(n) mod m for n >= 0; n far larger than m is reduced by the Pisano period first."""
+    if m == 1:
+        return 0
+    if n.bit_length() > 2 * m.bit_length() + 64:
+        n %= pisano_period(m)
+    return fib_pair(n, m)[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fibonacci numbers.")
+    parser.add_argument('--count', type=int, default=15, help='how many numbers of the sequence to print (default: 15)')
+    parser.add_argument('--nth', help='print F(n) instead (n may be an expression such as 10**18)')
+    parser.add_argument('--mod', type=int, help='with --nth: print F(n) mod this number')
+    args = parser.parse_args(argv)
+
+    if args.nth is not None:
+        base, _, exponent = args.nth.partition('**')
+        n = int(base) ** int(exponent) if exponent else int(base)
+        if args.mod:
+            print(f"F({args.nth}) mod {args.mod} = {fib_mod(n, args.mod)} (Pisano period {pisano_period(args.mod)})")
+        else:
+            value = fib(n)
+            print(f"F({args.nth}) = {value}" if value.bit_length() < 13000 else
+                  f"F({args.nth}) has {value.bit_length()} bits (~{int(value.bit_length() * math.log10(2)) + 1} digits)")
+        return
+
+    print("=== Fibonacci Sequence ===")
+    n = args.count
+    sequence = fibonacci(n)
+    print(f"First {n} Fibonacci numbers:")
+    print(", ".join(map(str, sequence)))
+    print(f"\nSum of sequence: {sum(sequence)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Offline IFSC index: a memory-mapped hash table keyed by the 11-character code.
+
+File layout (little-endian):
+
+  header   magic b'IFSCIDX1', slot count, record count, data offset
+  slots    slot_count x (code[11], pad, offset u32, length u32), open addressing
+  data     compact JSON record per code, in the same field names the Razorpay
+           IFSC API returns (BANK, BRANCH, ADDRESS, CITY, ...)
+
+A lookup hashes the code, probes a couple of 20-byte slots straight out of the
+mmap and decodes one small JSON blob, so it costs microseconds and the OS page
+cache is shared between processes. Indexes are built from the public dataset
+dumps (IFSC.csv or the per-bank JSON files) and can be refreshed in place:
+
+    python scripts/ifsc_index.py build IFSC.csv ~/.starkosint/ifsc.idx
+    python scripts/ifsc_index.py refresh ~/.starkosint/ifsc.idx IFSC-new.csv
+    python scripts/ifsc_index.py get ~/.starkosint/ifsc.idx HDFC0000001
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+MAGIC = b'IFSCIDX1'
+HEADER = struct.Struct('<8sIIQ')
+SLOT = struct.Struct('<11sxII')
+CODE_LEN = 11
+
+# Dataset columns that hold booleans; the CSV dump spells them "true"/"false".
+BOOL_FIELDS = ('UPI', 'IMPS', 'RTGS', 'NEFT')
+
+
+def _slot_index(code, slot_count):
+    return zlib.crc32(code) & (slot_count - 1)
+
+
+def normalize_record(raw):
+    """Normalises one dataset row to the API's field names and value types."""
+    record = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        key = key.strip().upper()
+        if isinstance(value, str):
+            value = value.strip()
+            if key in BOOL_FIELDS:
+                value = value.lower() in ('true', '1', 'yes')
+        if value is None or value == '':
+            continue  # blank CSV cells are left out rather than stored as ''
+        record[key] = value
+    code = str(record.get('IFSC', '')).upper()
+    if len(code) != CODE_LEN:
+        return None
+    record['IFSC'] = code
+    return record
+
+
+def load_dump(path):
+    """Yields normalised records from an IFSC dataset dump.
+
+    Accepts the CSV release file, a JSON file holding either a list of records
+    or a {code: record} mapping, or a directory of such JSON files (the
+    per-bank split of the dataset).
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(('.json', '.csv')):
+                yield from load_dump(os.path.join(path, name))
+        return
+
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                record = normalize_record(row)
+                if record:
+                    yield record
+        return
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    rows = data.values() if isinstance(data, dict) else data
+    for row in rows:
+        if isinstance(row, dict):
+            record = normalize_record(row)
+            if record:
+                yield record
+
+
+def write_index(records, path):
+    """Writes ``records`` (code -> record dict) to ``path`` atomically."""
+    count = len(records)
+    slot_count = 1
+    while slot_count < max(2 * count, 8):
+        slot_count <<= 1
+
+    slots = bytearray(slot_count * SLOT.size)
+    blobs = []
+    offset = 0
+    for code, record in records.items():
+        blob = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        key = code.encode('ascii')
+        i = _slot_index(key, slot_count)
+        while slots[i * SLOT.size] != 0:
+            i = (i + 1) & (slot_count - 1)
+        SLOT.pack_into(slots, i * SLOT.size, key, offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+
+    data_offset = HEADER.size + len(slots)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.ifsc-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, slot_count, count, data_offset))
+            f.write(slots)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())  # the rename must not land before the data
+        # Readers holding the old mmap keep their view; new opens see the new file.
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class IFSCIndex:
+    """Read-only view of an index file written by write_index."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._slot_count, self._count, self._data_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not an IFSC index file")
+
+    def _find(self, key):
+        mask = self._slot_count - 1
+        i = _slot_index(key, self._slot_count)
+        while True:
+            pos = HEADER.size + i * SLOT.size
+            code, offset, length = SLOT.unpack_from(self._mm, pos)
+            if code == key:
+                return offset, length
+            if code[0] == 0:
+                return None
+            i = (i + 1) & mask
+
+    def get(self, ifsc_code):
+        """Returns the record dict for ``ifsc_code`` or None."""
+        code = ifsc_code.strip().upper()
+        if len(code) != CODE_LEN:
+            return None
+        try:
+            key = code.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+        hit = self._find(key)
+        if hit is None:
+            return None
+        start = self._data_offset + hit[0]
+        return json.loads(self._mm[start:start + hit[1]])
+
+    def __contains__(self, ifsc_code):
+        return self.get(ifsc_code) is not None
+
+    def __len__(self):
+        return self._count
+
+    def raw_items(self):
+        """Yields (code, JSON bytes) for every entry, in slot order, without decoding."""
+        for i in range(self._slot_count):
+            code, offset, length = SLOT.unpack_from(self._mm, HEADER.size + i * SLOT.size)
+            if code[0] != 0:
+                start = self._data_offset + offset
+                yield code.decode('ascii'), self._mm[start:start + length]
+
+    def items(self):
+        """Yields (code, record) for every entry, in slot order."""
+        for code, blob in self.raw_items():
+            yield code, json.loads(blob)
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_index(dump_path, index_path):
+    """Builds a fresh index from a dataset dump. Returns the record count."""
+    records = {r['IFSC']: r for r in load_dump(dump_path)}
+    write_index(records, index_path)
+    return len(records)
+
+
+def refresh_index(index_path, dump_path, prune=False):
+    """Merges a newer (full or partial) dump into an existing index.
+
+    Records from the dump replace or extend the current ones; with ``prune``
+    the dump is treated as complete and codes missing from it are dropped.
+    The file is only rewritten when something changed. Returns counts of
+    added/updated/removed/unchanged records.
+    """
+    current = {}
+    if os.path.exists(index_path):
+        with IFSCIndex(index_path) as index:
+            current = dict(index.items())
+
+    stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    seen = set()
+    for record in load_dump(dump_path):
+        code = record['IFSC']
+        seen.add(code)
+        old = current.get(code)
+        if old is None:
+            stats["added"] += 1
+        elif old != record:
+            stats["updated"] += 1
+        else:
+            stats["unchanged"] += 1
+            continue
+        current[code] = record
+
+    if prune:
+        for code in [c for c in current if c not in seen]:
+            del current[code]
+            stats["removed"] += 1
+
+    if stats["added"] or stats["updated"] or stats["removed"] or not os.path.exists(index_path):
+        write_index(current, index_path)
+    stats["total"] = len(current)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the offline IFSC index.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('build', help='build an index from a dataset dump')
+    p.add_argument('dump')
+    p.add_argument('index')
+
+    p = sub.add_parser('refresh', help='merge a newer dump into an existing index')
+    p.add_argument('index')
+    p.add_argument('dump')
+    p.add_argument('--prune', action='store_true', help='drop codes that are not in the dump')
+
+    p = sub.add_parser('get', help='look up one code')
+    p.add_argument('index')
+    p.add_argument('code')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        print(f"Indexed {build_index(args.dump, args.index)} IFSC codes into {args.index}")
+    elif args.command == 'refresh':
+        print(json.dumps(refresh_index(args.index, args.dump, prune=args.prune)))
+    elif args.command == 'get':
+        with IFSCIndex(args.index) as index:
+            record = index.get(args.code)
+        if record is None:
+            print(f"{args.code} not found", file=sys.stderr)
+            return 1
+        print(json.dumps(record, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
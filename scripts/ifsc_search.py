@@ -0,0 +1,392 @@
+"""Free-text branch search over the offline IFSC data.
+
+ifsc_index.py answers exact codes. This index answers the question analysts
+actually have ("HDFC, Andheri, Mumbai - which code?") by searching the bank
+name, branch, city, district, MICR and IFSC code of every branch, and ranks
+the matching branches.
+
+File layout (little-endian), built from an ifsc.idx file:
+
+  header    magic b'IFSCSRH1', doc/token/entry counts, vocabulary size and
+            the size + mtime of the ifsc.idx it was synced from
+  postings  entry_count x u32: doc id << 8 | field mask, grouped by token and
+            sorted by doc id within a token
+  offsets   (token_count + 1) x u32 into postings
+  docs      doc_count x (code[11], crc32 u32 of the record), sorted by code
+  vocab     the sorted tokens, newline-separated
+
+The vocabulary is a sorted list, which serves as an implicit trie: a prefix
+is a bisect range, and typo-tolerant matching walks the list like a trie,
+sharing one edit-distance row per common prefix and skipping every token
+under a prefix that is already too far from the query word. Posting lists
+are combined with numpy, so even words in most records ("bank") cost
+milliseconds. Each query word must match (AND); a branch scores the sum over
+words of field weight x match quality (exact > prefix > one typo > two).
+
+sync() keeps the index in step with ifsc.idx incrementally: records whose
+JSON is byte-identical (same crc32) keep their postings, and only added or
+changed records are decoded and tokenised again.
+
+    python scripts/ifsc_search.py sync ~/.starkosint/ifsc.idx ~/.starkosint/ifsc-search.idx
+    python scripts/ifsc_search.py query ~/.starkosint/ifsc-search.idx "hdfc andheri mumbai"
+    python scripts/ifsc_search.py query ~/.starkosint/ifsc-search.idx "bank:sbi city:pune"
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import zlib
+
+import numpy as np
+
+from ifsc_index import IFSCIndex
+
+MAGIC = b'IFSCSRH1'
+HEADER = struct.Struct('<8sIIIIQQ')
+DOC_DTYPE = np.dtype([('code', 'S11'), ('crc', '<u4')])
+
+# Searched record fields, their bit in a posting's field mask and their weight.
+FIELDS = {
+    "IFSC": (0x01, 3.0),
+    "MICR": (0x02, 3.0),
+    "BRANCH": (0x04, 3.0),
+    "BANK": (0x08, 2.0),
+    "CITY": (0x10, 2.0),
+    "DISTRICT": (0x20, 1.5),
+}
+ALL_FIELDS = 0x3F
+# A token found in several fields of a record counts with its best field.
+_MASK_WEIGHTS = np.array([max([weight for bit, weight in FIELDS.values() if mask & bit], default=0.0)
+                          for mask in range(256)])
+
+EXACT_QUALITY = 1.0
+PREFIX_QUALITY = 0.6
+FUZZY_QUALITY = {1: 0.5, 2: 0.3}
+FUZZY_MIN_LENGTH = 4   # shorter words are only matched exactly or as prefixes
+FUZZY_TWO_EDITS = 8    # words this long tolerate two edits
+MAX_PREFIX_TOKENS = 256  # a very short prefix expands to its most frequent tokens
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_END = '\uffff'  # sorts after every token
+
+
+def record_tokens(record):
+    """{token: field mask} for the searched fields of one IFSC record."""
+    tokens = {}
+    for field, (bit, _) in FIELDS.items():
+        for word in _WORD_RE.findall(str(record.get(field) or '').lower()):
+            tokens[word] = tokens.get(word, 0) | bit
+    return tokens
+
+
+def parse_query(query):
+    """[(word, field mask)]; ``field:value`` restricts value's words to one field."""
+    terms = []
+    for part in query.split():
+        field, sep, value = part.partition(':')
+        mask = ALL_FIELDS
+        if sep and field.upper() in FIELDS:
+            mask, part = FIELDS[field.upper()][0], value
+        terms.extend((word, mask) for word in _WORD_RE.findall(part.lower()))
+    return terms
+
+
+def fuzzy_tokens(tokens, word, max_dist):
+    """(token id, distance) for every token within ``max_dist`` edits of ``word``.
+
+    Edits are insertions, deletions, substitutions and adjacent transpositions
+    (optimal string alignment). ``tokens`` must be sorted.
+    """
+    n = len(word)
+    rows = [list(range(n + 1))]  # rows[k]: distances for the first k characters of the current token
+    found = []
+    prev = ''
+    i, count = 0, len(tokens)
+    while i < count:
+        token = tokens[i]
+        common, limit = 0, min(len(prev), len(token), len(rows) - 1)
+        while common < limit and prev[common] == token[common]:
+            common += 1
+        del rows[common + 1:]
+        for k in range(common, len(token)):
+            ch = token[k]
+            above = rows[k]
+            row = [k + 1]
+            for j in range(1, n + 1):
+                value = min(above[j] + 1, row[j - 1] + 1, above[j - 1] + (word[j - 1] != ch))
+                if k and j > 1 and ch == word[j - 2] and token[k - 1] == word[j - 1]:
+                    value = min(value, rows[k - 1][j - 2] + 1)
+                row.append(value)
+            rows.append(row)
+            if min(row) > max_dist:
+                # No token under this prefix can come back within range.
+                prev = token[:k + 1]
+                i = bisect.bisect_left(tokens, prev + _END, i + 1)
+                break
+        else:
+            if rows[-1][n] <= max_dist:
+                found.append((i, rows[-1][n]))
+            prev = token
+            i += 1
+    return found
+
+
+class IFSCSearch:
+    """Read-only view of a search index file written by sync()."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, docs, tokens, entries, vocab_bytes, size, mtime = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not an IFSC search index")
+        self.source = (size, mtime)
+        pos = HEADER.size
+        self.postings = np.frombuffer(self._mm, np.uint32, entries, pos)
+        pos += 4 * entries
+        self.offsets = np.frombuffer(self._mm, np.uint32, tokens + 1, pos)
+        pos += 4 * (tokens + 1)
+        self.docs = np.frombuffer(self._mm, DOC_DTYPE, docs, pos)
+        pos += DOC_DTYPE.itemsize * docs
+        self.tokens = self._mm[pos:pos + vocab_bytes].decode('utf-8').split('\n') if tokens else []
+
+    def __len__(self):
+        return len(self.docs)
+
+    def expand(self, word):
+        """(token id, quality) for the vocabulary tokens that ``word`` matches."""
+        tokens = self.tokens
+        lo = bisect.bisect_left(tokens, word)
+        hi = bisect.bisect_left(tokens, word + _END, lo)
+        matches = []
+        exact = lo < hi and tokens[lo] == word
+        if exact:
+            matches.append((lo, EXACT_QUALITY))
+            lo += 1
+        prefixed = range(lo, hi)
+        if len(prefixed) > MAX_PREFIX_TOKENS:
+            sizes = np.diff(self.offsets[lo:hi + 1].astype(np.int64))
+            prefixed = sorted(lo + int(t) for t in np.argpartition(-sizes, MAX_PREFIX_TOKENS)[:MAX_PREFIX_TOKENS])
+        matches.extend((t, PREFIX_QUALITY) for t in prefixed)
+        if not exact and len(word) >= FUZZY_MIN_LENGTH and not word.isdigit():
+            seen = {t for t, _ in matches}
+            max_dist = 2 if len(word) >= FUZZY_TWO_EDITS else 1
+            matches.extend((t, FUZZY_QUALITY[d]) for t, d in fuzzy_tokens(tokens, word, max_dist) if t not in seen)
+        return matches
+
+    def _term_scores(self, matches, fields):
+        """(sorted doc ids, best score per doc) for one query word."""
+        doc_parts, score_parts = [], []
+        for t, quality in matches:
+            post = self.postings[self.offsets[t]:self.offsets[t + 1]]
+            masks = post & fields
+            if fields != ALL_FIELDS:
+                keep = masks != 0
+                post, masks = post[keep], masks[keep]
+            doc_parts.append(post >> 8)
+            score_parts.append(_MASK_WEIGHTS[masks] * quality)
+        if not doc_parts:
+            return np.empty(0, np.uint32), np.empty(0)
+        if len(doc_parts) == 1:
+            return doc_parts[0], score_parts[0]
+        docs, scores = np.concatenate(doc_parts), np.concatenate(score_parts)
+        order = np.argsort(docs, kind='stable')
+        docs, scores = docs[order], scores[order]
+        starts = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+        return docs[starts], np.maximum.reduceat(scores, starts)
+
+    def search(self, query, limit=10):
+        """[(code, score)] of the best-matching branches, best first (ties in code order)."""
+        terms = parse_query(query)
+        if not terms:
+            return []
+        scored = []
+        for word, fields in terms:
+            docs, scores = self._term_scores(self.expand(word), fields)
+            if not len(docs):
+                return []
+            scored.append((docs, scores))
+        scored.sort(key=lambda item: len(item[0]))
+        docs, total = scored[0]
+        for other_docs, other_scores in scored[1:]:
+            docs, mine, theirs = np.intersect1d(docs, other_docs, assume_unique=True, return_indices=True)
+            total = total[mine] + other_scores[theirs]
+            if not len(docs):
+                return []
+        top = np.argsort(-total, kind='stable')[:limit]
+        codes = self.docs['code']
+        return [(codes[docs[i]].decode('ascii'), float(total[i])) for i in top]
+
+    def close(self):
+        self.postings = self.offsets = self.docs = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # an array view is still alive; the mapping goes when it does
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def source_signature(index_path):
+    """(size, mtime_ns) of an ifsc.idx file, recorded to detect later refreshes."""
+    st = os.stat(index_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def is_current(search_path, index_path):
+    """True if the search index exists and was synced from ``index_path`` as it is now."""
+    try:
+        with open(search_path, 'rb') as f:
+            header = f.read(HEADER.size)
+        magic, *_, size, mtime = HEADER.unpack(header)
+    except (OSError, struct.error):
+        return False
+    return magic == MAGIC and (size, mtime) == source_signature(index_path)
+
+
+def _write(path, signature, codes, crcs, tokens, offsets, postings):
+    vocab = '\n'.join(tokens).encode('utf-8')
+    docs = np.empty(len(codes), DOC_DTYPE)
+    docs['code'] = [code.encode('ascii') for code in codes]
+    docs['crc'] = [crcs[code] for code in codes]
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.ifsc-search-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(codes), len(tokens), len(postings), len(vocab), *signature))
+            f.write(postings.astype('<u4').tobytes())
+            f.write(offsets.astype('<u4').tobytes())
+            f.write(docs.tobytes())
+            f.write(vocab)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def sync(index_path, search_path):
+    """Brings the search index up to date with an ifsc.idx file.
+
+    Only records that are new or whose JSON changed are tokenised; postings of
+    unchanged records are carried over. The file is rewritten only if a record
+    changed. Returns counts of added/updated/removed/unchanged records.
+    """
+    signature = source_signature(index_path)
+    old = None
+    if os.path.exists(search_path):
+        try:
+            old = IFSCSearch(search_path)
+        except (OSError, ValueError):
+            old = None
+    try:
+        old_docs = {}
+        if old is not None:
+            old_docs = {code.decode('ascii'): (i, int(crc)) for i, (code, crc) in enumerate(old.docs.tolist())}
+
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        crcs, changed = {}, {}
+        with IFSCIndex(index_path) as index:
+            for code, blob in index.raw_items():
+                crc = crcs[code] = zlib.crc32(blob)
+                previous = old_docs.get(code)
+                if previous is not None and previous[1] == crc:
+                    stats["unchanged"] += 1
+                    continue
+                stats["updated" if previous else "added"] += 1
+                changed[code] = json.loads(blob)
+        stats["removed"] = len(old_docs) - stats["unchanged"] - stats["updated"]
+        stats["total"] = len(crcs)
+
+        if old is not None and not changed and not stats["removed"]:
+            if old.source != signature:
+                # Same records (e.g. an ifsc.idx refresh that changed nothing): just re-stamp.
+                with open(search_path, 'r+b') as f:
+                    f.seek(HEADER.size - 16)
+                    f.write(struct.pack('<QQ', *signature))
+            return stats
+
+        codes = sorted(crcs)
+        doc_ids = {code: i for i, code in enumerate(codes)}
+
+        # Postings carried over from the old index, renumbered to the new doc ids.
+        old_tokens = old.tokens if old is not None else []
+        kept_tokens = np.empty(0, np.int64)
+        kept_entries = np.empty(0, np.uint32)
+        if old_docs:
+            mapping = np.full(len(old_docs), -1, np.int64)
+            for code, (i, _) in old_docs.items():
+                if code in crcs and code not in changed:
+                    mapping[i] = doc_ids[code]
+            token_of = np.repeat(np.arange(len(old_tokens)), np.diff(old.offsets.astype(np.int64)))
+            new_doc = mapping[old.postings >> 8]
+            keep = new_doc >= 0
+            kept_tokens = token_of[keep]
+            kept_entries = (new_doc[keep].astype(np.uint32) << 8) | (old.postings[keep] & 0xFF)
+
+        added_tokens, added_entries = [], []
+        for code, record in changed.items():
+            doc = doc_ids[code]
+            for token, mask in record_tokens(record).items():
+                added_tokens.append(token)
+                added_entries.append(doc << 8 | mask)
+
+        vocab = sorted(set(old_tokens).union(added_tokens))
+        token_ids = {token: i for i, token in enumerate(vocab)}
+        if len(kept_tokens):
+            kept_tokens = np.array([token_ids[t] for t in old_tokens], np.int64)[kept_tokens]
+        tokens = np.concatenate([kept_tokens, np.array([token_ids[t] for t in added_tokens], np.int64)])
+        entries = np.concatenate([kept_entries, np.array(added_entries, np.uint32)])
+        order = np.lexsort((entries, tokens))
+        tokens, entries = tokens[order], entries[order]
+
+        # Drop tokens whose last record went away.
+        counts = np.bincount(tokens, minlength=len(vocab))
+        used = counts > 0
+        vocab = [token for token, keep in zip(vocab, used) if keep]
+        offsets = np.zeros(len(vocab) + 1, np.int64)
+        np.cumsum(counts[used], out=offsets[1:])
+        _write(search_path, signature, codes, crcs, vocab, offsets, entries)
+    finally:
+        if old is not None:
+            old.close()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the IFSC branch search index.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('sync', help='build or incrementally update the search index from an ifsc.idx')
+    p.add_argument('index')
+    p.add_argument('search')
+
+    p = sub.add_parser('query', help='search branches')
+    p.add_argument('search')
+    p.add_argument('query')
+    p.add_argument('--limit', type=int, default=10)
+
+    args = parser.parse_args(argv)
+    if args.command == 'sync':
+        print(json.dumps(sync(args.index, args.search)))
+    else:
+        with IFSCSearch(args.search) as search:
+            for code, score in search.search(args.query, args.limit):
+                print(f"{code}  {score:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
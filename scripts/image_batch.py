@@ -0,0 +1,202 @@
+"""Batch EXIF + OCR over a directory of images.
+
+Walks a directory tree and hands each image to a process pool sized to the
+CPUs this process may use. Every worker memory-maps the file (image_source.py),
+extracts EXIF, decodes to grayscale and runs Tesseract, timing each stage;
+results already in the image cache (image_cache.py) are returned without
+decoding, and byte-identical files within one batch are analysed only once.
+Images resembling one OCR'd before (in this batch or an earlier run) are
+marked with a "near_duplicate" entry from the near-duplicate index
+(near_dup.py); with STARK_NEAR_DUP=reuse, verified same-size re-encodes take
+their text from it instead of Tesseract (copies in flight at the same time
+are both OCR'd) and the summary reports how much OCR time that saved.
+Results are streamed as NDJSON in completion order while a bounded window of
+files is in flight, and a summary (images/sec, per-stage totals) is printed at
+the end.
+
+Used by ``python scripts/starkosint.py batch-images ./screenshots -o out.ndjson``.
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp', '.gif')
+STAGES = ('read', 'exif', 'decode', 'phash', 'ocr')
+
+
+def available_cpus():
+    """CPUs this process may run on (respects affinity masks, unlike os.cpu_count)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def iter_images(root):
+    """Yields image file paths under ``root`` (recursively, sorted per directory)."""
+    try:
+        entries = sorted(os.scandir(root), key=lambda e: e.name)
+    except (NotADirectoryError, PermissionError):
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_images(entry.path)
+        elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+            yield entry.path
+
+
+def _init_worker():
+    # One OS thread per worker: the pool already provides the parallelism.
+    # Set in the worker only (before cv2/Tesseract start OpenMP), so the parent's
+    # own in-process OCR after the batch keeps its threads.
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    import starkosint
+    starkosint.cv2.setNumThreads(1)
+    # Load the OCR engine on the worker's main thread; it then stays warm for every image.
+    starkosint.get_ocr_engine()
+
+
+def analyze_path(path, exif=True, ocr=True, digest=None):
+    """Runs the per-image pipeline in a worker; returns a JSON-ready dict."""
+    import starkosint
+    from image_source import ImageSource
+
+    cache = starkosint.get_image_cache()
+    hits_before, misses_before = (cache.hits, cache.misses) if cache else (0, 0)
+    timings = {}
+    result = {"path": path}
+    t = time.perf_counter()
+    image_data = None
+    try:
+        image_data = ImageSource.open(path)
+        timings['read'] = time.perf_counter() - t
+        digest = digest or image_data.digest()
+        result["sha256"] = digest
+
+        if exif:
+            t = time.perf_counter()
+            exif_result = starkosint.extract_exif_data(image_data, digest)
+            result["exif"] = exif_result if isinstance(exif_result, dict) else {}
+            timings['exif'] = time.perf_counter() - t
+
+        if ocr:
+            match = {}
+            text = starkosint.ocr_image_text(image_data, digest, timings, near_dup=match)
+            if text is None:
+                result["error"] = "could not decode image data"
+            else:
+                result["text"] = text
+            if match:
+                result["near_duplicate"] = match
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if image_data is not None:
+            image_data.close()
+
+    if cache:
+        result["cache"] = {"hits": cache.hits - hits_before, "misses": cache.misses - misses_before}
+    result["timings_ms"] = {k: round(1000 * v, 2) for k, v in timings.items()}
+    return result
+
+
+def _duplicate(result, path):
+    copy = {k: v for k, v in result.items() if k not in ("timings_ms", "cache")}
+    copy.update(path=path, duplicate_of=result["path"], timings_ms={})
+    return copy
+
+
+def run_batch(root, out, workers=None, exif=True, ocr=True):
+    """Processes every image under ``root``, writing NDJSON to ``out``; returns stats.
+
+    Files are hashed up front so byte-identical duplicates are analysed once:
+    later copies reuse the first result as soon as it is available.
+    """
+    from image_cache import file_digest
+
+    workers = workers or available_cpus()
+    stats = {"images": 0, "errors": 0, "duplicates": 0, "cache_hits": 0, "cache_misses": 0,
+             "near_duplicates": 0, "ocr_reused": 0, "ocr_saved_s": 0.0, "workers": workers, "stage_s": dict.fromkeys(('hash',) + STAGES, 0.0)}
+    start = time.perf_counter()
+    results_by_digest = {}
+    waiting = {}
+
+    def emit(result):
+        stats["images"] += 1
+        if "error" in result:
+            stats["errors"] += 1
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    def collect(futures, block_until):
+        while len(futures) > block_until:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                digest = futures.pop(future)
+                result = future.result()
+                for stage, ms in result["timings_ms"].items():
+                    stats["stage_s"][stage] += ms / 1000
+                cache = result.get("cache", {})
+                stats["cache_hits"] += cache.get("hits", 0)
+                stats["cache_misses"] += cache.get("misses", 0)
+                match = result.get("near_duplicate")
+                if match:
+                    stats["near_duplicates"] += 1
+                    if match["reused"]:
+                        stats["ocr_reused"] += 1
+                        stats["ocr_saved_s"] += match["saved_ms"] / 1000
+                    if match["sha256"] in results_by_digest:  # name the file from this batch
+                        match["of"] = results_by_digest[match["sha256"]]["path"]
+                results_by_digest[digest] = result
+                emit(result)
+                for path in waiting.pop(digest, ()):
+                    stats["duplicates"] += 1
+                    emit(_duplicate(result, path))
+            out.flush()
+
+    futures = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for path in iter_images(root):
+            t = time.perf_counter()
+            try:
+                digest = file_digest(path)
+            except OSError as e:
+                emit({"path": path, "error": str(e), "timings_ms": {}})
+                continue
+            stats["stage_s"]["hash"] += time.perf_counter() - t
+
+            if digest in results_by_digest:
+                stats["duplicates"] += 1
+                emit(_duplicate(results_by_digest[digest], path))
+                continue
+            if digest in waiting:
+                waiting[digest].append(path)
+                continue
+            waiting[digest] = []
+            futures[pool.submit(analyze_path, path, exif, ocr, digest)] = digest
+            # Keep a few tasks per worker queued, not the whole directory.
+            collect(futures, 4 * workers)
+        collect(futures, 0)
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["images_per_sec"] = round(stats["images"] / elapsed, 2) if elapsed else None
+    stats["stage_s"] = {k: round(v, 3) for k, v in stats["stage_s"].items()}
+    stats["ocr_saved_s"] = round(stats["ocr_saved_s"], 3)
+    return stats
+
+
+def print_summary(stats, stream=sys.stderr):
+    print(f"Images: {stats['images']} ({stats['errors']} errors) on {stats['workers']} workers "
+          f"in {stats['elapsed_s']}s -> {stats['images_per_sec']} images/sec", file=stream)
+    per_image = {k: (v / stats['images'] * 1000 if stats['images'] else 0) for k, v in stats['stage_s'].items()}
+    lookups = stats['cache_hits'] + stats['cache_misses']
+    print(f"Duplicates reused: {stats['duplicates']} | result cache: {stats['cache_hits']} hits / "
+          f"{stats['cache_misses']} misses ({stats['cache_hits'] / lookups if lookups else 0:.1%} hit ratio)", file=stream)
+    if stats['near_duplicates']:
+        print(f"Near-duplicates: {stats['near_duplicates']} found, OCR reused for {stats['ocr_reused']} "
+              f"({stats['ocr_saved_s']}s of Tesseract time saved)", file=stream)
+    print("Stage time (summed over workers): " + ", ".join(
+        f"{k} {v}s ({per_image[k]:.1f} ms/image)" for k, v in stats['stage_s'].items()), file=stream)
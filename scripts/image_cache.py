@@ -0,0 +1,162 @@
+"""Content-addressed on-disk cache for image analysis results.
+
+Entries are keyed by sha256(image content digest + analysis config), so the
+same pixels analysed with the same OCR/EXIF settings map to the same file no
+matter what the image is called, and changing the config (language, page
+segmentation, pipeline version) naturally misses. Values are small JSON
+documents written atomically (temp file + os.replace) into a two-level fan-out
+directory. The cache is size-bounded: when the tracked total passes
+``max_bytes`` the least recently used entries (oldest mtime; hits touch their
+file) are deleted until it is back under 90% of the limit.
+
+Several processes may share one directory; each keeps its own running size
+estimate and re-scans the directory before evicting.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def content_digest(data):
+    """Hex sha256 of image bytes (anything supporting the buffer protocol)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path):
+    """Hex sha256 of a file, streamed in chunks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ImageResultCache:
+    """Size-bounded LRU cache of JSON values in ``directory``."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(digest, config):
+        """Cache key for an image digest analysed under ``config``."""
+        return hashlib.sha256(f"{config}\0{digest}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key):
+        """Returns the cached value or None, counting the hit/miss."""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores ``value`` (JSON-serialisable) under ``key`` atomically."""
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        data = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += len(data)
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _scan(self):
+        """Yields (path, size, mtime) for every entry on disk."""
+        try:
+            shards = os.scandir(self.directory)
+        except FileNotFoundError:
+            return
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, st.st_size, st.st_mtime
+
+    def evict(self):
+        """Deletes least recently used entries until under 90% of max_bytes."""
+        with self._lock:
+            entries = sorted(self._scan(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            for path, size, _ in entries:
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._size = total
+
+    def clear(self):
+        for path, _, _ in list(self._scan()):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._size = 0
+
+    def stats(self, disk=False):
+        """Hit/miss counters for this process; with ``disk``, also entry count and bytes on disk."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+        if disk:
+            entries = list(self._scan())
+            stats["entries"] = len(entries)
+            stats["bytes"] = sum(size for _, size, _ in entries)
+            stats["max_bytes"] = self.max_bytes
+        return stats
@@ -0,0 +1,141 @@
+"""Read-once, zero-copy access to image files for EXIF parsing and OCR.
+
+An ImageSource memory-maps the file instead of reading it into a bytes
+object. The same mapping then serves every consumer without copies:
+
+  * EXIF: the mmap is itself a seekable file object, so exifread only pulls
+    in the header segments it walks, never the whole file;
+  * hashing: hashlib consumes the mapping through the buffer protocol;
+    header_digest() hashes only the first and last HEADER_SPAN bytes, for
+    consumers such as EXIF that never look at the rest;
+  * decoding: numpy.frombuffer wraps the mapping for cv2.imdecode, and
+    grayscale images are decoded straight to one channel (IMREAD_GRAYSCALE)
+    instead of a 3-channel frame that is converted and thrown away. Images
+    above ``max_pixels`` use OpenCV's reduced decoders (IMREAD_REDUCED_*),
+    which for JPEG scale during the DCT and never materialise full size.
+
+ImageSource.from_bytes wraps data that is already in memory the same way, so
+callers holding bytes keep working.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+cv2 = lazy_import('cv2')
+
+HEADER_SPAN = 64 * 1024
+
+
+class ImageSource:
+    """An image's encoded bytes, memory-mapped from disk or wrapped in memory."""
+
+    def __init__(self, buffer, name=None, mapping=None):
+        self._buffer = buffer
+        self._mapping = mapping
+        self.name = name
+        self._digest = None
+        self._dimensions = None
+
+    @classmethod
+    def open(cls, path):
+        """Maps ``path`` read-only. Raises ValueError for empty files."""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("file is empty")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapping, name=os.path.basename(path), mapping=mapping)
+
+    @classmethod
+    def from_bytes(cls, data, name=None):
+        return cls(data, name=name)
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def __bool__(self):
+        return len(self._buffer) > 0
+
+    def digest(self):
+        """Hex sha256 of the encoded bytes (computed once)."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self._buffer).hexdigest()
+        return self._digest
+
+    def header_digest(self, span=HEADER_SPAN):
+        """Cheap identity for header-only consumers: size plus sha256 of the first and last ``span`` bytes.
+
+        Files up to ``2 * span`` bytes are hashed whole, so for them this is digest().
+        """
+        size = len(self._buffer)
+        if self._digest is not None or size <= 2 * span:
+            return self.digest()
+        h = hashlib.sha256()
+        with memoryview(self._buffer) as view:
+            h.update(view[:span])
+            h.update(view[size - span:])
+        return f"{size}:{h.hexdigest()}"
+
+    def file(self):
+        """A seekable file object over the bytes, positioned at 0 (no copy for mmaps)."""
+        if self._mapping is not None:
+            self._mapping.seek(0)
+            return self._mapping
+        return io.BytesIO(self._buffer)
+
+    def dimensions(self):
+        """(width, height) from the header alone, or None if Pillow cannot tell."""
+        if self._dimensions is None:
+            try:
+                from PIL import Image
+                with Image.open(self.file()) as im:
+                    self._dimensions = im.size
+            except Exception:
+                return None
+        return self._dimensions
+
+    def decode(self, gray=True, max_pixels=None):
+        """Decodes to a numpy array (grayscale unless ``gray=False``); None if undecodable.
+
+        With ``max_pixels``, images larger than that are decoded at 1/2, 1/4 or
+        1/8 resolution, whichever first fits.
+        """
+        flags = cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR
+        if max_pixels:
+            dims = self.dimensions()
+            if dims and dims[0] * dims[1] > max_pixels:
+                reduced = ((2, cv2.IMREAD_REDUCED_GRAYSCALE_2, cv2.IMREAD_REDUCED_COLOR_2),
+                           (4, cv2.IMREAD_REDUCED_GRAYSCALE_4, cv2.IMREAD_REDUCED_COLOR_4),
+                           (8, cv2.IMREAD_REDUCED_GRAYSCALE_8, cv2.IMREAD_REDUCED_COLOR_8))
+                for factor, gray_flag, color_flag in reduced:
+                    flags = gray_flag if gray else color_flag
+                    if dims[0] * dims[1] / (factor * factor) <= max_pixels:
+                        break
+        encoded = np.frombuffer(self._buffer, dtype=np.uint8)
+        try:
+            return cv2.imdecode(encoded, flags)
+        finally:
+            # Drop the buffer export before returning so the mapping can be closed.
+            del encoded
+
+    def close(self):
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def as_image_source(image_data):
+    """Returns ``image_data`` as an ImageSource (wrapping bytes-like input)."""
+    if isinstance(image_data, ImageSource):
+        return image_data
+    return ImageSource.from_bytes(image_data)
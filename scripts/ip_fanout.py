@@ -0,0 +1,188 @@
+"""Concurrent multi-provider IP enrichment with an overall deadline.
+
+The Python counterpart of lookupIP in app/api/osint/lookup/route.tsx: every
+provider is queried at once from an asyncio event loop (the blocking HTTP
+calls run on a shared thread pool through the pooled transport), and the
+fields are merged with per-field source precedence. When the deadline expires
+the answers that did arrive are merged and the stragglers are reported as
+timeouts, so one slow provider no longer sets the end-to-end latency.
+
+Each provider's payload is normalised to ip-api.com field names first:
+country, countryCode, region, regionName, city, zip, lat, lon, timezone, isp,
+org, as, plus the security flags proxy, vpn, tor, mobile, hosting and
+fraud_score where a provider has them.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from transport import Transport
+
+IPQS_API_KEY = os.environ.get("IPQS_API_KEY", "")
+DEFAULT_DEADLINE = 3.0
+USER_AGENT = "Mozilla/5.0 (compatible; OSINT-Tool/1.0)"
+
+IP_API_FIELDS = "status,message,country,countryCode,region,regionName,city,zip,lat,lon,timezone,isp,org,as,mobile,proxy,hosting,query"
+
+
+def _parse_ip_api(data):
+    if data.get("status") != "success":
+        raise ValueError(data.get("message", "lookup failed"))
+    return {k: v for k, v in data.items() if k not in ("status", "message", "query")}
+
+
+def _parse_ipapi_co(data):
+    if data.get("error"):
+        raise ValueError(data.get("reason", "lookup failed"))
+    asn = data.get("asn")
+    return {
+        "country": data.get("country_name"), "countryCode": data.get("country_code"),
+        "region": data.get("region_code"), "regionName": data.get("region"),
+        "city": data.get("city"), "zip": data.get("postal"),
+        "lat": data.get("latitude"), "lon": data.get("longitude"),
+        "timezone": data.get("timezone"), "org": data.get("org"),
+        "as": f"{asn} {data.get('org')}" if asn and data.get("org") else asn,
+    }
+
+
+def _parse_ipwho_is(data):
+    if not data.get("success", False):
+        raise ValueError(data.get("message", "lookup failed"))
+    connection = data.get("connection") or {}
+    security = data.get("security") or {}
+    timezone = data.get("timezone")
+    asn = connection.get("asn")
+    return {
+        "country": data.get("country"), "countryCode": data.get("country_code"),
+        "region": data.get("region_code"), "regionName": data.get("region"),
+        "city": data.get("city"), "zip": data.get("postal"),
+        "lat": data.get("latitude"), "lon": data.get("longitude"),
+        "timezone": timezone.get("id") if isinstance(timezone, dict) else timezone,
+        "isp": connection.get("isp"), "org": connection.get("org"),
+        "as": f"AS{asn} {connection.get('org')}" if asn else None,
+        "proxy": security.get("proxy"), "vpn": security.get("vpn"), "tor": security.get("tor"),
+        "hosting": security.get("hosting"),
+    }
+
+
+def _parse_ipqs(data):
+    if not data.get("success", False):
+        raise ValueError(data.get("message", "lookup failed"))
+    asn = data.get("ASN")
+    return {
+        "countryCode": data.get("country_code"), "regionName": data.get("region"),
+        "city": data.get("city"), "zip": data.get("zip_code"),
+        "lat": data.get("latitude"), "lon": data.get("longitude"),
+        "timezone": data.get("timezone"), "isp": data.get("ISP"), "org": data.get("organization"),
+        "as": f"AS{asn}" if asn else None,
+        "proxy": data.get("proxy"), "vpn": data.get("vpn"), "tor": data.get("tor"),
+        "mobile": data.get("mobile"), "fraud_score": data.get("fraud_score"),
+    }
+
+
+# name -> (URL template, parser). Order is the default precedence.
+PROVIDERS = {
+    "ip-api.com": ("http://ip-api.com/json/{ip}?fields=" + IP_API_FIELDS, _parse_ip_api),
+    "ipapi.co": ("https://ipapi.co/{ip}/json/", _parse_ipapi_co),
+    "ipwho.is": ("http://ipwho.is/{ip}", _parse_ipwho_is),
+}
+if IPQS_API_KEY:
+    PROVIDERS["ipqualityscore"] = ("https://ipqualityscore.com/api/json/ip/" + IPQS_API_KEY + "/{ip}", _parse_ipqs)
+
+# Fields merged as one unit (coordinates must come from the same source) and
+# the providers preferred for them; anything not listed uses PROVIDERS order.
+FIELD_GROUPS = [
+    ("country", "countryCode"), ("region", "regionName"), ("city",), ("zip",), ("lat", "lon"),
+    ("timezone",), ("isp",), ("org",), ("as",),
+    ("proxy",), ("vpn",), ("tor",), ("mobile",), ("hosting",), ("fraud_score",),
+]
+FIELD_PRECEDENCE = {
+    ("org",): ["ipwho.is", "ip-api.com", "ipapi.co", "ipqualityscore"],
+    ("proxy",): ["ipqualityscore", "ipwho.is", "ip-api.com"],
+    ("vpn",): ["ipqualityscore", "ipwho.is"],
+    ("tor",): ["ipqualityscore", "ipwho.is"],
+}
+
+_executor = None
+_transport = None
+
+
+def _shared():
+    global _executor, _transport
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ip-fanout")
+        # No retries: the overall deadline is the retry budget.
+        _transport = Transport(max_retries=0)
+    return _executor, _transport
+
+
+def _fetch(transport, url, parser, timeout):
+    response = transport.get(url, headers={"User-Agent": USER_AGENT}, timeout=timeout)
+    response.raise_for_status()
+    return parser(response.json())
+
+
+def merge_fields(results, providers):
+    """Merges per-source field dicts; returns (fields, field -> source name)."""
+    fields, origin = {}, {}
+    for group in FIELD_GROUPS:
+        for name in FIELD_PRECEDENCE.get(group, providers):
+            data = results.get(name)
+            if data and all(data.get(f) not in (None, "") for f in group):
+                for f in group:
+                    fields[f] = data[f]
+                    origin[f] = name
+                break
+    return fields, origin
+
+
+async def fan_out(ip, deadline=DEFAULT_DEADLINE, providers=None):
+    """Queries all providers concurrently and merges whatever answers within ``deadline`` seconds."""
+    providers = providers or PROVIDERS
+    executor, transport = _shared()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    timings = {}
+
+    async def run(name, url_template, parser):
+        t0 = time.perf_counter()
+        try:
+            return await loop.run_in_executor(
+                executor, _fetch, transport, url_template.format(ip=ip), parser, deadline)
+        finally:
+            timings[name] = round(1000 * (time.perf_counter() - t0), 1)
+
+    tasks = {
+        asyncio.ensure_future(run(name, url, parser)): name
+        for name, (url, parser) in providers.items()
+    }
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+
+    results, sources = {}, {}
+    for task, name in tasks.items():
+        if task in pending:
+            sources[name] = {"status": "timeout", "ms": round(1000 * deadline, 1)}
+        elif task.exception() is not None:
+            sources[name] = {"status": "error", "ms": timings.get(name), "error": str(task.exception())}
+        else:
+            results[name] = task.result()
+            sources[name] = {"status": "ok", "ms": timings.get(name)}
+
+    fields, origin = merge_fields(results, list(providers))
+    return {
+        "ip": ip,
+        "fields": fields,
+        "field_sources": origin,
+        "sources": sources,
+        "partial": bool(pending) or len(results) < len(providers),
+        "elapsed_ms": round(1000 * (time.perf_counter() - started), 1),
+    }
+
+
+def lookup_ip_multi(ip, deadline=DEFAULT_DEADLINE, providers=None):
+    """Synchronous wrapper around fan_out for callers outside an event loop."""
+    return asyncio.run(fan_out(ip, deadline=deadline, providers=providers))
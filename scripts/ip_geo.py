@@ -0,0 +1,391 @@
+"""Local IPv4 geolocation from a sorted, memory-mapped table of address ranges.
+
+The index is compiled from a range CSV: either a file with a header row (e.g.
+a GeoLite2-style blocks file with a ``network`` CIDR column merged with its
+location/ASN columns), whose column names are matched against common aliases,
+or one of the headerless IP2Location / DB-IP "lite" exports, recognised by
+their column count and address format (``--columns`` names the columns of
+any other headerless file). Fields are mapped to the ip-api.com names
+(country, countryCode, regionName, city, zip, lat, lon, timezone, isp, org,
+as), so callers can treat both backends alike. Overlapping or nested ranges
+are split into disjoint pieces, the most specific range winning, so one
+bisect per lookup is always enough.
+
+File layout (native byte order, recorded in the header):
+
+  header   magic b'IPGEOIX1', byte order, range count, record count
+  starts   u32[range count]   sorted range start addresses
+  ends     u32[range count]   inclusive range end addresses
+  rec_ids  u32[range count]   record id per range
+  offsets  u32[record count + 1] into the record blob
+  blob     one compact JSON object per distinct record
+
+Single lookups bisect the ``starts`` column through a memoryview cast of the
+mmap (no numpy import needed); lookup_many uses numpy.searchsorted on the same
+buffers for batches.
+
+    python scripts/ip_geo.py build dbip-city-lite.csv ~/.starkosint/ipgeo.idx
+    python scripts/ip_geo.py get ~/.starkosint/ipgeo.idx 1.1.1.1
+"""
+
+import argparse
+import bisect
+import csv
+import ipaddress
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+MAGIC = b'IPGEOIX1'
+HEADER = struct.Struct('<8s8sII')
+
+COLUMN_ALIASES = {
+    'start': ('start', 'ip_from', 'start_ip', 'ip_start', 'first_ip'),
+    'end': ('end', 'ip_to', 'end_ip', 'ip_end', 'last_ip'),
+    'network': ('network', 'cidr', 'prefix'),
+    'countryCode': ('countrycode', 'country_code', 'country_iso_code', 'iso_code'),
+    'country': ('country', 'country_name'),
+    'region': ('region_code', 'subdivision_1_iso_code'),
+    'regionName': ('region', 'region_name', 'regionname', 'stateprov', 'subdivision_1_name', 'state'),
+    'city': ('city', 'city_name'),
+    'zip': ('zip', 'zip_code', 'postal_code', 'postcode'),
+    'lat': ('lat', 'latitude'),
+    'lon': ('lon', 'lng', 'longitude'),
+    'timezone': ('timezone', 'time_zone'),
+    'isp': ('isp',),
+    'org': ('org', 'organization', 'autonomous_system_organization', 'as_name'),
+    'as': ('as', 'asn', 'autonomous_system_number'),
+}
+
+FLOAT_FIELDS = ('lat', 'lon')
+
+# Headerless "lite" exports, keyed by (integer addresses?, column count).
+# IP2Location writes addresses as integers, DB-IP as dotted quads.
+KNOWN_LAYOUTS = {
+    (True, 4): ('start', 'end', 'countryCode', 'country'),                    # IP2Location DB1
+    (True, 5): ('start', 'end', '-', 'as', 'org'),                            # IP2Location ASN
+    (True, 6): ('start', 'end', 'countryCode', 'country', 'regionName', 'city'),  # DB3
+    (True, 8): ('start', 'end', 'countryCode', 'country', 'regionName', 'city', 'lat', 'lon'),  # DB5
+    (True, 9): ('start', 'end', 'countryCode', 'country', 'regionName', 'city', 'lat', 'lon', 'zip'),  # DB9
+    (True, 10): ('start', 'end', 'countryCode', 'country', 'regionName', 'city', 'lat', 'lon', 'zip',
+                 'timezone'),                                                 # DB11
+    (False, 3): ('start', 'end', 'countryCode'),                              # DB-IP country
+    (False, 4): ('start', 'end', 'as', 'org'),                                # DB-IP ASN
+    (False, 8): ('start', 'end', '-', 'countryCode', 'regionName', 'city', 'lat', 'lon'),  # DB-IP city
+}
+
+
+def ip_to_int(ip):
+    """Converts a dotted IPv4 string (or an integer string) to an int.
+
+    Raises ValueError for anything that is not an IPv4 address, including
+    integers beyond 32 bits (IPv6 / IPv4-mapped rows of integer exports).
+    """
+    ip = ip.strip()
+    if ip.isdigit():
+        value = int(ip)
+        if value > 0xFFFFFFFF:
+            raise ValueError(f"{ip} is not an IPv4 address")
+        return value
+    return int(ipaddress.IPv4Address(ip))
+
+
+def _is_address(cell):
+    if cell.strip().isdigit():
+        return True  # integer export, possibly starting with an IPv6 row
+    try:
+        ip_to_int(cell)
+    except ValueError:
+        return False
+    return True
+
+
+def _named_columns(names):
+    """Maps a list of field names (one per CSV column, '' or '-' to skip) to indexes."""
+    columns = {name.strip(): i for i, name in enumerate(names) if name.strip() not in ('', '-')}
+    unknown = set(columns) - set(COLUMN_ALIASES)
+    if unknown:
+        raise ValueError(f"unknown column name(s): {', '.join(sorted(unknown))}")
+    if 'network' not in columns and not ('start' in columns and 'end' in columns):
+        raise ValueError("range file needs start/end columns or a network (CIDR) column")
+    return columns
+
+
+def _headerless_columns(row):
+    layout = KNOWN_LAYOUTS.get((row[0].strip().isdigit(), len(row)))
+    if layout is None:
+        raise ValueError(f"headerless range file with {len(row)} columns is not a known "
+                         "IP2Location/DB-IP layout; name its columns with --columns")
+    return _named_columns(layout)
+
+
+def _resolve_columns(header):
+    lowered = [h.strip().lower() for h in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered:
+                columns[field] = lowered.index(alias)
+                break
+    if 'network' not in columns and not ('start' in columns and 'end' in columns):
+        raise ValueError("range file needs start/end columns or a network (CIDR) column")
+    return columns
+
+
+def _row_record(row, columns):
+    record = {}
+    for field, i in columns.items():
+        if field in ('start', 'end', 'network') or i >= len(row):
+            continue
+        value = row[i].strip()
+        if not value or value == '-':
+            continue
+        if field in FLOAT_FIELDS:
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+        elif field == 'as' and value.isdigit():
+            value = f"AS{value}"
+        record[field] = value
+    if 'as' in record and 'org' in record and ' ' not in record['as']:
+        record['as'] = f"{record['as']} {record['org']}"
+    return record
+
+
+def read_ranges(path, columns=None):
+    """Yields (start, end, record) tuples from a range CSV file.
+
+    ``columns`` optionally names every column of a headerless file (see
+    _named_columns); otherwise the first row is either a header or, if it
+    starts with an address, the first range of a known headerless layout.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+        if columns is not None:
+            columns, rows = _named_columns(columns), itertools.chain([first], reader)
+        elif first and _is_address(first[0]):
+            columns, rows = _headerless_columns(first), itertools.chain([first], reader)
+        else:
+            columns, rows = _resolve_columns(first), reader
+        for row in rows:
+            if not row:
+                continue
+            try:
+                if 'network' in columns:
+                    net = ipaddress.ip_network(row[columns['network']].strip(), strict=False)
+                    if net.version != 4:
+                        continue
+                    start, end = int(net.network_address), int(net.broadcast_address)
+                else:
+                    start, end = ip_to_int(row[columns['start']]), ip_to_int(row[columns['end']])
+            except ValueError:
+                # IPv6 rows and malformed lines are skipped; the index is IPv4 only.
+                continue
+            yield start, end, _row_record(row, columns)
+
+
+def _disjoint(ranges):
+    """Splits overlapping (start, end, record) ranges into sorted, disjoint pieces.
+
+    Where ranges overlap, the one starting later wins (for nested ranges that
+    is the more specific one); adjacent pieces with the same record are merged.
+    """
+    out = []
+
+    def emit(start, end, record):
+        if start > end:
+            return
+        if out and out[-1][1] + 1 == start and out[-1][2] == record:
+            out[-1] = (out[-1][0], end, record)
+        else:
+            out.append((start, end, record))
+
+    stack = []  # enclosing ranges, innermost last; their ends decrease upwards
+    cursor = 0  # first address not yet emitted for the innermost open range
+    for start, end, record in sorted(ranges, key=lambda r: (r[0], -r[1])):
+        while stack and stack[-1][1] < start:
+            _, top_end, top_record = stack.pop()
+            emit(cursor, top_end, top_record)
+            cursor = top_end + 1
+        if stack:
+            emit(cursor, start - 1, stack[-1][2])
+        while stack and stack[-1][1] <= end:
+            stack.pop()  # fully shadowed from ``start`` on
+        stack.append((start, end, record))
+        cursor = start
+    while stack:
+        _, top_end, top_record = stack.pop()
+        emit(cursor, top_end, top_record)
+        cursor = top_end + 1
+    return out
+
+
+def build_index(csv_path, index_path, columns=None):
+    """Compiles a range CSV into an index file. Returns the range count."""
+    ranges = _disjoint(read_ranges(csv_path, columns))
+    starts, ends, rec_ids = array('I'), array('I'), array('I')
+    record_ids = {}
+    blobs = []
+    for start, end, record in ranges:
+        blob = json.dumps(record, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        rec_id = record_ids.get(blob)
+        if rec_id is None:
+            rec_id = record_ids[blob] = len(blobs)
+            blobs.append(blob)
+        starts.append(start)
+        ends.append(end)
+        rec_ids.append(rec_id)
+
+    offsets = array('I', [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    directory = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.ipgeo-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, sys.byteorder.encode('ascii'), len(starts), len(blobs)))
+            for column in (starts, ends, rec_ids, offsets):
+                column.tofile(f)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(starts)
+
+
+class IPGeoIndex:
+    """Read-only, memory-mapped view of an index written by build_index."""
+
+    backend = "local range index"
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byteorder, count, rec_count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not an IP range index file")
+        if byteorder.rstrip(b'\0').decode('ascii') != sys.byteorder:
+            self._mm.close()
+            raise ValueError(f"{path} was built on a machine with a different byte order; rebuild it")
+
+        self._count = count
+        view = memoryview(self._mm)
+        pos = HEADER.size
+        self._offsets_pos = {}
+        for name, length in (('starts', count), ('ends', count), ('rec_ids', count), ('offsets', rec_count + 1)):
+            self._offsets_pos[name] = (pos, length)
+            setattr(self, '_' + name, view[pos:pos + 4 * length].cast('I'))
+            pos += 4 * length
+        self._blob_pos = pos
+        self._records = {}
+
+    def _record(self, rec_id):
+        record = self._records.get(rec_id)
+        if record is None:
+            start = self._blob_pos + self._offsets[rec_id]
+            end = self._blob_pos + self._offsets[rec_id + 1]
+            record = self._records[rec_id] = json.loads(self._mm[start:end])
+        return record
+
+    def _find(self, value):
+        i = bisect.bisect_right(self._starts, value) - 1
+        if i >= 0 and self._ends[i] >= value:
+            return self._rec_ids[i]
+        return None
+
+    def get(self, ip):
+        """Returns the ip-api-shaped field dict for ``ip``, or None if no range covers it."""
+        try:
+            value = ip_to_int(ip)
+        except ValueError:
+            return None
+        rec_id = self._find(value)
+        if rec_id is None:
+            return None
+        return dict(self._record(rec_id))
+
+    def lookup_many(self, ips):
+        """Vectorised lookup for a list of IPs; returns a list of dicts/None."""
+        import numpy as np
+
+        if not self._count:
+            return [None] * len(ips)
+        values = []
+        for ip in ips:
+            try:
+                values.append(ip_to_int(ip))
+            except ValueError:
+                values.append(-1)
+        values = np.asarray(values, dtype=np.int64)
+        starts = np.frombuffer(self._mm, dtype=np.uint32, count=self._count, offset=self._offsets_pos['starts'][0])
+        ends = np.frombuffer(self._mm, dtype=np.uint32, count=self._count, offset=self._offsets_pos['ends'][0])
+        rec_ids = np.frombuffer(self._mm, dtype=np.uint32, count=self._count, offset=self._offsets_pos['rec_ids'][0])
+        idx = np.searchsorted(starts, values, side='right') - 1
+        safe = np.clip(idx, 0, max(self._count - 1, 0))
+        hit = (idx >= 0) & (values >= 0) & (ends[safe] >= values)
+        return [dict(self._record(int(rec_ids[j]))) if ok else None for j, ok in zip(safe, hit)]
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._records.clear()
+        for name in ('starts', 'ends', 'rec_ids', 'offsets'):
+            getattr(self, '_' + name).release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the local IP range index.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('build', help='compile a range CSV into an index')
+    p.add_argument('csv')
+    p.add_argument('index')
+    p.add_argument('--columns', help='comma-separated field names for a headerless CSV, e.g. '
+                                     "'start,end,countryCode,-,city' ('-' skips a column)")
+
+    p = sub.add_parser('get', help='look up one IPv4 address')
+    p.add_argument('index')
+    p.add_argument('ip')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        try:
+            count = build_index(args.csv, args.index, args.columns and args.columns.split(','))
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Indexed {count} IPv4 ranges into {args.index}")
+    elif args.command == 'get':
+        with IPGeoIndex(args.index) as index:
+            record = index.get(args.ip)
+        if record is None:
+            print(f"{args.ip} not covered by the index", file=sys.stderr)
+            return 1
+        print(json.dumps(record, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
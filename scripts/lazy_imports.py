@@ -0,0 +1,65 @@
+"""Deferred imports for the heavy optional dependencies of starkosint.py.
+
+``lazy_import("cv2")`` returns a stand-in object that performs the real import
+the first time one of its attributes is touched, so the CLI can draw its menu
+without paying for numpy/OpenCV/Tesseract until a branch actually needs them.
+"""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """Proxy that imports ``name`` on first attribute access."""
+
+    def __init__(self, name, on_load=None):
+        self.__dict__['_name'] = name
+        self.__dict__['_on_load'] = on_load
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is not None:
+            return module
+        with self.__dict__['_lock']:
+            module = self.__dict__['_module']
+            if module is None:
+                module = importlib.import_module(self.__dict__['_name'])
+                on_load = self.__dict__['_on_load']
+                if on_load is not None:
+                    on_load(module)
+                self.__dict__['_module'] = module
+        return module
+
+    @property
+    def loaded(self):
+        """True once the underlying module has been imported."""
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name, on_load=None):
+    """Returns a LazyModule for ``name``; ``on_load(module)`` runs once after import."""
+    return LazyModule(name, on_load=on_load)
+
+
+def is_available(name):
+    """Checks whether ``name`` can be imported, importing it if so."""
+    try:
+        importlib.import_module(name)
+        return True
+    except ImportError:
+        return False
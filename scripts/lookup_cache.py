@@ -0,0 +1,299 @@
+"""Two-tier TTL cache for remote lookup answers (ip-api.com, IFSC API).
+
+The same IP or IFSC code tends to be looked up again and again, and every
+repeat used to cost a network round trip and, for ip-api.com, part of a
+rate-limit budget. Answers are now kept in:
+
+* an in-process LRU (OrderedDict) of decoded values, so a repeat lookup is a
+  dict access, and
+* a SQLite database in WAL mode, so answers survive restarts and are shared by
+  every process using the same data directory (CLI runs, batch workers, the
+  service). WAL lets readers proceed while another process writes.
+
+Each source (namespace) has its own policy of three durations: how long an
+answer is fresh, how long a definite "not found / invalid" answer is kept
+(negative caching, usually shorter), and a stale window after expiry during
+which the old answer is still returned immediately while a background thread
+re-fetches it (stale-while-revalidate). With ``refresh_workers=0`` (one-shot
+CLI runs, which should exit as soon as they have printed) a stale answer is
+served without a refresh. Past the stale window an entry is a plain miss. Transport errors and unexpected responses are never cached: the
+loader raises and nothing is stored.
+
+Concurrent misses for the same key are coalesced, so a burst of identical
+requests (e.g. in the service) costs one upstream call.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_MAX_ENTRIES = 4096
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    source   TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    value    TEXT NOT NULL,
+    negative INTEGER NOT NULL,
+    stored   REAL NOT NULL,
+    expires  REAL NOT NULL,
+    stale    REAL NOT NULL,
+    PRIMARY KEY (source, key)
+) WITHOUT ROWID
+"""
+
+
+class LookupCache:
+    """In-memory LRU in front of a SQLite store, with per-source TTL policies.
+
+    ``ttls`` maps a source name to ``(ttl, negative_ttl, stale_ttl)`` in
+    seconds. Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, path, ttls, max_entries=DEFAULT_MAX_ENTRIES, refresh_workers=2):
+        self.path = path
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self.refresh_workers = refresh_workers
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._memory = OrderedDict()  # (source, key) -> (value, negative, stored, expires, stale)
+        self._inflight = {}  # (source, key) -> Future of a running miss
+        self._refreshing = set()
+        self._executor = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._disk_ok = path is not None
+
+    # --- SQLite tier ----------------------------------------------------------------
+
+    def _db(self):
+        """This thread's connection (None once the store has failed to open)."""
+        db = getattr(self._local, 'db', None)
+        if db is None and self._disk_ok:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(_SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                self._disable_disk(e)
+                return None
+            self._local.db = db
+        return db
+
+    def _disable_disk(self, error):
+        if self._disk_ok:
+            self._disk_ok = False
+            sys.stderr.write(f"⚠️ Lookup cache store unavailable ({error}); caching in memory only.\n")
+
+    def _disk_get(self, source, key):
+        db = self._db()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT value, negative, stored, expires, stale FROM lookups "
+                             "WHERE source = ? AND key = ?", (source, key)).fetchone()
+        except sqlite3.Error as e:
+            self._disable_disk(e)
+            return None
+        if row is None:
+            return None
+        value, negative, stored, expires, stale = row
+        return json.loads(value), bool(negative), stored, expires, stale
+
+    def _disk_put(self, source, key, entry):
+        db = self._db()
+        if db is None:
+            return
+        value, negative, stored, expires, stale = entry
+        try:
+            db.execute("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (source, key, json.dumps(value, ensure_ascii=False), int(negative), stored, expires, stale))
+        except sqlite3.Error as e:
+            self._disable_disk(e)
+
+    # --- memory tier ----------------------------------------------------------------
+
+    def _remember(self, item, entry):
+        with self._lock:
+            self._memory[item] = entry
+            self._memory.move_to_end(item)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, item, now):
+        """The live entry for ``item`` from memory or disk, or None; counts the tier it came from."""
+        with self._lock:
+            entry = self._memory.get(item)
+            if entry is not None:
+                if now < entry[4]:
+                    self._memory.move_to_end(item)
+                    self.memory_hits += 1
+                    return entry
+                del self._memory[item]
+        entry = self._disk_get(*item)
+        if entry is None or now >= entry[4]:
+            return None
+        self._remember(item, entry)
+        with self._lock:
+            self.disk_hits += 1
+        return entry
+
+    # --- public API -----------------------------------------------------------------
+
+    def put(self, source, key, value, negative=False, now=None):
+        """Stores an answer under the policy of ``source``; returns the entry."""
+        ttl, negative_ttl, stale_ttl = self.ttls[source]
+        stored = time.time() if now is None else now
+        expires = stored + (negative_ttl if negative else ttl)
+        entry = (value, negative, stored, expires, expires + stale_ttl)
+        self._remember((source, key), entry)
+        self._disk_put(source, key, entry)
+        return entry
+
+    def fetch(self, source, key, loader):
+        """Cached answer for ``key``, calling ``loader()`` on a miss.
+
+        ``loader`` returns ``(value, negative)``, where ``negative`` marks a
+        definite "not found" answer, and raises for anything that should not be
+        cached. Returns ``(value, negative, state)`` with state "fresh", "stale"
+        (served while a background refresh runs) or "miss".
+        """
+        item = (source, key)
+        now = time.time()
+        entry = self._lookup(item, now)
+        if entry is not None:
+            value, negative, _, expires, _ = entry
+            with self._lock:
+                if negative:
+                    self.negative_hits += 1
+                if now < expires:
+                    return value, negative, "fresh"
+                self.stale_hits += 1
+            self._refresh(item, loader)
+            return value, negative, "stale"
+
+        with self._lock:
+            future = self._inflight.get(item)
+            leader = future is None
+            if leader:
+                future = self._inflight[item] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            value, negative = future.result()
+            return value, negative, "miss"
+        try:
+            value, negative = loader()
+            self.put(source, key, value, negative)
+            future.set_result((value, negative))
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[item]
+        return value, negative, "miss"
+
+    def _refresh(self, item, loader):
+        """Re-fetches a stale entry in the background (once per key at a time)."""
+        if not self.refresh_workers:
+            return
+        with self._lock:
+            if item in self._refreshing:
+                return
+            self._refreshing.add(item)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.refresh_workers, thread_name_prefix='lookup-refresh')
+            executor = self._executor
+
+        def run():
+            try:
+                value, negative = loader()
+                self.put(item[0], item[1], value, negative)
+                with self._lock:
+                    self.refreshes += 1
+            except Exception:
+                # Keep serving the stale answer; the next stale hit retries.
+                with self._lock:
+                    self.refresh_errors += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(item)
+        executor.submit(run)
+
+    def purge(self):
+        """Deletes entries past their stale window; returns how many rows went."""
+        now = time.time()
+        with self._lock:
+            for item in [item for item, entry in self._memory.items() if now >= entry[4]]:
+                del self._memory[item]
+        db = self._db()
+        if db is None:
+            return 0
+        return db.execute("DELETE FROM lookups WHERE stale <= ?", (now,)).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        db = self._db()
+        if db is not None:
+            db.execute("DELETE FROM lookups")
+            db.execute("VACUUM")
+
+    def close(self):
+        """Drops queued background refreshes and closes this thread's connection."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def stats(self, disk=False):
+        """Hit/miss counters for this process; with ``disk``, also stored entries per source."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            stats = {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "stale_hits": self.stale_hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "memory_entries": len(self._memory),
+            }
+        if disk:
+            db = self._db()
+            if db is not None:
+                now = time.time()
+                stats["entries"] = {
+                    source: {"fresh": fresh, "stale": stale, "negative": negative}
+                    for source, fresh, stale, negative in db.execute(
+                        "SELECT source, SUM(expires > ?), SUM(expires <= ? AND stale > ?), SUM(negative) "
+                        "FROM lookups GROUP BY source", (now, now, now))
+                }
+                stats["bytes"] = sum(os.path.getsize(p) for p in (self.path, self.path + '-wal')
+                                     if os.path.exists(p))
+        return stats
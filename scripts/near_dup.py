@@ -0,0 +1,375 @@
+"""Perceptual hashes and a near-duplicate index for OCR results.
+
+Screenshot dumps are full of the same picture re-encoded, resized or slightly
+cropped. Those files have different bytes, so the content-addressed image
+cache (image_cache.py) misses them. This index recognises them from the
+grayscale array that was decoded for OCR anyway:
+
+  fingerprint   one INTER_AREA downscale to a THUMB_WIDTH-wide thumbnail,
+                then from it a 64-bit pHash (sign of the 8x8 low-frequency DCT
+                coefficients against their median, via cv2.dct) and a 64-bit
+                dHash (horizontal gradient signs on a 9x8 grid), all numpy
+  lookup        every stored pHash within ``group_distance`` bits: one numpy
+                XOR + popcount over a uint64 array of all of them (about
+                30 us for 25k images; a BK-tree prunes almost nothing at a
+                10-bit radius on 64-bit hashes and was 250x slower)
+
+A hash match only says the images *look* alike. Screenshots of the same app
+that differ in a few characters (an amount, a reference number) have the same
+pHash, because text barely moves low frequencies, so by default the index only
+groups: lookup names the closest stored image and OCR runs as usual.
+
+With ``reuse=True`` every entry also keeps a half-resolution grayscale
+reference (lossless PNG), and a new image takes a stored OCR text only if it
+has exactly the same pixel dimensions, its dHash is within ``reuse_distance``
+bits, and no 4x4 tile of the two half-resolution images (8x8 pixels at full
+size) differs by more than ``max_tile_diff`` grey levels on average. On
+1440x3200 screenshots JPEG (quality 30 and up) and WebP re-encodes stay below
+10 levels, while a single changed digit in 13 px text is 35+ levels off.
+Resized copies and crops are never reused, only grouped. A reference costs
+50-120 KB per screenshot, so only the newest ``max_references`` entries keep
+one.
+
+Entries (hashes, reference, OCR text, OCR time) live in SQLite in WAL mode,
+keyed by content digest and analysis config. Each process keeps the hashes in
+memory and picks up rows written by other processes (batch workers, the
+service) before every lookup.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+cv2 = lazy_import('cv2')
+
+THUMB_WIDTH = 256
+REFERENCE_SCALE = 0.5
+TILE = 4  # reference pixels per tile side
+DEFAULT_GROUP_DISTANCE = 10
+DEFAULT_REUSE_DISTANCE = 6
+DEFAULT_MAX_TILE_DIFF = 20.0
+DEFAULT_MAX_ENTRIES = 20_000
+DEFAULT_MAX_REFERENCES = 2_000
+MAX_VERIFY = 8  # candidates whose references are compared per lookup
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id         INTEGER PRIMARY KEY,
+    config     TEXT NOT NULL,
+    digest     TEXT NOT NULL,
+    name       TEXT,
+    phash      INTEGER NOT NULL,
+    dhash      INTEGER NOT NULL,
+    width      INTEGER NOT NULL,
+    height     INTEGER NOT NULL,
+    reference  BLOB,
+    text       TEXT NOT NULL,
+    ocr_ms     REAL NOT NULL,
+    stored     REAL NOT NULL,
+    UNIQUE (config, digest)
+)
+"""
+
+Fingerprint = namedtuple('Fingerprint', 'phash dhash width height reference')
+Match = namedtuple('Match', 'digest name distance tile_diff reusable text ocr_ms')
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+_MASK = (1 << 64) - 1
+
+
+def _signed(h):
+    """A 64-bit hash as SQLite's signed INTEGER (and back with ``& _MASK``)."""
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def phash(gray):
+    """64-bit DCT hash: low-frequency coefficients above their median (DC excluded)."""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].ravel()
+    return _bits_to_int(low > np.median(low[1:]))
+
+
+def dhash(gray):
+    """64-bit gradient hash: is each pixel of a 9x8 downscale darker than its right neighbour."""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def reference_image(gray):
+    """The half-resolution copy reuse is verified against."""
+    height, width = gray.shape[:2]
+    size = (max(1, round(width * REFERENCE_SCALE)), max(1, round(height * REFERENCE_SCALE)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def fingerprint(gray, reference=False):
+    """Hashes of a decoded grayscale image, plus its reference image if asked for."""
+    height, width = gray.shape[:2]
+    thumb = cv2.resize(gray, (THUMB_WIDTH, max(1, round(height * THUMB_WIDTH / width))),
+                       interpolation=cv2.INTER_AREA)
+    return Fingerprint(phash(thumb), dhash(thumb), width, height,
+                       reference_image(gray) if reference else None)
+
+
+def tile_diff(a, b, tile=TILE):
+    """Largest mean absolute difference over ``tile`` x ``tile`` tiles of two same-sized images."""
+    diff = cv2.absdiff(a, b).astype(np.float32)
+    pad_h, pad_w = -diff.shape[0] % tile, -diff.shape[1] % tile
+    if pad_h or pad_w:  # edge tiles are padded with zeros, not dropped
+        diff = np.pad(diff, ((0, pad_h), (0, pad_w)))
+    height, width = diff.shape
+    return float(diff.reshape(height // tile, tile, width // tile, tile).mean(axis=(1, 3)).max())
+
+
+def _popcount(values):
+    """Set bits of each element of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):  # numpy >= 2.0
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count('1') for i in range(256)], np.uint8)
+    return table[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class HammingIndex:
+    """64-bit hashes with integer ids, searched by Hamming distance in one vectorised pass."""
+
+    def __init__(self, capacity=1024):
+        self._hashes = np.empty(capacity, np.uint64)
+        self._ids = np.empty(capacity, np.int64)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key, value):
+        if self._size == len(self._hashes):
+            self._hashes = np.concatenate((self._hashes, np.empty_like(self._hashes)))
+            self._ids = np.concatenate((self._ids, np.empty_like(self._ids)))
+        self._hashes[self._size] = key
+        self._ids[self._size] = value
+        self._size += 1
+
+    def search(self, key, radius):
+        """[(distance, id)] for every stored hash within ``radius`` bits, nearest first."""
+        distances = _popcount(self._hashes[:self._size] ^ np.uint64(key))
+        hits = np.flatnonzero(distances <= radius)
+        hits = hits[np.argsort(distances[hits], kind='stable')]
+        return list(zip(distances[hits].tolist(), self._ids[hits].tolist()))
+
+
+class NearDuplicateIndex:
+    """Perceptual-hash index of OCR results stored under ``config`` in the SQLite file ``path``.
+
+    Without ``reuse`` it only groups look-alike images; with it, verified
+    re-encodes are answered with the stored text (see the module docstring).
+    """
+
+    def __init__(self, path, config, reuse=False, group_distance=DEFAULT_GROUP_DISTANCE,
+                 reuse_distance=DEFAULT_REUSE_DISTANCE, max_tile_diff=DEFAULT_MAX_TILE_DIFF,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_references=DEFAULT_MAX_REFERENCES):
+        self.path = path
+        self.config = config
+        self.reuse = reuse
+        self.group_distance = group_distance
+        self.reuse_distance = reuse_distance
+        self.max_tile_diff = max_tile_diff
+        self.max_entries = max_entries
+        self.max_references = max_references
+        self.lookups = 0
+        self.near = 0
+        self.reused = 0
+        self.saved_s = 0.0
+        self._hashes = HammingIndex()
+        self._entries = {}  # id -> (dhash, width, height, digest, name)
+        self._last_id = 0
+        self._added = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._disk_ok = True
+
+    def _db(self):
+        """This thread's connection (None once the store has failed to open)."""
+        db = getattr(self._local, 'db', None)
+        if db is None and self._disk_ok:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(_SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+                return None
+            self._local.db = db
+        return db
+
+    def _disable(self, error):
+        if self._disk_ok:
+            self._disk_ok = False
+            sys.stderr.write(f"⚠️ Near-duplicate index unavailable ({error}); every image is OCR'd.\n")
+
+    def _refresh(self):
+        """Adds rows stored since the last refresh (by any process) to the in-memory hash index."""
+        db = self._db()
+        if db is None:
+            return
+        with self._lock:
+            try:
+                rows = db.execute("SELECT id, phash, dhash, width, height, digest, name FROM entries "
+                                  "WHERE config = ? AND id > ? ORDER BY id", (self.config, self._last_id)).fetchall()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return
+            for entry_id, p, d, width, height, digest, name in rows:
+                self._hashes.add(p & _MASK, entry_id)
+                self._entries[entry_id] = (d & _MASK, width, height, digest, name)
+                self._last_id = entry_id
+
+    def _load(self, entry_id):
+        """(reference, text, ocr_ms) of a stored entry, or None if it is gone or has no reference."""
+        db = self._db()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT reference, text, ocr_ms FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        if row is None or row[0] is None:
+            return None
+        reference, text, ocr_ms = row
+        return cv2.imdecode(np.frombuffer(reference, np.uint8), cv2.IMREAD_GRAYSCALE), text, ocr_ms
+
+    def lookup(self, fp):
+        """The closest stored near-duplicate of ``fp`` as a Match, or None.
+
+        With ``reuse`` (and a reference in ``fp``), candidates of exactly the
+        same size are verified tile by tile and the first that passes is
+        returned with its text (``reusable`` True); otherwise the nearest
+        pHash match is only reported, for grouping.
+        """
+        self._refresh()
+        with self._lock:
+            self.lookups += 1
+            candidates = self._hashes.search(fp.phash, self.group_distance)
+            entries = [(d, entry_id, self._entries[entry_id]) for d, entry_id in candidates]
+        if not entries:
+            return None
+        verify = entries[:MAX_VERIFY] if self.reuse and fp.reference is not None else ()
+        for distance, entry_id, (d, width, height, digest, name) in verify:
+            if (width, height) != (fp.width, fp.height) or hamming(fp.dhash, d) > self.reuse_distance:
+                continue
+            stored = self._load(entry_id)
+            if stored is None:
+                continue
+            reference, text, ocr_ms = stored
+            if reference is None or reference.shape != fp.reference.shape:
+                continue
+            diff = tile_diff(fp.reference, reference)
+            if diff <= self.max_tile_diff:
+                with self._lock:
+                    self.near += 1
+                    self.reused += 1
+                    self.saved_s += ocr_ms / 1000
+                return Match(digest, name, distance, round(diff, 2), True, text, ocr_ms)
+        distance, _, (_, _, _, digest, name) = entries[0]
+        with self._lock:
+            self.near += 1
+        return Match(digest, name, distance, None, False, None, None)
+
+    def add(self, digest, fp, text, ocr_ms, name=None):
+        """Stores the OCR ``text`` of an image (no-op if its digest is already indexed)."""
+        db = self._db()
+        if db is None:
+            return
+        reference = None
+        if self.reuse and fp.reference is not None:
+            reference = cv2.imencode('.png', fp.reference)[1].tobytes()
+        try:
+            db.execute("INSERT OR IGNORE INTO entries (config, digest, name, phash, dhash, width, height, "
+                       "reference, text, ocr_ms, stored) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (self.config, digest, name, _signed(fp.phash), _signed(fp.dhash), fp.width, fp.height,
+                        reference, text, ocr_ms, time.time()))
+        except sqlite3.Error as e:
+            self._disable(e)
+            return
+        self._added += 1
+        if self._added % (100 if reference else 1000) == 0:
+            self.prune()
+
+    def prune(self):
+        """Drops references beyond max_references and entries beyond max_entries (oldest first).
+
+        Returns how many entries were deleted.
+        """
+        db = self._db()
+        if db is None:
+            return 0
+        try:
+            db.execute("UPDATE entries SET reference = NULL WHERE reference IS NOT NULL AND id IN "
+                       "(SELECT id FROM entries WHERE reference IS NOT NULL ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                       (self.max_references,))
+            removed = db.execute("DELETE FROM entries WHERE id IN (SELECT id FROM entries ORDER BY id DESC "
+                                 "LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+        except sqlite3.Error as e:
+            self._disable(e)
+            return 0
+        if removed:
+            self._reset()
+        return removed
+
+    def _reset(self):
+        with self._lock:
+            self._hashes = HammingIndex()
+            self._entries = {}
+            self._last_id = 0
+
+    def clear(self):
+        db = self._db()
+        if db is not None:
+            try:
+                db.execute("DELETE FROM entries")
+            except sqlite3.Error as e:
+                self._disable(e)
+        self._reset()
+
+    def stats(self, disk=False):
+        """Lookup counters for this process; with ``disk``, also the stored entries."""
+        with self._lock:
+            stats = {
+                "reuse": self.reuse,
+                "lookups": self.lookups,
+                "near_duplicates": self.near,
+                "ocr_reused": self.reused,
+                "ocr_saved_s": round(self.saved_s, 3),
+            }
+        if disk:
+            db = self._db()
+            if db is not None:
+                entries, references, nbytes = db.execute(
+                    "SELECT COUNT(*), COUNT(reference), "
+                    "COALESCE(SUM(COALESCE(LENGTH(reference), 0) + LENGTH(text)), 0) FROM entries").fetchone()
+                stats["entries"] = entries
+                stats["references"] = references
+                stats["bytes"] = nbytes
+                stats["max_entries"] = self.max_entries
+        return stats
+
+    def close(self):
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
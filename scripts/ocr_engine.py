@@ -0,0 +1,173 @@
+"""In-process Tesseract OCR with a pytesseract fallback.
+
+pytesseract runs the tesseract executable for every call: it writes the
+image to a temporary file, starts a process and loads the language model
+again each time. For small images that startup is most of the latency.
+
+With tesserocr installed, this module instead keeps initialised Tesseract
+engines (PyTessBaseAPI) alive in-process, one per thread and page
+segmentation mode, so each worker thread (or batch worker process) loads the
+model once. Pixels go straight from the cv2 grayscale array into the engine
+with SetImageBytes, with no temp files or PNG encoding. tesserocr releases the
+GIL while recognising, so engines on different threads run in parallel.
+
+Backends: "auto" (tesserocr when it imports and the language data loads,
+otherwise pytesseract), "tesserocr" or "pytesseract"; see configure().
+tesserocr installs signal handlers when imported, which Python only allows
+on the main thread, so call backend() from the main thread before handing
+OCR to worker threads.
+"""
+
+import atexit
+import re
+import sys
+import threading
+
+from lazy_imports import lazy_import
+
+pytesseract = lazy_import('pytesseract', on_load=lambda module: _apply_tesseract_cmd(module))
+
+BACKENDS = ("auto", "tesserocr", "pytesseract")
+
+_settings = {"backend": "auto", "tesseract_cmd": None, "tessdata": None}
+_resolved = None
+_lock = threading.Lock()
+_local = threading.local()
+_engines = []  # every engine created, closed at exit
+
+
+def _apply_tesseract_cmd(module):
+    if _settings["tesseract_cmd"]:
+        module.pytesseract.tesseract_cmd = _settings["tesseract_cmd"]
+
+
+def configure(backend="auto", tesseract_cmd=None, tessdata=None):
+    """Chooses the backend; ``tesseract_cmd`` is for pytesseract, ``tessdata`` for tesserocr."""
+    global _resolved
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown OCR backend {backend!r}; choose from {', '.join(BACKENDS)}")
+    with _lock:
+        _settings.update(backend=backend, tesseract_cmd=tesseract_cmd, tessdata=tessdata)
+        _resolved = None
+    if pytesseract.loaded:
+        _apply_tesseract_cmd(pytesseract)
+
+
+def backend():
+    """The backend in use, resolved on first call: "tesserocr" or "pytesseract"."""
+    global _resolved
+    if _resolved is None:
+        with _lock:
+            if _resolved is None:
+                wanted = _settings["backend"]
+                _resolved = "pytesseract"
+                if wanted != "pytesseract":
+                    try:
+                        import tesserocr  # noqa: F401
+                        _resolved = "tesserocr"
+                    except (ImportError, ValueError, OSError) as e:
+                        # ValueError: first imported off the main thread (see module docstring).
+                        if wanted == "tesserocr" or not isinstance(e, ImportError):
+                            sys.stderr.write(f"⚠️ tesserocr unavailable ({e}); OCR falls back to pytesseract.\n")
+    return _resolved
+
+
+def _fall_back(error):
+    """Switches to pytesseract for good after tesserocr failed to start."""
+    global _resolved
+    with _lock:
+        if _resolved != "pytesseract":
+            sys.stderr.write(f"⚠️ In-process OCR unavailable ({error}); falling back to pytesseract.\n")
+            _resolved = "pytesseract"
+
+
+def _engine(lang, psm):
+    """This thread's engine for (lang, psm), created on first use."""
+    engines = getattr(_local, 'engines', None)
+    if engines is None:
+        engines = _local.engines = {}
+    api = engines.get((lang, psm))
+    if api is None:
+        import tesserocr
+        kwargs = {"lang": lang, "psm": psm}
+        if _settings["tessdata"]:
+            kwargs["path"] = _settings["tessdata"]
+        api = engines[(lang, psm)] = tesserocr.PyTessBaseAPI(**kwargs)
+        with _lock:
+            _engines.append(api)
+    return api
+
+
+def _set_gray(api, gray):
+    height, width = gray.shape[:2]
+    if gray.ndim != 2:
+        raise ValueError("expected a single-channel (grayscale) image")
+    api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+
+
+_PSM_RE = re.compile(r'^\s*(?:--psm\s+(\d+))?\s*$')
+
+
+def _psm(config):
+    """The --psm value of a pytesseract config string, or None if it has other options."""
+    match = _PSM_RE.match(config or '')
+    if match is None:
+        return None
+    return int(match.group(1)) if match.group(1) else 3
+
+
+def image_to_string(gray, lang='eng', config=''):
+    """OCR text of a grayscale uint8 array (same contract as pytesseract.image_to_string)."""
+    psm = _psm(config)
+    if psm is not None and backend() == "tesserocr":
+        try:
+            api = _engine(lang, psm)
+        except RuntimeError as e:
+            _fall_back(e)
+        else:
+            _set_gray(api, gray)
+            return api.GetUTF8Text()
+    return pytesseract.image_to_string(gray, lang=lang, config=config)
+
+
+def image_to_words(gray, lang='eng', config=''):
+    """Word boxes as (block, par, line, left, top, height, text), in Tesseract's reading order."""
+    psm = _psm(config)
+    if psm is not None and backend() == "tesserocr":
+        try:
+            api = _engine(lang, psm)
+        except RuntimeError as e:
+            _fall_back(e)
+        else:
+            _set_gray(api, gray)
+            words = []
+            for row in api.GetTSVText(0).splitlines():
+                cols = row.split('\t')
+                # level 5 = word; columns: level page block par line word left top width height conf text
+                if len(cols) == 12 and cols[0] == '5' and cols[11].strip():
+                    words.append((int(cols[2]), int(cols[3]), int(cols[4]),
+                                  int(cols[6]), int(cols[7]), int(cols[9]), cols[11].strip()))
+            return words
+
+    data = pytesseract.image_to_data(gray, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    words = []
+    for i, text in enumerate(data['text']):
+        text = text.strip()
+        if text:
+            words.append((data['block_num'][i], data['par_num'][i], data['line_num'][i],
+                          data['left'][i], data['top'][i], data['height'][i], text))
+    return words
+
+
+def engine_count():
+    with _lock:
+        return len(_engines)
+
+
+@atexit.register
+def close_all():
+    """Ends every engine (frees the loaded models)."""
+    with _lock:
+        engines, _engines[:] = list(_engines), []
+    for api in engines:
+        api.End()
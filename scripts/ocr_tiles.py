@@ -0,0 +1,138 @@
+"""Tiled, parallel OCR for very large images (long screenshots, big scans).
+
+Instead of handing one huge frame to Tesseract, the grayscale image is
+
+  1. downsampled when that is safe: only if the estimated glyph height stays
+     at or above MIN_GLYPH_PX after scaling (Tesseract accuracy drops quickly
+     below ~20 px capitals),
+  2. cut into full-width horizontal strips that overlap by more than a text
+     line, so every line is whole in at least one strip,
+  3. OCR'd strip by strip on a shared, long-lived thread pool (each
+     Tesseract call runs outside the GIL, either as a subprocess or in the
+     C++ engine; with the in-process engine every pool thread keeps its
+     Tesseract instance loaded between images, see ocr_engine.py),
+  4. stitched back together: every strip owns the band between the midpoints
+     of its overlaps, words are kept by the strip that owns their vertical
+     centre, and lines are emitted strip by strip in Tesseract's own reading
+     order, with a blank line between paragraphs.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ocr_engine
+from lazy_imports import lazy_import
+from spans import current_path, span
+
+np = lazy_import('numpy')
+cv2 = lazy_import('cv2')
+
+TILE_HEIGHT = 1600
+TILE_OVERLAP = 160
+MAX_OCR_WIDTH = 2400
+MIN_GLYPH_PX = 20
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers):
+    """Shared tile pool with ``workers`` threads (kept, so per-thread engines stay warm)."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-tile")
+        return pool
+
+
+def estimate_glyph_height(gray):
+    """Median height (px) of character-sized connected components, or None."""
+    step = 4 if min(gray.shape[:2]) >= 400 else 1
+    small = gray[::step, ::step]
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    # Dark text on light background is the common case; flip if most pixels came out "ink".
+    if np.count_nonzero(binary) > binary.size / 2:
+        binary = cv2.bitwise_not(binary)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights = stats[1:count, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:count, cv2.CC_STAT_WIDTH]
+    plausible = heights[(heights >= 2) & (heights <= small.shape[0] // 4) & (widths <= 4 * heights)]
+    if plausible.size < 10:
+        return None
+    return float(np.median(plausible)) * step
+
+
+def safe_scale(width, glyph_height, max_width=MAX_OCR_WIDTH, min_glyph_px=MIN_GLYPH_PX):
+    """Downscale factor (<= 1.0) for an image ``width`` px wide that keeps glyphs readable."""
+    if width <= max_width or glyph_height is None:
+        return 1.0
+    return min(1.0, max(max_width / width, min_glyph_px / glyph_height))
+
+
+def tile_bounds(height, tile_height=TILE_HEIGHT, overlap=TILE_OVERLAP):
+    """(y0, y1, own_start, own_end) for overlapping horizontal strips."""
+    if height <= tile_height:
+        return [(0, height, 0, height)]
+    step = tile_height - overlap
+    starts = list(range(0, height - overlap, step))
+    bounds = []
+    for i, y0 in enumerate(starts):
+        y1 = min(y0 + tile_height, height)
+        own_start = 0 if i == 0 else y0 + overlap // 2
+        own_end = height if i == len(starts) - 1 else y1 - overlap // 2
+        bounds.append((y0, y1, own_start, own_end))
+    return bounds
+
+
+def ocr_words(tile, config='', parent=None):
+    """Word boxes for one tile: list of (block, par, line, left, top, height, text)."""
+    with span('tile', parent):
+        return ocr_engine.image_to_words(tile, lang='eng', config=config)
+
+
+def stitch(tiles):
+    """Joins per-tile word lists, given as (y0, own_start, own_end, words), into text.
+
+    Whole lines are assigned to the tile that owns their vertical centre, so a
+    line is never split between two strips.
+    """
+    paragraphs = []
+    for tile_index, (y0, own_start, own_end, words) in enumerate(tiles):
+        lines = {}
+        for block, par, line, left, top, height, text in words:
+            lines.setdefault((block, par, line), []).append((left, top, top + height, text))
+        current_par = None
+        for (block, par, line), entries in lines.items():
+            centre = y0 + (min(e[1] for e in entries) + max(e[2] for e in entries)) / 2
+            if not own_start <= centre < own_end:
+                continue
+            if (tile_index, block, par) != current_par:
+                paragraphs.append([])
+                current_par = (tile_index, block, par)
+            paragraphs[-1].append(' '.join(e[3] for e in sorted(entries)))
+    return '\n\n'.join('\n'.join(lines) for lines in paragraphs)
+
+
+def ocr_tiled(gray, tile_height=TILE_HEIGHT, overlap=TILE_OVERLAP, workers=None, config='',
+              max_width=MAX_OCR_WIDTH):
+    """OCRs a grayscale array as overlapping strips in parallel; returns the stitched text."""
+    with span('glyph estimate'):
+        glyph = estimate_glyph_height(gray)
+    scale = safe_scale(gray.shape[1], glyph, max_width)
+    if scale < 1.0:
+        with span('downscale'):
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if glyph is not None:
+        # The overlap has to hold a whole line (glyph height plus descenders and spacing).
+        overlap = max(overlap, int(4 * glyph * scale))
+    tile_height = max(tile_height, 3 * overlap)
+
+    bounds = tile_bounds(gray.shape[0], tile_height, overlap)
+    ocr_engine.backend()  # resolved on this thread, not in the pool (see ocr_engine.py)
+    pool = _pool(workers or os.cpu_count() or 1)
+    parent = current_path()
+    futures = [pool.submit(ocr_words, gray[y0:y1], config, parent) for y0, y1, _, _ in bounds]
+    tiles = [(y0, own_start, own_end, f.result()) for (y0, _, own_start, own_end), f in zip(bounds, futures)]
+    with span('stitch'):
+        return stitch(tiles)
@@ -1,4 +1,77 @@
-def is_prime(n):
+"""Prime numbers: a segmented numpy sieve, range queries and Miller–Rabin.
+
+The sieve only keeps odd numbers (2 is handled separately) and works through
+[lo, hi) one segment at a time: the base primes up to sqrt(hi) strike out
+their multiples in a segment with one strided numpy assignment each, so memory
+stays at one segment (SEGMENT_ODDS flags) however large the range is.
+
+  iter_primes / prime_chunks   stream the primes of [lo, hi) in order
+  count_primes                 how many primes lie in [lo, hi)
+  nth_prime                    the n-th prime (1-based)
+  is_prime                     single values: deterministic Miller–Rabin
+  PrimeTable                   bit-packed sieve (limit/16 bytes) for repeated
+                               is_prime / pi(x) / nth queries below a limit
+
+is_prime_trial is the original trial-division test, kept for comparison
+(see bench_primes.py).
+
+    python scripts/prime_numbers.py                      # the primes below 100
+    python scripts/prime_numbers.py 1000000 1000100
+    python scripts/prime_numbers.py --count 1000000000
+    python scripts/prime_numbers.py --nth 1000000
+    python scripts/prime_numbers.py --is-prime 18446744073709551557
+"""
+
+import argparse
+import math
+
+from lazy_imports import lazy_import
+
+# Only the sieve paths need numpy; is_prime (and fibonacci.py, which imports
+# it) work without it.
+np = lazy_import('numpy')
+
+SEGMENT_ODDS = 1 << 20  # odd numbers per segment (1 MiB of flags, 2M integers)
+
+# Miller–Rabin is deterministic for n below each bound with the first primes as
+# bases (Jaeschke; Sorenson & Webster); smaller n need fewer rounds.
+_MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+_MR_DETERMINISTIC_BELOW = 3317044064679887385961981
+_MR_WITNESS_LIMITS = (
+    (2047, 1),
+    (1373653, 2),
+    (25326001, 3),
+    (3215031751, 4),
+    (2152302898747, 5),
+    (3474749660383, 6),
+    (341550071728321, 7),
+    (3825123056546413051, 9),
+    (318665857834031151167461, 12),
+    (_MR_DETERMINISTIC_BELOW, 13),
+)
+_MR_EXTRA_BASES = (43, 47, 53, 59, 61, 67, 71)  # more rounds where no bound is known
+
+
+def _mr_bases(n):
+    for limit, count in _MR_WITNESS_LIMITS:
+        if n < limit:
+            return _MR_BASES[:count]
+    return _MR_BASES + _MR_EXTRA_BASES  # no proof above the last bound: a strong probable-prime test
+
+
+_POPCOUNT = None
+
+
+def _popcount_table():
+    """Set bits per byte value, built on first use (it needs numpy)."""
+    global _POPCOUNT
+    if _POPCOUNT is None:
+        _POPCOUNT = np.array([bin(i).count('1') for i in range(256)], np.uint8)
+    return _POPCOUNT
+
+
+def is_prime_trial(n):
+    """Trial division by every integer up to sqrt(n) (the original implementation)."""
     if n < 2:
         return False
     for i in range(2, int(n ** 0.5) + 1):
@@ -6,7 +79,221 @@ def is_prime(n):
             return False
     return True
 
-print("=== Prime Numbers (1-100) ===")
-primes = [n for n in range(1, 101) if is_prime(n)]
-print(f"Found {len(primes)} prime numbers:")
-print(", ".join(map(str, primes)))
+
+def is_prime(n):
+    """Miller–Rabin: exact below _MR_DETERMINISTIC_BELOW (~3.3e24), a strong probable-prime test above."""
+    if n < 2:
+        return False
+    for p in _MR_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _mr_bases(n):
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def small_primes(limit):
+    """All primes <= limit as an int64 array (a plain odd-only sieve; meant for base primes)."""
+    if limit < 2:
+        return np.empty(0, np.int64)
+    flags = np.ones((limit + 1) // 2, bool)  # flags[i]: 2i + 1
+    flags[0] = False
+    for i in range(1, (math.isqrt(limit) - 1) // 2 + 1):
+        if flags[i]:
+            p = 2 * i + 1
+            flags[p * p // 2::p] = False
+    return np.concatenate(([2], 2 * np.flatnonzero(flags) + 1)).astype(np.int64)
+
+
+def odd_segments(lo, hi, segment_odds=SEGMENT_ODDS):
+    """Yields (first, flags) covering the odd numbers of [lo, hi): flags[i] is first + 2i's primality."""
+    first = max(lo, 1) | 1
+    if first >= hi:
+        return
+    base = small_primes(math.isqrt(hi - 1))[1:].tolist()
+    while first < hi:
+        count = min(segment_odds, (hi - first + 1) // 2)
+        last = first + 2 * (count - 1)
+        flags = np.ones(count, bool)
+        for p in base:
+            start = p * p
+            if start > last:
+                break
+            if start < first:
+                start = (first + p - 1) // p * p
+                if start % 2 == 0:
+                    start += p
+            flags[(start - first) // 2::p] = False
+        if first == 1:
+            flags[0] = False
+        yield first, flags
+        first += 2 * count
+
+
+def prime_chunks(lo, hi, segment_odds=SEGMENT_ODDS):
+    """Yields the primes of [lo, hi) as int64 arrays, one per segment, in order."""
+    if lo <= 2 < hi:
+        yield np.array([2], np.int64)
+    for first, flags in odd_segments(lo, hi, segment_odds):
+        yield first + 2 * np.flatnonzero(flags)
+
+
+def iter_primes(lo, hi, segment_odds=SEGMENT_ODDS):
+    """Yields the primes of [lo, hi) as ints, with memory bounded by one segment."""
+    for chunk in prime_chunks(lo, hi, segment_odds):
+        yield from chunk.tolist()
+
+
+def count_primes(lo, hi, segment_odds=SEGMENT_ODDS):
+    """Number of primes in [lo, hi)."""
+    total = 1 if lo <= 2 < hi else 0
+    for _, flags in odd_segments(lo, hi, segment_odds):
+        total += int(np.count_nonzero(flags))
+    return total
+
+
+def nth_prime_upper_bound(n):
+    """An upper bound for the n-th prime (Rosser's theorem for n >= 6)."""
+    if n < 6:
+        return 13
+    return int(n * (math.log(n) + math.log(math.log(n)))) + 1
+
+
+def nth_prime(n, segment_odds=SEGMENT_ODDS):
+    """The n-th prime, 1-based (nth_prime(1) == 2)."""
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    if n == 1:
+        return 2
+    remaining = n - 1  # odd primes still to pass
+    for first, flags in odd_segments(3, nth_prime_upper_bound(n) + 1, segment_odds):
+        found = int(np.count_nonzero(flags))
+        if found >= remaining:
+            return first + 2 * int(np.flatnonzero(flags)[remaining - 1])
+        remaining -= found
+    raise AssertionError("nth_prime_upper_bound was too small")
+
+
+class PrimeTable:
+    """Bit-packed primality of every integer below ``limit``.
+
+    One bit per odd number (limit/16 bytes: 62.5 MB for 10^9), filled segment
+    by segment, plus a running prime count per BLOCK_BYTES so pi(x) only
+    popcounts within one block.
+    """
+
+    BLOCK_BYTES = 64
+
+    def __init__(self, limit, segment_odds=SEGMENT_ODDS):
+        if segment_odds % (8 * self.BLOCK_BYTES):
+            raise ValueError(f"segment_odds must be a multiple of {8 * self.BLOCK_BYTES}")
+        self.limit = limit
+        parts, block_counts = [], [np.zeros(1, np.int64)]
+        for _, flags in odd_segments(1, limit, segment_odds):
+            packed = np.packbits(flags, bitorder='little')
+            parts.append(packed)
+            padded = np.zeros(-(-len(packed) // self.BLOCK_BYTES) * self.BLOCK_BYTES, np.uint8)
+            padded[:len(packed)] = packed
+            block_counts.append(_popcount_table()[padded].reshape(-1, self.BLOCK_BYTES).sum(axis=1, dtype=np.int64))
+        self.bits = np.concatenate(parts) if parts else np.zeros(0, np.uint8)
+        self._prefix = np.cumsum(np.concatenate(block_counts))  # odd primes before each block
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes + self._prefix.nbytes
+
+    def _check(self, n):
+        if n >= self.limit:
+            raise ValueError(f"{n} is outside the table (limit {self.limit})")
+
+    def is_prime(self, n):
+        if n == 2:
+            return self.limit > 2
+        if n < 2 or n % 2 == 0:
+            return False
+        self._check(n)
+        i = n // 2
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    __contains__ = is_prime
+
+    def pi(self, x):
+        """Number of primes <= x."""
+        if x < 2:
+            return 0
+        self._check(x)
+        nbits = (x + 1) // 2  # odd numbers <= x
+        full, rem = divmod(nbits, 8)
+        block = full // self.BLOCK_BYTES
+        total = int(self._prefix[block]) + int(_popcount_table()[self.bits[block * self.BLOCK_BYTES:full]].sum())
+        if rem:
+            total += int(_popcount_table()[self.bits[full] & ((1 << rem) - 1)])
+        return total + 1  # the prime 2
+
+    def count(self, lo, hi):
+        """Number of primes in [lo, hi)."""
+        return self.pi(hi - 1) - self.pi(lo - 1) if hi > lo else 0
+
+    def nth(self, n):
+        """The n-th prime (1-based), if it is below the limit."""
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        if n == 1:
+            return 2
+        block = int(np.searchsorted(self._prefix, n - 1, side='left')) - 1
+        if block + 1 >= len(self._prefix):
+            raise ValueError(f"the table (limit {self.limit}) holds fewer than {n} primes")
+        chunk = self.bits[block * self.BLOCK_BYTES:(block + 1) * self.BLOCK_BYTES]
+        offsets = np.flatnonzero(np.unpackbits(chunk, bitorder='little'))
+        i = block * self.BLOCK_BYTES * 8 + int(offsets[n - 2 - int(self._prefix[block])])
+        return 2 * i + 1
+
+    def primes(self, lo, hi):
+        """The primes of [lo, hi) as an int64 array."""
+        hi = min(hi, self.limit)
+        if hi <= lo:
+            return np.empty(0, np.int64)
+        start = max(lo, 1) // 2 // 8
+        stop = -(-((hi + 1) // 2) // 8)
+        odds = (2 * (start * 8 + np.flatnonzero(np.unpackbits(self.bits[start:stop], bitorder='little'))) + 1)
+        odds = odds[(odds >= lo) & (odds < hi)]
+        return np.concatenate(([2], odds)).astype(np.int64) if lo <= 2 < hi else odds.astype(np.int64)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate, count and test primes.")
+    parser.add_argument('range', nargs='*', type=int, metavar='N',
+                        help='[lo] hi: print the primes in [lo, hi) (default: 1 101)')
+    parser.add_argument('--count', type=int, metavar='HI', help='count the primes below HI')
+    parser.add_argument('--nth', type=int, metavar='N', help='print the N-th prime')
+    parser.add_argument('--is-prime', type=int, metavar='N', help='test one number')
+    args = parser.parse_args(argv)
+
+    if args.count is not None:
+        print(f"{count_primes(0, args.count)} primes below {args.count}")
+    elif args.nth is not None:
+        print(f"prime #{args.nth} is {nth_prime(args.nth)}")
+    elif args.is_prime is not None:
+        print(f"{args.is_prime} is {'prime' if is_prime(args.is_prime) else 'not prime'}")
+    else:
+        lo, hi = ([1] + args.range)[-2:] if args.range else (1, 101)
+        primes = list(iter_primes(lo, hi))
+        print(f"=== Prime Numbers ({lo}-{hi - 1}) ===")
+        print(f"Found {len(primes)} prime numbers:")
+        print(", ".join(map(str, primes)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Output rendering for starkosint.py results.
+
+Every result is rendered into one string and written with a single write()
+and flush, instead of being assembled with repeated += and printed a
+character at a time. The typing animation of the interactive CLI is kept but
+only runs when ANIMATE is on (an interactive terminal without
+STARK_NO_ANIMATION set); everything else takes the fast path.
+
+Backends, selected with Renderer(fmt=...):
+
+  pretty   coloured console output (the classic look)
+  json     one JSON document per result
+  ndjson   one JSON object per line; leak-DB records are flattened one per line
+  table    plain aligned text columns, no colour codes
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+from colorama import Fore
+
+from spans import span, traced
+
+FORMATS = ("pretty", "json", "ndjson", "table")
+ANIMATE = sys.stdout.isatty() and not os.environ.get("STARK_NO_ANIMATION")
+LINE_COLORS = [Fore.YELLOW, Fore.CYAN, Fore.MAGENTA, Fore.LIGHTBLUE_EX, Fore.LIGHTGREEN_EX]
+
+
+@traced
+def format_dict_output(title, details):
+    """Formats a dictionary of results for console output with colors."""
+    rule = f"{Fore.CYAN}{'=' * len(title)}\n"
+    parts = [f"\n{Fore.CYAN}{title}\n", rule]
+
+    if isinstance(details, dict):
+        for key, value in details.items():
+            if isinstance(value, dict):
+                parts.append(f"{Fore.YELLOW}- {key}:\n")
+                for sub_key, sub_value in value.items():
+                    parts.append(f"{Fore.WHITE}     > {sub_key}: {sub_value}\n")
+            else:
+                if isinstance(value, (list, tuple)):
+                    value = ', '.join(map(str, value))
+                parts.append(f"{Fore.YELLOW}- {key}: {Fore.LIGHTBLUE_EX}{value}\n")
+    else:
+        parts.append(f"{Fore.WHITE}{details}\n")
+    parts.append(rule)
+    return ''.join(parts)
+
+
+@traced
+def format_as_js(data):
+    """Formats a dictionary as a JavaScript-style object for output with colors."""
+    js_lines = []
+    for key, value in data.items():
+        key_str = f"{Fore.YELLOW}{key}"
+        value_str = f"{Fore.WHITE}{json.dumps(value, ensure_ascii=False)}"
+        js_lines.append(f"    {key_str}: {value_str}")
+    return "{\n" + ",\n".join(js_lines) + "\n}"
+
+
+def type_effect(text, delay=0.002, animate=None):
+    """Typing animation effect (a single write when animation is off)."""
+    if not (ANIMATE if animate is None else animate):
+        sys.stdout.write(f"{text}\n")
+        sys.stdout.flush()
+        return
+    for char in str(text):
+        print(char, end='', flush=True)
+        time.sleep(delay)
+    print()
+
+
+def colorize_lines(text):
+    """Gives every line of ``text`` a random color, as print_colored does."""
+    return ''.join(f"{random.choice(LINE_COLORS)}{line}\n" for line in str(text).splitlines())
+
+
+def print_colored(text, delay=0.005, animate=None):
+    """Prints text in a random color with a typing delay (a single write when animation is off)."""
+    if not (ANIMATE if animate is None else animate):
+        sys.stdout.write(colorize_lines(text))
+        sys.stdout.flush()
+        return
+    for line in str(text).splitlines():
+        color = random.choice(LINE_COLORS)
+        for char in line:
+            print(color + char, end='', flush=True)
+            time.sleep(delay)
+        print()
+
+
+def _table(rows, headers):
+    """Aligned plain-text table; values are flattened to single-line strings."""
+    def cell(value):
+        if isinstance(value, (dict, list, tuple)):
+            value = json.dumps(value, ensure_ascii=False)
+        return str(value).replace('\n', ' ')
+
+    body = [[cell(row.get(h, '')) for h in headers] for row in rows]
+    widths = [max([len(h)] + [len(r[i]) for r in body]) for i, h in enumerate(headers)]
+    lines = ['  '.join(h.ljust(w) for h, w in zip(headers, widths)).rstrip(),
+             '  '.join('-' * w for w in widths)]
+    lines += ['  '.join(v.ljust(w) for v, w in zip(r, widths)).rstrip() for r in body]
+    return '\n'.join(lines) + '\n'
+
+
+class Renderer:
+    """Renders lookup results in one of FORMATS with one write per result."""
+
+    def __init__(self, fmt="pretty", animate=None, stream=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown output format {fmt!r}; choose from {', '.join(FORMATS)}")
+        self.fmt = fmt
+        self.animate = (ANIMATE if animate is None else animate) and fmt == "pretty"
+        self.stream = stream
+
+    @property
+    def out(self):
+        return self.stream or sys.stdout
+
+    def write(self, text):
+        with span('write'):
+            self.out.write(text)
+            self.out.flush()
+
+    @traced(name='render')
+    def result(self, title, details):
+        """One lookup result: a dict of fields, or a status/error message string."""
+        if self.fmt == "pretty":
+            self.write(format_dict_output(title, details) + "\n")
+        elif self.fmt == "json":
+            self.write(json.dumps({"title": title, "result": details}, ensure_ascii=False, indent=2) + "\n")
+        elif self.fmt == "ndjson":
+            self.write(json.dumps({"title": title, "result": details}, ensure_ascii=False) + "\n")
+        elif isinstance(details, dict):
+            rows = [{"field": k, "value": v} for k, v in details.items()]
+            self.write(f"{title}\n{_table(rows, ['field', 'value'])}\n")
+        else:
+            self.write(f"{title}\n{details}\n\n")
+
+    def message(self, text, color=Fore.WHITE):
+        """Status line; goes to stderr for machine-readable formats so stdout stays parseable."""
+        if self.fmt == "pretty":
+            self.write(f"{color}{text}\n")
+        else:
+            sys.stderr.write(f"{text.strip()}\n")
+
+    @traced(name='render')
+    def leak_report(self, target, databases):
+        """Leak-database results: ``databases`` is a list of (name, [record dicts])."""
+        if self.fmt == "json":
+            payload = {"query": target, "databases": {name: records for name, records in databases}}
+            self.write(json.dumps(payload, ensure_ascii=False, indent=2) + "\n")
+            return
+        if self.fmt == "ndjson":
+            self.write(''.join(
+                json.dumps(dict(record, database=name), ensure_ascii=False) + "\n"
+                for name, records in databases for record in records))
+            return
+        if self.fmt == "table":
+            parts = []
+            for name, records in databases:
+                headers = list(dict.fromkeys(k for record in records for k in record))
+                parts.append(f"== {name} ({len(records)} records) ==\n{_table(records, headers)}\n")
+            self.write(''.join(parts) or f"No leaked data found for '{target}'.\n")
+            return
+
+        if not databases:
+            type_effect(f"\n{Fore.GREEN}✅ SOURCE 2: No leaked data found for '{target}'.", animate=self.animate)
+            return
+        if self.animate:
+            for name, records in databases:
+                type_effect(f"{Fore.LIGHTRED_EX}\n=== [ SOURCE 2: LEAK DATABASE: {name} ] ===\n", animate=True)
+                for record in records:
+                    print_colored(format_as_js(record), animate=True)
+            return
+        parts = []
+        for name, records in databases:
+            parts.append(f"{Fore.LIGHTRED_EX}\n=== [ SOURCE 2: LEAK DATABASE: {name} ] ===\n\n")
+            parts.extend(colorize_lines(format_as_js(record)) for record in records)
+        self.write(''.join(parts))
@@ -0,0 +1,343 @@
+"""Long-running HTTP/JSON service for the starkosint.py lookups.
+
+A single asyncio event loop (stdlib only: asyncio streams and a minimal
+HTTP/1.1 parser with keep-alive) serves the lookups to other programs, e.g.
+the Next.js API routes, without paying interpreter startup and the cv2/numpy
+imports on every call. Everything is warmed once at startup: heavy modules,
+the offline indexes and the pooled HTTP transport.
+
+The lookup functions block, so they run on executors:
+
+  * network/index lookups and EXIF on an I/O thread pool; connections to the
+    upstream APIs are reused through the shared transport,
+  * decode + OCR on a separate pool sized to the CPUs; with the in-process
+    engine (ocr_engine.py) each pool thread keeps its Tesseract loaded.
+
+Each pool admits at most ``workers + queue`` jobs. Anything beyond that is
+refused at once with 503 and Retry-After, so a burst of images cannot pile up
+unbounded work or starve the cheap lookups.
+
+Endpoints (all responses are JSON):
+
+  GET  /health                        liveness
+  GET  /ip/<address>[?offline=1]      lookup_ip_info
+  GET  /ip-multi/<address>[?deadline=3]
+  GET  /ifsc/<code>[?offline=1]       lookup_ifsc_info
+  GET  /ifsc-search?q=<words>[&limit=10]  search_ifsc_branches (offline index)
+  POST /image[?exif=0][&ocr=0]        EXIF + OCR of the raw image bytes in the body
+  GET  /stats                         pools, transport, lookup and image cache counters
+
+    python scripts/starkosint.py serve --port 8787
+    curl localhost:8787/ifsc/HDFC0000001
+    curl --data-binary @scan.png localhost:8787/image
+"""
+
+import asyncio
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+DEFAULT_IO_WORKERS = 32
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+IPV4_RE = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
+IFSC_RE = re.compile(r'^[A-Z]{4}0[A-Z0-9]{6}$')
+NOT_FOUND_RE = re.compile(r'not found|not covered|invalid', re.IGNORECASE)
+
+
+class Overloaded(Exception):
+    """A pool is at its admission limit."""
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class BoundedPool:
+    """Thread pool that admits at most ``workers + queue`` jobs; beyond that run() raises Overloaded.
+
+    Only touched from the event loop thread, so the counters need no lock.
+    """
+
+    def __init__(self, name, workers, queue):
+        self.name = name
+        self.workers = workers
+        self.limit = workers + queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"svc-{name}")
+        self.inflight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        if self.inflight >= self.limit:
+            self.rejected += 1
+            raise Overloaded(self.name)
+        self.inflight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.inflight -= 1
+            self.completed += 1
+
+    def stats(self):
+        return {"workers": self.workers, "limit": self.limit, "inflight": self.inflight,
+                "completed": self.completed, "rejected": self.rejected}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _lookup_response(result):
+    """Maps a lookup's dict-or-message result to (status, payload)."""
+    if isinstance(result, dict):
+        return 200, {"ok": True, "result": result}
+    status = 404 if NOT_FOUND_RE.search(result) else 502
+    return status, {"ok": False, "error": result}
+
+
+class OSINTService:
+    """Routes requests to the lookup functions of ``backend`` (the starkosint module)."""
+
+    def __init__(self, backend, io_workers=DEFAULT_IO_WORKERS, ocr_workers=None, ocr_queue=None,
+                 max_body=MAX_BODY_BYTES):
+        from image_batch import available_cpus
+
+        self.backend = backend
+        ocr_workers = ocr_workers or available_cpus()
+        self.io_pool = BoundedPool("io", io_workers, 4 * io_workers)
+        self.ocr_pool = BoundedPool("ocr", ocr_workers, ocr_workers if ocr_queue is None else ocr_queue)
+        self.max_body = max_body
+        self.started = time.time()
+        self.requests = 0
+        self.statuses = {}
+
+    def warm(self):
+        """Imports the heavy modules and opens indexes/connection pools before the first request."""
+        backend = self.backend
+        for module in (backend.np, backend.cv2, backend.exifread, backend.bs4):
+            getattr(module, '__name__', None)
+        backend.get_ip_geo_index()
+        backend.get_ifsc_index()
+        backend.get_ifsc_search()
+        backend.get_image_cache()
+        backend.get_lookup_cache()
+        backend.get_near_dup_index()
+        backend.get_ocr_engine()
+        backend.http().session
+
+    # --- handlers ---------------------------------------------------------------
+
+    async def handle_ip(self, address, query, body):
+        if not IPV4_RE.match(address):
+            raise HTTPError(400, "invalid IPv4 address")
+        offline = query.get('offline', ['0'])[0] not in ('0', '')
+        return _lookup_response(await self.io_pool.run(self.backend.lookup_ip_info, address, offline))
+
+    async def handle_ip_multi(self, address, query, body):
+        if not IPV4_RE.match(address):
+            raise HTTPError(400, "invalid IPv4 address")
+        try:
+            deadline = float(query.get('deadline', ['0'])[0]) or None
+        except ValueError:
+            raise HTTPError(400, "deadline must be a number of seconds")
+        return _lookup_response(await self.io_pool.run(self.backend.lookup_ip_multi, address, deadline))
+
+    async def handle_ifsc(self, code, query, body):
+        code = code.upper()
+        if not IFSC_RE.match(code):
+            raise HTTPError(400, "invalid IFSC code format (e.g. HDFC0000001)")
+        offline = query.get('offline', ['0'])[0] not in ('0', '')
+        return _lookup_response(await self.io_pool.run(self.backend.lookup_ifsc_info, code, offline))
+
+    async def handle_ifsc_search(self, _, query, body):
+        words = query.get('q', [''])[0].strip()
+        if not words:
+            raise HTTPError(400, "pass the search words as ?q=")
+        try:
+            limit = min(int(query.get('limit', ['10'])[0]), 100)
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        return _lookup_response(await self.io_pool.run(self.backend.search_ifsc_branches, words, limit))
+
+    def _analyze_image(self, data, exif, ocr):
+        from image_source import ImageSource
+
+        source = ImageSource.from_bytes(data)
+        digest = source.digest()
+        result = {"digest": digest, "bytes": len(data)}
+        if exif:
+            result["exif"] = self.backend.extract_exif_data(source, digest)
+        if ocr:
+            match = {}
+            result["ocr"] = self.backend.extract_text_from_image(source, digest, near_dup=match)
+            if match:
+                result["near_duplicate"] = match
+        return result
+
+    async def handle_image(self, _, query, body):
+        if not body:
+            raise HTTPError(400, "POST the image bytes as the request body")
+        exif = query.get('exif', ['1'])[0] != '0'
+        ocr = query.get('ocr', ['1'])[0] != '0'
+        # EXIF alone is header parsing; only decode + OCR needs the bounded CPU pool.
+        pool = self.ocr_pool if ocr else self.io_pool
+        return 200, {"ok": True, "result": await pool.run(self._analyze_image, body, exif, ocr)}
+
+    async def handle_health(self, _, query, body):
+        return 200, {"ok": True, "uptime_s": round(time.time() - self.started, 1)}
+
+    async def handle_stats(self, _, query, body):
+        cache = self.backend.get_image_cache()
+        lookup_cache = self.backend.get_lookup_cache()
+        near_dup = self.backend.get_near_dup_index()
+        return 200, {
+            "ok": True,
+            "requests": self.requests,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "pools": {"io": self.io_pool.stats(), "ocr": self.ocr_pool.stats()},
+            "transport": self.backend.http().stats(),
+            "lookup_cache": lookup_cache.stats() if lookup_cache else None,
+            "image_cache": cache.stats() if cache else None,
+            "near_dup": near_dup.stats() if near_dup else None,
+        }
+
+    ROUTES = {
+        ('GET', 'ip'): handle_ip,
+        ('GET', 'ip-multi'): handle_ip_multi,
+        ('GET', 'ifsc'): handle_ifsc,
+        ('GET', 'ifsc-search'): handle_ifsc_search,
+        ('POST', 'image'): handle_image,
+        ('GET', 'health'): handle_health,
+        ('GET', 'stats'): handle_stats,
+    }
+
+    async def dispatch(self, method, target, body):
+        """Returns (status, payload, extra headers) for one request."""
+        parts = urlsplit(target)
+        segments = [unquote(s) for s in parts.path.strip('/').split('/')]
+        name, arg = segments[0], '/'.join(segments[1:])
+        handler = self.ROUTES.get((method, name))
+        if handler is None:
+            if any(route == name for _, route in self.ROUTES):
+                return 405, {"ok": False, "error": f"{method} not allowed on /{name}"}, ()
+            return 404, {"ok": False, "error": f"no such endpoint: {parts.path}"}, ()
+        try:
+            status, payload = await handler(self, arg, parse_qs(parts.query), body)
+            return status, payload, ()
+        except HTTPError as e:
+            return e.status, {"ok": False, "error": str(e)}, ()
+        except Overloaded as e:
+            return 503, {"ok": False, "error": f"server busy ({e} pool full), retry shortly"}, (("Retry-After", "1"),)
+        except Exception as e:
+            return 500, {"ok": False, "error": f"internal error: {e}"}, ()
+
+    # --- HTTP/1.1 plumbing ----------------------------------------------------
+
+    async def _read_request(self, reader):
+        """Parses one request; returns (method, target, headers, body) or None at EOF."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "request headers too large")
+        request_line, *header_lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, target, version = request_line.split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        for line in header_lines:
+            if line:
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+        headers[':version'] = version
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(411, "chunked uploads are not supported; send Content-Length")
+        length = headers.get('content-length') or '0'
+        # Digits only: int() would also accept "-5", "+5", " 5" or "1_000".
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(400, "invalid Content-Length")
+        length = int(length)
+        if length > self.max_body:
+            raise HTTPError(413, f"body larger than {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    def _encode(self, status, payload, keep_alive, extra_headers=()):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                 "Content-Type: application/json; charset=utf-8",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{k}: {v}" for k, v in extra_headers]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    # The stream position is unknown after a bad request: answer and hang up.
+                    writer.write(self._encode(e.status, {"ok": False, "error": str(e)}, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and headers[':version'] != 'HTTP/1.0')
+                status, payload, extra = await self.dispatch(method, target, body)
+                self.requests += 1
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+                writer.write(self._encode(status, payload, keep_alive, extra))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES,
+                                            backlog=1024)
+        if ready:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+        self.io_pool.shutdown()
+        self.ocr_pool.shutdown()
+
+
+def run(backend, host=DEFAULT_HOST, port=DEFAULT_PORT, io_workers=DEFAULT_IO_WORKERS, ocr_workers=None,
+        ocr_queue=None):
+    """Warms up and serves until interrupted."""
+    service = OSINTService(backend, io_workers=io_workers, ocr_workers=ocr_workers, ocr_queue=ocr_queue)
+    t = time.perf_counter()
+    service.warm()
+    warm_ms = (time.perf_counter() - t) * 1000
+
+    def ready(server):
+        bound = ', '.join(f"http://{s.getsockname()[0]}:{s.getsockname()[1]}" for s in server.sockets)
+        print(f"✅ Serving on {bound} (warm-up {warm_ms:.0f} ms; io pool {service.io_pool.workers}, "
+              f"ocr pool {service.ocr_pool.workers} + {service.ocr_pool.limit - service.ocr_pool.workers} queued). "
+              f"Ctrl+C to stop.", flush=True)
+
+    try:
+        asyncio.run(service.serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
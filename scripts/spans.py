@@ -0,0 +1,185 @@
+"""Lightweight per-stage timing spans for starkosint.py.
+
+Instrumented code wraps its stages in ``with span("parse"):`` blocks or
+decorates whole functions with ``@traced``. While disabled (the default),
+span() hands back one shared no-op context manager and traced functions
+cost a single flag check, so the instrumentation can stay in hot paths.
+
+Once enable() is called every span adds its wall time to a total keyed by
+its call path (e.g. lookup_ip_info > http > connect), per thread, so nested
+stages show both their total and their self time. report() formats the
+breakdown; write_folded() dumps the same data as folded stacks for
+flamegraph.pl / speedscope.
+"""
+
+import functools
+import threading
+from time import perf_counter
+
+_enabled = False
+_local = threading.local()
+_lock = threading.Lock()
+_totals = {}  # path tuple -> [calls, total seconds, seconds spent in child spans]
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _add(path, elapsed, child):
+    with _lock:
+        entry = _totals.get(path)
+        if entry is None:
+            _totals[path] = [1, elapsed, child]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += child
+
+
+class Span:
+    """A timed stage; nested spans on the same thread become its children."""
+
+    __slots__ = ('name', 'parent', 'path', 'start', 'child')
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+
+    def __enter__(self):
+        stack = _stack()
+        if self.parent is not None:
+            self.path = tuple(self.parent) + (self.name,)
+        else:
+            self.path = (stack[-1].path if stack else ()) + (self.name,)
+        self.child = 0.0
+        stack.append(self)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self.start
+        stack = _stack()
+        stack.pop()
+        if stack:
+            stack[-1].child += elapsed
+        _add(self.path, elapsed, self.child)
+        return False
+
+
+def span(name, parent=None):
+    """Context manager timing one stage (a shared no-op while disabled).
+
+    ``parent`` (a path from current_path()) files the span under a span of
+    another thread, e.g. for work handed to a pool; such parallel children
+    can add up to more than their parent's wall time.
+    """
+    return Span(name, parent) if _enabled else NULL_SPAN
+
+
+def current_path():
+    """Path of the innermost open span on this thread (() if none or disabled)."""
+    stack = _stack() if _enabled else None
+    return stack[-1].path if stack else ()
+
+
+def record(name, seconds):
+    """Adds an already-measured child stage of the current span (e.g. from response.elapsed)."""
+    if not _enabled:
+        return
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    if parent is not None:
+        parent.child += seconds
+    _add((parent.path if parent else ()) + (name,), seconds, 0.0)
+
+
+def current_child_time():
+    """Seconds spent so far in children of the innermost open span."""
+    stack = _stack() if _enabled else None
+    return stack[-1].child if stack else 0.0
+
+
+def traced(fn=None, name=None):
+    """Decorator running the whole function inside span(name or fn.__name__)."""
+    if fn is None:
+        return functools.partial(traced, name=name)
+    label = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        with Span(label):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+def snapshot():
+    """{path tuple: (calls, total s, self s)} for everything recorded so far."""
+    with _lock:
+        return {path: (calls, total, total - child) for path, (calls, total, child) in _totals.items()}
+
+
+def report():
+    """The per-stage breakdown as a text table, children indented under parents."""
+    data = snapshot()
+    if not data:
+        return "No spans recorded."
+    roots_total = sum(total for path, (_, total, _) in data.items() if len(path) == 1) or 1.0
+    lines = [f"{'stage':<44} {'calls':>7} {'total ms':>10} {'self ms':>10} {'mean ms':>9} {'%':>6}"]
+
+    def walk(prefix):
+        children = sorted((p for p in data if len(p) == len(prefix) + 1 and p[:len(prefix)] == prefix),
+                          key=lambda p: -data[p][1])
+        for path in children:
+            calls, total, own = data[path]
+            label = '  ' * (len(path) - 1) + path[-1]
+            lines.append(f"{label:<44} {calls:>7} {total * 1000:>10.1f} {own * 1000:>10.1f} "
+                         f"{total * 1000 / calls:>9.2f} {100 * total / roots_total:>6.1f}")
+            walk(path)
+    walk(())
+    return '\n'.join(lines)
+
+
+def write_folded(path):
+    """Writes folded stacks ("a;b;c <self microseconds>") for flamegraph tools."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, (_, _, own) in sorted(snapshot().items()):
+            if own > 0:
+                f.write(f"{';'.join(stack)} {int(own * 1e6)}\n")
@@ -1,38 +1,42 @@
 # STEP 2: IMPORTS AND CONFIGURATION
 
-import requests
-from bs4 import BeautifulSoup
 import re
-import io
 import os
 import sys
-import numpy as np
-import cv2
-import pytesseract
-import exifread
 import json
 import time
-import random
 from colorama import init, Fore, Style
 
+from lazy_imports import lazy_import, is_available
+from transport import get_transport as http
+from render import FORMATS, Renderer
+import spans
+from spans import span, traced
+
 # Initialize colorama for cross-platform color support
 init(autoreset=True)
 
-try:
-    from PIL import Image
-    from PIL.ExifTags import TAGS
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-
 # Set the path to the Tesseract executable installed by apt-get
 # NOTE: Ensure Tesseract is installed on your system (e.g., sudo apt-get install tesseract-ocr)
-try:
-    pytesseract.pytesseract.tesseract_cmd = '/usr/bin/tesseract'
-    print(f"{Fore.GREEN}✅ Setup Complete. Starting CLI...")
-except pytesseract.TesseractNotFoundError:
-    print(f"{Fore.RED}❌ Tesseract executable not found. OCR functionality will fail.")
-    print(f"{Fore.RED}   Please install Tesseract and update the path if necessary.")
+TESSERACT_CMD = '/usr/bin/tesseract'
+
+# Heavy dependencies are imported on first use so the menu draws immediately;
+# e.g. numpy/cv2 only load once option 5 runs OCR (the OCR engine itself is
+# loaded by get_ocr_engine()).
+requests = lazy_import('requests')
+np = lazy_import('numpy')
+cv2 = lazy_import('cv2')
+exifread = lazy_import('exifread')
+bs4 = lazy_import('bs4')
+
+_PIL_AVAILABLE = None
+
+def pil_available():
+    """Checks (once) whether Pillow can be imported."""
+    global _PIL_AVAILABLE
+    if _PIL_AVAILABLE is None:
+        _PIL_AVAILABLE = is_available('PIL.Image')
+    return _PIL_AVAILABLE
 
 # === CONFIGURATION FOR LEAK OSINT (Source 2) ===
 # NOTE: Replace with your actual token for use!
@@ -41,32 +45,72 @@ LANG = "ru"
 LIMIT = 300
 URL = "https://leakosintapi.com/"
 
+# === CONFIGURATION FOR OFFLINE DATA ===
+# Local datasets live here; override with the STARK_DATA_DIR environment variable.
+DATA_DIR = os.environ.get("STARK_DATA_DIR", os.path.join(os.path.expanduser("~"), ".starkosint"))
+# Build with: python scripts/ifsc_index.py build IFSC.csv ~/.starkosint/ifsc.idx
+IFSC_INDEX_PATH = os.path.join(DATA_DIR, "ifsc.idx")
+# Branch search over the same data; built and kept in sync with ifsc.idx automatically.
+IFSC_SEARCH_PATH = os.path.join(DATA_DIR, "ifsc-search.idx")
+# Build with: python scripts/ip_geo.py build <range-file.csv> ~/.starkosint/ipgeo.idx
+IP_GEO_INDEX_PATH = os.path.join(DATA_DIR, "ipgeo.idx")
+
+# === CONFIGURATION FOR IMAGE ANALYSIS CACHE ===
+IMAGE_CACHE_ENABLED = os.environ.get("STARK_IMAGE_CACHE", "1") != "0"
+IMAGE_CACHE_DIR = os.path.join(DATA_DIR, "image-cache")
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Part of every cache key: bump the version when the analysis pipeline changes.
+EXIF_CACHE_CONFIG = "exif:details=0:v1"
+# Large images are OCR'd as overlapping strips in parallel (see ocr_tiles.py):
+# "auto" tiles images taller than OCR_TILE_MIN_HEIGHT or bigger than
+# OCR_TILE_MIN_PIXELS, "always"/"never" force the choice.
+OCR_TILED = os.environ.get("STARK_OCR_TILED", "auto")
+OCR_TILE_MIN_HEIGHT = 3000
+OCR_TILE_MIN_PIXELS = 8_000_000
+# Larger images are decoded at 1/2, 1/4 or 1/8 resolution (grayscale only).
+OCR_MAX_DECODE_PIXELS = 64_000_000
+# "auto" keeps Tesseract loaded in-process through tesserocr when it is installed
+# and otherwise runs the tesseract CLI through pytesseract (see ocr_engine.py).
+OCR_ENGINE = os.environ.get("STARK_OCR_ENGINE", "auto")
+# Language data for the in-process engine; None uses tesserocr's built-in default.
+TESSDATA_DIR = os.environ.get("TESSDATA_PREFIX")
+OCR_CACHE_CONFIG = f"ocr:lang=eng:psm=3,6:tiled={OCR_TILED}:maxpx={OCR_MAX_DECODE_PIXELS}:engine={OCR_ENGINE}:v2"
+# Re-encoded, resized or slightly cropped copies of an image already OCR'd are
+# found by perceptual hash (see near_dup.py). "group" only reports which image
+# one resembles and still OCRs it; "reuse" (opt-in) also answers a same-size
+# re-encode with the stored text once a half-resolution tile comparison shows
+# no changed characters; "off" disables the index.
+NEAR_DUP_MODE = os.environ.get("STARK_NEAR_DUP", "group")
+NEAR_DUP_INDEX_PATH = os.path.join(DATA_DIR, "near-dup.sqlite3")
+
+# === CONFIGURATION FOR LOOKUP RESPONSE CACHE ===
+# Remote IP/IFSC answers are kept in memory and in SQLite (see lookup_cache.py).
+LOOKUP_CACHE_ENABLED = os.environ.get("STARK_LOOKUP_CACHE", "1") != "0"
+LOOKUP_CACHE_PATH = os.path.join(DATA_DIR, "lookup-cache.sqlite3")
+# Per source, in seconds: (answer fresh for, "not found" kept for,
+# then served stale while refetching in the background for).
+LOOKUP_CACHE_TTLS = {
+    "ip-api": (24 * 3600, 3600, 7 * 24 * 3600),
+    "ifsc": (30 * 24 * 3600, 24 * 3600, 90 * 24 * 3600),
+}
+# Only long-running modes (serve, bulk-ip) refresh stale answers in the
+# background; a one-shot lookup prints the stale answer and exits at once.
+LOOKUP_BACKGROUND_REFRESH = False
+
+# === CONFIGURATION FOR POOL SIZING ===
+# Worker counts, OCR concurrency and the HTTP pool follow the hardware profile
+# written by `python scripts/system_info.py --probe` (or `starkosint.py tune
+# --probe`); without one they are derived from CPUs, cgroup limits and memory.
+# Command-line options still win. STARK_TUNING=0 restores the fixed defaults.
+TUNING_ENABLED = os.environ.get("STARK_TUNING", "1") != "0"
+TUNING_PROFILE_PATH = os.path.join(DATA_DIR, "tuning.json")
+
 # -----------------------------------------------
 # STEP 3: HELPER FUNCTIONS (General)
 # -----------------------------------------------
 
-def format_dict_output(title, details):
-    """Formats a dictionary of results for console output with colors."""
-    output = f"\n{Fore.CYAN}{title}\n"
-    output += f"{Fore.CYAN}{'=' * len(title)}\n"
-
-    if isinstance(details, dict):
-        for key, value in details.items():
-            if isinstance(value, dict):
-                output += f"{Fore.YELLOW}- {key}:\n"
-                for sub_key, sub_value in value.items():
-                    output += f"{Fore.WHITE}     > {sub_key}: {sub_value}\n"
-            else:
-                if isinstance(value, (list, tuple)):
-                    value = ', '.join(map(str, value))
-                output += f"{Fore.YELLOW}- {key}: {Fore.LIGHTBLUE_EX}{value}\n"
-    else:
-        output += f"{Fore.WHITE}{details}\n"
-    output += f"{Fore.CYAN}{'=' * len(title)}\n"
-    return output
-
 def handle_terminal_image_upload():
-    """Prompts user to enter a file path and reads the image file data."""
+    """Prompts user to enter a file path and memory-maps the image file (see image_source.py)."""
     print(f"\n{Fore.YELLOW}--- Image File Path Required ---")
     try:
         # Get the file path from the user
@@ -81,14 +125,14 @@ def handle_terminal_image_upload():
             print(f"{Fore.RED}❌ File not found at path: '{file_path}'")
             return None, None
 
-        # Read the file's binary data
-        with open(file_path, 'rb') as f:
-            image_data = f.read()
+        # Map the file instead of reading it; EXIF and OCR share the mapping
+        from image_source import ImageSource
+        image_source = ImageSource.open(file_path)
 
-        file_name = os.path.basename(file_path)
+        file_name = image_source.name
 
         print(f"{Fore.GREEN}✅ File '{file_name}' loaded successfully.")
-        return file_name, image_data
+        return file_name, image_source
 
     except PermissionError:
         print(f"{Fore.RED}❌ Permission denied to read the file.")
@@ -96,40 +140,18 @@ def handle_terminal_image_upload():
     except IsADirectoryError:
         print(f"{Fore.RED}❌ The path provided is a directory, not a file.")
         return None, None
+    except ValueError:
+        print(f"{Fore.RED}❌ The file is empty.")
+        return None, None
     except Exception as e:
         print(f"{Fore.RED}❌ Error during file reading: {e}")
         return None, None
 
 
-def type_effect(text, delay=0.002):
-    """Typing animation effect."""
-    for char in str(text):
-        print(char, end='', flush=True)
-        time.sleep(delay)
-    print()
-
-def format_as_js(data):
-    """Formats a dictionary as a JavaScript-style object for output with colors."""
-    js_lines = []
-    for key, value in data.items():
-        key_str = f"{Fore.YELLOW}{key}"
-        value_str = f"{Fore.WHITE}{json.dumps(value, ensure_ascii=False)}"
-        js_lines.append(f"    {key_str}: {value_str}")
-    return "{\n" + ",\n".join(js_lines) + "\n}"
-
-def print_colored(text, delay=0.005):
-    """Prints text in a random color with a typing delay."""
-    colors = [Fore.YELLOW, Fore.CYAN, Fore.MAGENTA, Fore.LIGHTBLUE_EX, Fore.LIGHTGREEN_EX]
-    for line in str(text).splitlines():
-        color = random.choice(colors)
-        for char in line:
-            print(color + char, end='', flush=True)
-            time.sleep(delay)
-        print()
-
 
 # STEP 4: CORE OSINT FUNCTIONS
 
+@traced
 def trace_number(phone_number_in):
     """
     Trace phone number using calltracer.in. (Source 1)
@@ -147,16 +169,18 @@ def trace_number(phone_number_in):
     payload = {"country": "IN", "q": phone_number}
 
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
+        response = http().post(url, headers=headers, data=payload)
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
+            with span('parse'):
+                soup = bs4.BeautifulSoup(response.text, "html.parser")
             details = {"📞 Number (Input)": phone_number_in, "📞 Number (Cleaned)": phone_number}
 
             tags = ["Owner Name", "Owner Address", "Hometown", "Refrence City", "Mobile Locations", "Tower Locations", "Country", "Mobile State", "SIM card", "IMEI number", "MAC address", "Connection", "IP address" , "Owner Personality", "Language" , "Tracking History", "Tracker Id", "Complaints"]
 
-            for tag in tags:
-                element = soup.find(string=tag)
-                details[f"❗️ {tag}"] = element.find_next("td").text.strip() if element and element.find_next("td") else "N/A"
+            with span('extract'):
+                for tag in tags:
+                    element = soup.find(string=tag)
+                    details[f"❗️ {tag}"] = element.find_next("td").text.strip() if element and element.find_next("td") else "N/A"
 
             return details
         else:
@@ -166,6 +190,7 @@ def trace_number(phone_number_in):
 
 # --- New/Updated Vehicle Lookup Functions ---
 
+@traced
 def get_vehicle_details_vahanx(rc_number: str) -> dict:
     """Fetches comprehensive vehicle details from vahanx.in (Source 2 / Fallback)."""
     rc = rc_number.strip().upper()
@@ -177,9 +202,10 @@ def get_vehicle_details_vahanx(rc_number: str) -> dict:
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http().get(url, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        with span('parse'):
+            soup = bs4.BeautifulSoup(response.text, 'html.parser')
     except requests.exceptions.RequestException as e:
         return {"error": f"Network error from vahanx.in: {e}"}
     except Exception as e:
@@ -215,13 +241,14 @@ def get_vehicle_details_vahanx(rc_number: str) -> dict:
     return filtered_data
 
 
+@traced
 def lookup_vehicle_info_api(vehicle_number):
     """Vehicle information lookup using vercel API (Source 1 / Primary)."""
     api_url = f'https://vahan-api.vercel.app/api/vehicle/{vehicle_number}'
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
     try:
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = http().get(api_url, headers=headers)
         response.raise_for_status()
         data = response.json()
 
@@ -246,133 +273,472 @@ def lookup_vehicle_info_api(vehicle_number):
     except Exception as e:
         return {"error": f"An unexpected error occurred: {str(e)}"}
 
-def concurrent_vehicle_osint(vehicle_number):
+def concurrent_vehicle_osint(vehicle_number, renderer=None):
     """Finds from oublic db (Source 1) and Vahan Scraper (leak) (Source 2) for a vehicle number."""
+    renderer = renderer or Renderer()
 
     # --- RUNNING SOURCE 1: VERCEL API ---
-    print(f"\n\n{Fore.CYAN}--- RUNNING SOURCE 1: OPEN-SOURCE LOOKUP (Primary) ---")
+    renderer.message("\n\n--- RUNNING SOURCE 1: OPEN-SOURCE LOOKUP (Primary) ---", Fore.CYAN)
     api_result = lookup_vehicle_info_api(vehicle_number)
-    print(format_dict_output(f"🚗 SOURCE 1: Vehicle Details for {vehicle_number}", api_result))
+    renderer.result(f"🚗 SOURCE 1: Vehicle Details for {vehicle_number}", api_result)
 
     # --- RUNNING SOURCE 2: VAHAN SCRAPER ---
-    print(f"\n\n{Fore.CYAN}--- RUNNING SOURCE 2: Vahan Scraper LEAKD DB (Fallback) ---")
+    renderer.message("\n\n--- RUNNING SOURCE 2: Vahan Scraper LEAKD DB (Fallback) ---", Fore.CYAN)
     scraper_result = get_vehicle_details_vahanx(vehicle_number)
-    print(format_dict_output(f"🚗 SOURCE 2: Vehicle Details for {vehicle_number}", scraper_result))
+    renderer.result(f"🚗 SOURCE 2: Vehicle Details for {vehicle_number}", scraper_result)
 
 # --- End New/Updated Vehicle Lookup Functions ---
 
 
-def lookup_ip_info(ip_address):
-    """Retrieve detailed geographical and network information for an IP address. (Source 1)"""
-    url = f"http://ip-api.com/json/{ip_address}?fields=status,message,country,countryCode,region,regionName,city,zip,lat,lon,timezone,isp,org,as,query"
+_ip_geo_index = None
 
-    try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
+def get_ip_geo_index():
+    """Opens the local IP range index once, if one has been built."""
+    global _ip_geo_index
+    if _ip_geo_index is None and os.path.exists(IP_GEO_INDEX_PATH):
+        from ip_geo import IPGeoIndex
+        try:
+            _ip_geo_index = IPGeoIndex(IP_GEO_INDEX_PATH)
+        except (OSError, ValueError) as e:
+            print(f"{Fore.RED}⚠️ Could not open local IP index: {e}")
+    return _ip_geo_index
+
+def _format_ip_record(data, backend):
+    """Maps ip-api.com style fields (remote or local index) to the displayed fields."""
+    region = data.get('regionName')
+    if data.get('region'):
+        region = f"{region} ({data.get('region')})"
+    return {
+        "IP Address": data.get("query"),
+        "Country": f"{data.get('country')} ({data.get('countryCode')})",
+        "Region/State": region,
+        "City": data.get("city"),
+        "Postal Code": data.get("zip"),
+        "Timezone": data.get("timezone"),
+        "ISP": data.get("isp"),
+        "Organization": data.get("org"),
+        "AS Number/Name": data.get("as"),
+        "Coordinates": f"Lat: {data.get('lat')}, Lon: {data.get('lon')}",
+        "Backend": backend,
+    }
 
-        if data.get("status") == "success":
-            return {
-                "IP Address": data.get("query"),
-                "Country": f"{data.get('country')} ({data.get('countryCode')})",
-                "Region/State": f"{data.get('regionName')} ({data.get('region')})",
-                "City": data.get("city"),
-                "Postal Code": data.get("zip"),
-                "Timezone": data.get("timezone"),
-                "ISP": data.get("isp"),
-                "Organization": data.get("org"),
-                "AS Number/Name": data.get("as"),
-                "Coordinates": f"Lat: {data.get('lat')}, Lon: {data.get('lon')}",
-            }
+_lookup_cache = None
+
+def get_lookup_cache():
+    """Returns the shared IP/IFSC response cache, or None when disabled."""
+    global _lookup_cache
+    if _lookup_cache is None and LOOKUP_CACHE_ENABLED:
+        from lookup_cache import LookupCache
+        _lookup_cache = LookupCache(LOOKUP_CACHE_PATH, LOOKUP_CACHE_TTLS,
+                                    refresh_workers=2 if LOOKUP_BACKGROUND_REFRESH else 0)
+    return _lookup_cache
+
+_tuning = None
+
+def get_tuning():
+    """Pool sizes for this machine (see system_info.py), or {} when tuning is disabled."""
+    global _tuning
+    if _tuning is None:
+        if TUNING_ENABLED:
+            import system_info
+            _tuning, _ = system_info.get_tuning(TUNING_PROFILE_PATH)
         else:
-            return f"IP lookup failed. Message: {data.get('message', 'Unknown error')}"
+            _tuning = {}
+    return _tuning
+
+# Appended to the "Backend" field of remote answers.
+CACHE_STATE_LABELS = {"miss": "", "fresh": " (cached)", "stale": " (cached, refreshing)"}
+
+def _cached_fetch(source, key, fetch):
+    """(value, not_found, cache state) for ``fetch(key)``, through the lookup cache when enabled."""
+    cache = get_lookup_cache()
+    if cache is None:
+        return fetch(key) + ("miss",)
+    return cache.fetch(source, key, lambda: fetch(key))
+
+def _fetch_ip_api(ip_address):
+    """ip-api.com answer: (record, False), or (message, True) when it refuses the address."""
+    url = f"http://ip-api.com/json/{ip_address}?fields=status,message,country,countryCode,region,regionName,city,zip,lat,lon,timezone,isp,org,as,query"
+    response = http().get(url)
+    response.raise_for_status()
+    data = response.json()
+    if data.get("status") == "success":
+        return data, False
+    return data.get('message', 'Unknown error'), True
+
+@traced
+def lookup_ip_info(ip_address, offline_only=False):
+    """Retrieve detailed geographical and network information for an IP address. (Source 1)
+
+    The local range index answers first when present; ip-api.com is only
+    queried when it has no covering range (never, with offline_only=True),
+    and its answers are served from the lookup cache until they expire.
+    """
+    index = get_ip_geo_index()
+    if index is not None:
+        with span('local index'):
+            record = index.get(ip_address)
+        if record is not None:
+            record["query"] = ip_address
+            return _format_ip_record(record, index.backend)
+    if offline_only:
+        return f"IP lookup failed. Message: {ip_address} is not covered by the local index"
 
+    try:
+        data, not_found, state = _cached_fetch("ip-api", ip_address.strip(), _fetch_ip_api)
     except requests.exceptions.RequestException as e:
         return f"❌ An error occurred during IP lookup: {str(e)}"
 
-def lookup_ifsc_info(ifsc_code):
-    """Retrieve bank and branch details for an IFSC code. (Source 1)"""
-    url = f"https://ifsc.razorpay.com/{ifsc_code}"
+    if not_found:
+        return f"IP lookup failed. Message: {data}"
+    return _format_ip_record(data, "ip-api.com" + CACHE_STATE_LABELS[state])
+
+def lookup_ip_multi(ip_address, deadline=None):
+    """Queries several IP providers concurrently and merges their answers. (Source 1)
+
+    Returns whatever arrived before the deadline, with per-source timings.
+    """
+    import ip_fanout
+
+    result = ip_fanout.lookup_ip_multi(ip_address, deadline=deadline or ip_fanout.DEFAULT_DEADLINE)
+    fields = dict(result["fields"], query=ip_address)
+    if not result["field_sources"]:
+        return f"IP lookup failed. Message: no provider answered within {deadline or ip_fanout.DEFAULT_DEADLINE}s"
+
+    details = _format_ip_record(fields, ", ".join(sorted(set(result["field_sources"].values()))))
+    for key, label in (("proxy", "Proxy"), ("vpn", "VPN"), ("tor", "Tor Exit Node"),
+                       ("mobile", "Mobile Network"), ("hosting", "Hosting Provider")):
+        if key in fields:
+            details[label] = "Yes" if fields[key] else "No"
+    if "fraud_score" in fields:
+        details["Fraud Score"] = fields["fraud_score"]
+    details["Sources"] = {
+        name: f"{info['status']} ({info['ms']} ms)" + (f" - {info['error']}" if info.get("error") else "")
+        for name, info in result["sources"].items()
+    }
+    details["Total Time"] = f"{result['elapsed_ms']} ms" + (" (partial)" if result["partial"] else "")
+    return details
+
+_ifsc_index = None
 
+def get_ifsc_index():
+    """Opens the offline IFSC index once, if one has been built."""
+    global _ifsc_index
+    if _ifsc_index is None and os.path.exists(IFSC_INDEX_PATH):
+        from ifsc_index import IFSCIndex
+        try:
+            _ifsc_index = IFSCIndex(IFSC_INDEX_PATH)
+        except (OSError, ValueError) as e:
+            print(f"{Fore.RED}⚠️ Could not open offline IFSC index: {e}")
+    return _ifsc_index
+
+def _format_ifsc_record(data):
+    """Maps a raw IFSC record (API or offline index) to the displayed fields."""
+    return {
+        "Bank Name": data.get("BANK"),
+        "Branch": data.get("BRANCH"),
+        "Address": data.get("ADDRESS"),
+        "City": data.get("CITY"),
+        "District": data.get("DISTRICT"),
+        "State": data.get("STATE"),
+        "IFSC Code": data.get("IFSC"),
+        "MICR Code": data.get("MICR"),
+        "Contact": data.get("CONTACT") or "N/A",
+        "UPI": "Enabled" if data.get("UPI") else "Disabled",
+    }
+
+def _fetch_ifsc(ifsc_code):
+    """Razorpay IFSC answer: (record, False), or (reason suffix, True) for an unknown code."""
     try:
-        response = requests.get(url, timeout=5)
+        response = http().get(f"https://ifsc.razorpay.com/{ifsc_code}")
         response.raise_for_status()
-        data = response.json()
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return " (HTTP 404)", True
+        raise
+    data = response.json()
+    if data.get("BANK"):
+        return data, False
+    return "", True
+
+@traced
+def lookup_ifsc_info(ifsc_code, offline_only=False):
+    """Retrieve bank and branch details for an IFSC code. (Source 1)
+
+    Answers from the offline index when it has the code and only goes to the
+    network (through the lookup cache) on a miss (never, with offline_only=True).
+    """
+    index = get_ifsc_index()
+    if index is not None:
+        with span('local index'):
+            record = index.get(ifsc_code)
+        if record is not None:
+            return _format_ifsc_record(record)
+    if offline_only:
+        return f"⚠️ IFSC code `{ifsc_code}` not found in the offline index."
 
-        if data.get("BANK"):
-            return {
-                "Bank Name": data.get("BANK"),
-                "Branch": data.get("BRANCH"),
-                "Address": data.get("ADDRESS"),
-                "City": data.get("CITY"),
-                "District": data.get("DISTRICT"),
-                "State": data.get("STATE"),
-                "IFSC Code": data.get("IFSC"),
-                "MICR Code": data.get("MICR"),
-                "Contact": data.get("CONTACT", "N/A"),
-                "UPI": "Enabled" if data.get("UPI") else "Disabled",
-            }
-        else:
-             return f"⚠️ IFSC code **`{ifsc_code}`** not found or is invalid."
+    try:
+        data, not_found, _ = _cached_fetch("ifsc", ifsc_code.strip().upper(), _fetch_ifsc)
+        if not_found and data:
+            return f"⚠️ IFSC code `{ifsc_code}` not found or is invalid{data}."
+        if not_found:
+            return f"⚠️ IFSC code **`{ifsc_code}`** not found or is invalid."
+        return _format_ifsc_record(data)
     except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
-             return f"⚠️ IFSC code `{ifsc_code}` not found or is invalid (HTTP 404)."
         return f"❌ HTTP Error during IFSC lookup: {e.response.status_code}"
     except requests.exceptions.RequestException as e:
         return f"❌ An error occurred during IFSC lookup: {str(e)}"
     except Exception as e:
         return f"❌ An unexpected error occurred: {str(e)}"
 
-def extract_exif_data(image_data):
-    """Extract EXIF metadata from image bytes using PIL and exifread. (Source 1)"""
-    if not PIL_AVAILABLE:
-        return "❌ Image processing dependencies (Pillow) are not available."
+_ifsc_search = None
 
+def get_ifsc_search():
+    """Opens the IFSC branch search index once, first syncing it with the offline IFSC index."""
+    global _ifsc_search
+    if _ifsc_search is None and os.path.exists(IFSC_INDEX_PATH):
+        import ifsc_search
+        try:
+            if not ifsc_search.is_current(IFSC_SEARCH_PATH, IFSC_INDEX_PATH):
+                print(f"{Fore.YELLOW}⏳ Updating the IFSC branch search index...", file=sys.stderr)
+                ifsc_search.sync(IFSC_INDEX_PATH, IFSC_SEARCH_PATH)
+            _ifsc_search = ifsc_search.IFSCSearch(IFSC_SEARCH_PATH)
+        except (OSError, ValueError) as e:
+            print(f"{Fore.RED}⚠️ Could not open the IFSC branch search index: {e}")
+    return _ifsc_search
+
+@traced
+def search_ifsc_branches(query, limit=10):
+    """Ranked branches matching a bank / branch / city / district / MICR query. (Source 1)
+
+    Runs entirely on the offline IFSC data; words may be prefixes or contain
+    a typo, and ``field:word`` (bank:, branch:, city:, district:, micr:,
+    ifsc:) restricts a word to one field.
+    """
+    search = get_ifsc_search()
+    index = get_ifsc_index()
+    if search is None or index is None:
+        return "⚠️ Branch search needs the offline IFSC index, which was not found (build it with scripts/ifsc_index.py)."
+    with span('search'):
+        hits = search.search(query, limit)
+    if not hits:
+        return f"⚠️ No branches found for `{query}`."
     results = {}
-    try:
-        f = io.BytesIO(image_data)
-        tags = exifread.process_file(f, details=False, strict=False)
+    for rank, (code, score) in enumerate(hits, 1):
+        record = index.get(code) or {}
+        results[f"{rank}. {code}"] = {
+            "Bank": record.get("BANK"),
+            "Branch": record.get("BRANCH"),
+            "City": record.get("CITY"),
+            "District": record.get("DISTRICT"),
+            "State": record.get("STATE"),
+            "MICR": record.get("MICR"),
+            "Score": round(score, 2),
+        }
+    return results
+
+_image_cache = None
+
+def get_image_cache():
+    """Returns the shared image result cache, or None when disabled."""
+    global _image_cache
+    if _image_cache is None and IMAGE_CACHE_ENABLED:
+        from image_cache import ImageResultCache
+        _image_cache = ImageResultCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
+    return _image_cache
+
+_near_dup_index = None
+
+def get_near_dup_index():
+    """Returns the shared near-duplicate OCR index, or None when NEAR_DUP_MODE is "off"."""
+    global _near_dup_index
+    if _near_dup_index is None and NEAR_DUP_MODE != "off":
+        from near_dup import NearDuplicateIndex
+        _near_dup_index = NearDuplicateIndex(NEAR_DUP_INDEX_PATH, OCR_CACHE_CONFIG, reuse=NEAR_DUP_MODE == "reuse")
+    return _near_dup_index
+
+def near_dup_note(info):
+    """One line describing a near-duplicate match filled in by ocr_image_text, or None."""
+    if not info:
+        return None
+    if info["reused"]:
+        return (f"♻ Near-duplicate of {info['of']} (pHash distance {info['distance']}): "
+                f"reused its OCR text, {info['saved_ms']:.0f} ms of Tesseract saved")
+    return f"≈ Resembles {info['of']} (pHash distance {info['distance']}); OCR'd on its own"
+
+def _cache_key(source, digest, config):
+    """Cache key for an image source (hashing it unless the digest is known)."""
+    from image_cache import ImageResultCache
+    return ImageResultCache.key(digest or source.digest(), config)
+
+@traced
+def extract_exif_data(image_data, digest=None):
+    """Extract EXIF metadata from image bytes or an ImageSource using PIL and exifread. (Source 1)"""
+    if not pil_available():
+        return "❌ Image processing dependencies (Pillow) are not available."
 
-        for tag_name, tag_value in tags.items():
-            if 'Thumbnail' not in tag_name:
-                results[tag_name] = str(tag_value)
+    from image_cache import ImageResultCache
+    from image_source import as_image_source
+    source = as_image_source(image_data)
+    cache = get_image_cache()
+    with span('cache'):
+        # EXIF sits in the header (or the trailer, for some TIFFs): key on those
+        # rather than reading a large file end to end just to hash it.
+        key = ImageResultCache.key(digest or source.header_digest(), EXIF_CACHE_CONFIG) if cache else None
+        results = cache.get(key) if cache else None
+
+    if results is None:
+        results = {}
+        try:
+            # exifread seeks through the header segments only; no full copy
+            with span('exifread'):
+                tags = exifread.process_file(source.file(), details=False, strict=False)
 
-    except Exception as e:
-        results['Exif_Error'] = f"Exif extraction failed: {e}"
+            for tag_name, tag_value in tags.items():
+                if 'Thumbnail' not in tag_name:
+                    results[tag_name] = str(tag_value)
+
+        except Exception as e:
+            results['Exif_Error'] = f"Exif extraction failed: {e}"
+
+        if cache and 'Exif_Error' not in results:
+            cache.put(key, results)
 
     if not results or (len(results) == 1 and 'Exif_Error' in results):
           return "ℹNo metadata found in the image."
 
     return results
 
-def extract_text_from_image(image_data):
+def decode_image_gray(image_data):
+    """Decodes image bytes or an ImageSource straight to grayscale; None if undecodable.
+
+    Images above OCR_MAX_DECODE_PIXELS are decoded at reduced resolution.
+    """
+    from image_source import as_image_source
+    return as_image_source(image_data).decode(gray=True, max_pixels=OCR_MAX_DECODE_PIXELS)
+
+def _use_tiled_ocr(gray):
+    if OCR_TILED == "always":
+        return True
+    if OCR_TILED == "never":
+        return False
+    return gray.shape[0] > OCR_TILE_MIN_HEIGHT or gray.size > OCR_TILE_MIN_PIXELS
+
+_ocr_engine = None
+
+def get_ocr_engine():
+    """The OCR engine module (in-process Tesseract or pytesseract), configured on first use."""
+    global _ocr_engine
+    if _ocr_engine is None:
+        import ocr_engine
+        ocr_engine.configure(OCR_ENGINE, tesseract_cmd=TESSERACT_CMD, tessdata=TESSDATA_DIR)
+        ocr_engine.backend()  # resolve now: tesserocr has to be imported on the main thread
+        _ocr_engine = ocr_engine
+    return _ocr_engine
+
+def ocr_gray(gray):
+    """Runs Tesseract on a grayscale array, retrying with --psm 6 if the first pass is empty."""
+    engine = get_ocr_engine()
+    if _use_tiled_ocr(gray):
+        from ocr_tiles import ocr_tiled
+        workers = get_tuning().get("ocr_workers")
+        text = ocr_tiled(gray, workers=workers)
+        if not text.strip():
+            text = ocr_tiled(gray, config='--psm 6', workers=workers)
+        return text.strip()
+
+    text = engine.image_to_string(gray, lang='eng')
+
+    if not text.strip():
+        text = engine.image_to_string(gray, lang='eng', config='--psm 6')
+
+    return text.strip()
+
+def ocr_image_text(image_data, digest=None, timings=None, near_dup=None):
+    """Decode + OCR with the result cache; returns the text, or None if undecodable.
+
+    Stage durations (decode, phash, ocr) are added to ``timings`` when a dict is
+    given. An image resembling one OCR'd before is reported from the
+    near-duplicate index (and, with NEAR_DUP_MODE "reuse", a verified
+    re-encode is answered with the stored text); the match (of, sha256,
+    distance, reused, saved_ms) is written to ``near_dup`` when a dict is given.
+    """
+    from image_source import as_image_source
+    source = as_image_source(image_data)
+    cache = get_image_cache()
+    key = None
+    if cache:
+        with span('cache'):
+            key = _cache_key(source, digest, OCR_CACHE_CONFIG)
+            text = cache.get(key)
+        if text is not None:
+            return text
+
+    t = time.perf_counter()
+    with span('decode'):
+        gray = decode_image_gray(source)
+    if timings is not None:
+        timings['decode'] = time.perf_counter() - t
+    if gray is None:
+        return None
+
+    index = get_near_dup_index()
+    if index:
+        from near_dup import fingerprint
+        t = time.perf_counter()
+        with span('phash'):
+            fp = fingerprint(gray, reference=index.reuse)
+            match = index.lookup(fp)
+        if timings is not None:
+            timings['phash'] = time.perf_counter() - t
+        if match is not None:
+            if near_dup is not None:
+                near_dup.update(of=match.name or match.digest[:12], sha256=match.digest,
+                                distance=match.distance, reused=match.reusable)
+                if match.reusable:
+                    near_dup["saved_ms"] = round(match.ocr_ms, 1)
+            if match.reusable:
+                # Not stored in the result cache: that is keyed by this image's
+                # own content, and the text was read from another image.
+                return match.text
+
+    t = time.perf_counter()
+    with span('ocr'):
+        text = ocr_gray(gray)
+    ocr_s = time.perf_counter() - t
+    if timings is not None:
+        timings['ocr'] = ocr_s
+
+    if cache:
+        cache.put(key, text)
+    if index:
+        index.add(digest or source.digest(), fp, text, ocr_s * 1000, name=source.name)
+    return text
+
+@traced
+def extract_text_from_image(image_data, digest=None, near_dup=None):
     """Extract text from image bytes using OpenCV and Tesseract. (Source 1)"""
     try:
-        nparr = np.frombuffer(image_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        text = ocr_image_text(image_data, digest, near_dup=near_dup)
 
-        if img is None:
+        if text is None:
             return "❌ Could not decode image data."
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        text = pytesseract.image_to_string(gray, lang='eng')
-
-        if not text.strip():
-            text = pytesseract.image_to_string(gray, lang='eng', config='--psm 6')
-
-        if not text.strip():
+        if not text:
             return "⚠️ No readable text found in the image."
 
-        return text.strip()
+        return text
 
     except Exception as e:
         return f"❌ An error occurred during OCR: {str(e)}"
 
-def generate_report(query):
+@traced
+def generate_report(query, renderer=None):
     """
     Queries the Leak Database for information based on the input query. (Source 2)
     This function will automatically prefix a 10-12 digit number with +91.
     """
+    renderer = renderer or Renderer()
     processed_query = query.strip()
 
     if re.match(r'^\+?\d{10,12}$', processed_query):
@@ -391,51 +757,47 @@ def generate_report(query):
     }
 
     try:
-        print(f"\n{Fore.YELLOW}[ Retriving Data (database 2) for '{search_target_display}' ]")
+        renderer.message(f"\n[ Retriving Data (database 2) for '{search_target_display}' ]", Fore.YELLOW)
 
-        response = requests.post(URL, json=data, timeout=20).json()
+        response = http().post(URL, json=data)
+        with span('parse'):
+            response = response.json()
 
         if "Error code" in response:
-            print(f"{Fore.RED}\n🚫 API Error: {response['Error code']}")
+            renderer.message(f"\n🚫 API Error: {response['Error code']}", Fore.RED)
             return
 
         if "List" not in response:
-             print(f"{Fore.RED}\n🚫 API Error: Unexpected response format from API.")
+             renderer.message("\n🚫 API Error: Unexpected response format from API.", Fore.RED)
              return
 
-        results_found = False
+        # Collect every database first and render the whole report in one go.
+        databases = []
         for db in response["List"].keys():
             if db.lower() == "no results found":
                 continue
-
-            results_found = True
             db_title = "STARK (1WIN)" if db.lower() == "1win" else db
-            db_name = f"\n=== [ SOURCE 2: LEAK DATABASE: {db_title} ] ===\n"
-            type_effect(f"{Fore.LIGHTRED_EX}{db_name}")
+            databases.append((db_title, response["List"][db]["Data"]))
 
-            for entry in response["List"][db]["Data"]:
-                formatted = format_as_js(entry)
-                print_colored(formatted)
-
-        if not results_found:
-            type_effect(f"\n{Fore.GREEN}✅ SOURCE 2: No leaked data found for '{search_target_display}'.")
+        renderer.leak_report(search_target_display, databases)
 
     except requests.exceptions.RequestException as e:
-        print(f"{Fore.RED}\n❌ API CONNECTION ERROR: {e}")
+        renderer.message(f"\n❌ API CONNECTION ERROR: {e}", Fore.RED)
     except Exception as e:
-        print(f"{Fore.RED}\n❌ An unexpected error occurred in Source 2: {e}")
+        renderer.message(f"\n❌ An unexpected error occurred in Source 2: {e}", Fore.RED)
 
-def concurrent_number_osint(phone_number_in):
+def concurrent_number_osint(phone_number_in, renderer=None):
     """Runs Source 1 (Trace) and Source 2 (Leak) for a phone number concurrently."""
+    renderer = renderer or Renderer()
 
     # --- RUNNING SOURCE 1: CALL TRACE ---
-    print(f"\n\n{Fore.CYAN}--- RUNNING SOURCE 1: CALL TRACE ---")
+    renderer.message("\n\n--- RUNNING SOURCE 1: CALL TRACE ---", Fore.CYAN)
     trace_result = trace_number(phone_number_in)
-    print(format_dict_output(f"📞 SOURCE 1: Number Trace Results for {phone_number_in}", trace_result))
+    renderer.result(f"📞 SOURCE 1: Number Trace Results for {phone_number_in}", trace_result)
 
     # --- RUNNING SOURCE 2: LEAK CHECK ---
-    print(f"\n\n{Fore.CYAN}--- RUNNING SOURCE 2: LEAK CHECK ---")
-    generate_report(phone_number_in)
+    renderer.message("\n\n--- RUNNING SOURCE 2: LEAK CHECK ---", Fore.CYAN)
+    generate_report(phone_number_in, renderer)
 
 def post_search_menu():
     """Asks the user to re-search or exit."""
@@ -477,7 +839,7 @@ def display_menu():
     (e.g., 9876543210 without +91 )
 {Fore.CYAN}[{Fore.WHITE}2{Fore.CYAN}] Concurrent Vehicle Info (API & Scraper) 🔥
 {Fore.CYAN}[{Fore.WHITE}3{Fore.CYAN}] Lookup IP Address (Source 1 only)
-{Fore.CYAN}[{Fore.WHITE}4{Fore.CYAN}] Lookup IFSC Code (Source 1 only)
+{Fore.CYAN}[{Fore.WHITE}4{Fore.CYAN}] Lookup IFSC Code / Search Branches (Source 1 only)
 {Fore.CYAN}[{Fore.WHITE}5{Fore.CYAN}] Analyze Image (Source 1 only)
 {Fore.GREEN}
 --- SOURCE 2: LEAKED DATABASE ---
@@ -488,8 +850,9 @@ def display_menu():
 """
     print(menu)
 
-def run_cli():
+def run_cli(renderer=None):
     """The main loop for the command-line interface."""
+    renderer = renderer or Renderer()
     while True:
         display_menu()
         choice = input(f"{Fore.MAGENTA}Enter your choice (1-7): {Style.RESET_ALL}").strip()
@@ -500,14 +863,14 @@ def run_cli():
                 if not re.match(r'^\+?\d{10,14}$', param.replace(' ', '')):
                     print(f"{Fore.RED}⚠️ Invalid format. Use a 10-digit number, optionally with +91.")
                     continue
-                concurrent_number_osint(param)
+                concurrent_number_osint(param, renderer)
 
             elif choice == '2':
                 param = input(f"{Fore.LIGHTGREEN_EX}Enter Vehicle Number (e.g., MH12AB1234): {Style.RESET_ALL}").strip().upper()
                 if not re.match(r'^[A-Z]{2}[0-9]{1,2}[A-Z]{0,2}[0-9]{4}$', param):
                     print(f"{Fore.RED}⚠️ Invalid format. Check the vehicle number format.")
                     continue
-                concurrent_vehicle_osint(param)
+                concurrent_vehicle_osint(param, renderer)
 
             elif choice == '3':
                 param = input(f"{Fore.LIGHTGREEN_EX}Enter IP Address (e.g., 1.1.1.1): {Style.RESET_ALL}").strip()
@@ -515,26 +878,43 @@ def run_cli():
                     print(f"{Fore.RED}⚠️ Invalid IP address format.")
                     continue
                 result = lookup_ip_info(param)
-                print(format_dict_output(f"🌐 SOURCE 1: IP Details for {param}", result))
+                renderer.result(f"🌐 SOURCE 1: IP Details for {param}", result)
 
             elif choice == '4':
-                param = input(f"{Fore.LIGHTGREEN_EX}Enter IFSC Code (e.g., HDFC0000001): {Style.RESET_ALL}").strip().upper()
-                if not re.match(r'^[A-Z]{4}0[A-Z0-9]{6}$', param):
+                param = input(f"{Fore.LIGHTGREEN_EX}Enter IFSC Code (e.g., HDFC0000001) or bank/branch/city to search: {Style.RESET_ALL}").strip()
+                if re.match(r'^[A-Z]{4}0[A-Z0-9]{6}$', param.upper()):
+                    param = param.upper()
+                    result = lookup_ifsc_info(param)
+                    renderer.result(f"🏦 SOURCE 1: IFSC Details for {param}", result)
+                elif get_ifsc_search() is not None and param:
+                    renderer.result(f"🏦 SOURCE 1: Branches matching '{param}'", search_ifsc_branches(param))
+                else:
                     print(f"{Fore.RED}⚠️ Invalid IFSC code format (e.g., HDFC0000001).")
                     continue
-                result = lookup_ifsc_info(param)
-                print(format_dict_output(f"🏦 SOURCE 1: IFSC Details for {param}", result))
 
             elif choice == '5':
                 # *** MODIFIED FOR TERMINAL USE ***
                 file_name, image_data = handle_terminal_image_upload()
                 if image_data:
                     exif_results = extract_exif_data(image_data)
-                    print(format_dict_output(f"🖼 SOURCE 1: EXIF / Metadata for {file_name}", exif_results))
-                    ocr_text = extract_text_from_image(image_data)
+                    renderer.result(f"🖼 SOURCE 1: EXIF / Metadata for {file_name}", exif_results)
+                    match = {}
+                    ocr_text = extract_text_from_image(image_data, near_dup=match)
                     print(f"\n{Fore.CYAN}📄 SOURCE 1: OCR / Text Extraction for {file_name}\n" + "=" * 40 + "\n")
                     print(f"{Fore.WHITE}{ocr_text}{Style.RESET_ALL}")
                     print(f"{Fore.CYAN}{'=' * 40}{Style.RESET_ALL}")
+                    image_data.close()
+                    if match:
+                        print(f"{Fore.LIGHTBLACK_EX}{near_dup_note(match)}{Style.RESET_ALL}")
+                    cache = get_image_cache()
+                    if cache:
+                        stats = cache.stats()
+                        print(f"{Fore.LIGHTBLACK_EX}Image cache: {stats['hits']} hits / {stats['misses']} misses this session{Style.RESET_ALL}")
+                    index = get_near_dup_index()
+                    if index and index.reused:
+                        stats = index.stats()
+                        print(f"{Fore.LIGHTBLACK_EX}Near-duplicates: {stats['ocr_reused']} OCR results reused, "
+                              f"{stats['ocr_saved_s']} s of Tesseract saved this session{Style.RESET_ALL}")
 
             elif choice == '6':
                 print(f"{Fore.BLUE}\n[+] Send Your Target Query (email, phone, username, etc.):")
@@ -542,7 +922,7 @@ def run_cli():
                 if not target:
                     print(f"{Fore.RED}❌ Target cannot be empty.")
                     continue
-                generate_report(target)
+                generate_report(target, renderer)
 
             elif choice == '7':
                 print(f"{Fore.YELLOW}Exiting CLI. Goodbye! 👋")
@@ -568,6 +948,294 @@ def run_cli():
             continue
 
 
-# STEP 6: EXECUTION
+# -----------------------------------------------
+# STEP 6: NON-INTERACTIVE MODES
+# -----------------------------------------------
+
+def make_renderer(args):
+    """Renderer for the global --format / --no-animation options."""
+    return Renderer(args.format, animate=False if args.no_animation else None)
+
+def run_lookup(args):
+    """One-shot phone / vehicle / IP / IFSC / leak lookup, rendered in --format."""
+    renderer = make_renderer(args)
+    query = args.query.strip()
+    if args.command == 'phone':
+        concurrent_number_osint(query, renderer)
+    elif args.command == 'vehicle':
+        concurrent_vehicle_osint(query.upper(), renderer)
+    elif args.command == 'ip':
+        renderer.result(f"🌐 SOURCE 1: IP Details for {query}", lookup_ip_info(query, offline_only=args.offline))
+    elif args.command == 'ifsc':
+        query = query.upper()
+        renderer.result(f"🏦 SOURCE 1: IFSC Details for {query}", lookup_ifsc_info(query, offline_only=args.offline))
+    else:
+        generate_report(query, renderer)
+
+def run_ifsc_search(args):
+    """Ranked branch search over the offline IFSC data."""
+    make_renderer(args).result(f"🏦 SOURCE 1: Branches matching '{args.query}'",
+                               search_ifsc_branches(args.query, limit=args.limit))
+
+def run_image(args):
+    """EXIF + OCR for a single image file, rendered in --format."""
+    from image_source import ImageSource
+
+    renderer = make_renderer(args)
+    with ImageSource.open(args.path) as source:
+        renderer.result(f"🖼 SOURCE 1: EXIF / Metadata for {source.name}", extract_exif_data(source))
+        if not args.no_ocr:
+            match = {}
+            renderer.result(f"📄 SOURCE 1: OCR / Text Extraction for {source.name}",
+                            extract_text_from_image(source, near_dup=match))
+            if match:
+                renderer.message(near_dup_note(match), Fore.LIGHTBLACK_EX)
+
+def run_bulk_ip(args):
+    """Enriches every IP found in a log file (or stdin) and writes NDJSON."""
+    global LOOKUP_BACKGROUND_REFRESH
+    import bulk_ip
+    LOOKUP_BACKGROUND_REFRESH = True
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', errors='replace')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        stats = bulk_ip.enrich(
+            source, out,
+            endpoint=args.endpoint,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            local_index=None if args.remote_only else get_ip_geo_index(),
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    bulk_ip.print_summary(stats)
+
+def run_ip_multi(args):
+    """Multi-provider lookup for one IP, printed as a table or JSON."""
+    if args.json:
+        import ip_fanout
+        print(json.dumps(ip_fanout.lookup_ip_multi(args.ip, deadline=args.deadline), indent=2, ensure_ascii=False))
+        return
+    result = lookup_ip_multi(args.ip, deadline=args.deadline)
+    make_renderer(args).result(f"🌐 SOURCE 1: Multi-Source IP Details for {args.ip}", result)
+
+def run_batch_images(args):
+    """EXIF + OCR for every image under a directory, streamed as NDJSON."""
+    import image_batch
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        stats = image_batch.run_batch(args.directory, out, workers=args.workers or get_tuning().get("batch_workers"),
+                                      exif=not args.no_exif, ocr=not args.no_ocr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    image_batch.print_summary(stats)
+
+def run_image_cache(args):
+    """Shows (or clears) the on-disk image analysis cache."""
+    cache = get_image_cache()
+    if cache is None:
+        print(f"{Fore.YELLOW}Image cache is disabled (STARK_IMAGE_CACHE=0).")
+        return
+    if args.clear:
+        cache.clear()
+        print(f"{Fore.GREEN}✅ Image cache cleared.")
+    make_renderer(args).result(f"🗄 Image Cache ({IMAGE_CACHE_DIR})", cache.stats(disk=True))
+
+def run_near_dup(args):
+    """Shows (or clears) the near-duplicate OCR index."""
+    index = get_near_dup_index()
+    if index is None:
+        print(f"{Fore.YELLOW}Near-duplicate index is disabled (STARK_NEAR_DUP=off).")
+        return
+    if args.clear:
+        index.clear()
+        print(f"{Fore.GREEN}✅ Near-duplicate index cleared.")
+    make_renderer(args).result(f"🗄 Near-Duplicate Index ({NEAR_DUP_INDEX_PATH}, mode {NEAR_DUP_MODE})",
+                               index.stats(disk=True))
+
+def run_lookup_cache(args):
+    """Shows, purges or clears the IP/IFSC lookup cache."""
+    cache = get_lookup_cache()
+    if cache is None:
+        print(f"{Fore.YELLOW}Lookup cache is disabled (STARK_LOOKUP_CACHE=0).")
+        return
+    if args.clear:
+        cache.clear()
+        print(f"{Fore.GREEN}✅ Lookup cache cleared.")
+    elif args.purge:
+        print(f"{Fore.GREEN}✅ Purged {cache.purge()} expired entries.")
+    make_renderer(args).result(f"🗄 Lookup Cache ({LOOKUP_CACHE_PATH})", cache.stats(disk=True))
+
+def run_serve(args):
+    """Serves the IP/IFSC/image lookups over HTTP/JSON until interrupted."""
+    global LOOKUP_BACKGROUND_REFRESH
+    import service
+    LOOKUP_BACKGROUND_REFRESH = True
+    tuning = get_tuning()
+    if args.per_host_limit:
+        http().per_host_limit = args.per_host_limit
+    if "http_pool_size" in tuning:
+        http().pool_size = tuning["http_pool_size"]
+    ocr_workers, ocr_queue = args.ocr_workers, args.ocr_queue
+    if ocr_workers is None:
+        ocr_workers = tuning.get("ocr_workers")
+        if ocr_queue is None:
+            ocr_queue = tuning.get("ocr_queue")
+    service.run(sys.modules[__name__], host=args.host, port=args.port,
+                io_workers=args.io_workers or tuning.get("io_workers", service.DEFAULT_IO_WORKERS),
+                ocr_workers=ocr_workers, ocr_queue=ocr_queue)
+
+def run_tune(args):
+    """Shows the hardware profile and the pool sizes it gives, optionally re-measuring first."""
+    global _tuning
+    import system_info
+    if args.probe:
+        print(f"{Fore.YELLOW}⏳ Measuring CPUs, memory, disk and OCR throughput...")
+        measured = system_info.probe(DATA_DIR, ocr=not args.no_ocr)
+        system_info.write_profile(TUNING_PROFILE_PATH, measured)
+        _tuning = None
+    profile = system_info.load_profile(TUNING_PROFILE_PATH)
+    tuning, source = system_info.get_tuning(TUNING_PROFILE_PATH)
+    result = {"Source": source}
+    if profile is not None:
+        result["Measured"] = profile["created"]
+        for section, values in profile["probe"].items():
+            if values:
+                result[section.upper() if section in ("cpu", "ocr") else section.title()] = values
+    result["Tuning"] = tuning if TUNING_ENABLED else "disabled (STARK_TUNING=0)"
+    make_renderer(args).result("⚙ Tuning Profile", result)
+
+def build_arg_parser():
+    """Command-line options; with no subcommand the interactive menu runs."""
+    import argparse
+    import bulk_ip
+
+    parser = argparse.ArgumentParser(description="STARK OSINT CLI. Run without arguments for the interactive menu.")
+    parser.add_argument('--format', choices=FORMATS, default='pretty',
+                        help='output format for lookup results (default: pretty)')
+    parser.add_argument('--no-animation', action='store_true',
+                        help='print results at once instead of typing them out (also: STARK_NO_ANIMATION=1)')
+    parser.add_argument('--profile', action='store_true',
+                        help='time every stage (HTTP connect/wait/download, parsing, decode, OCR, rendering) '
+                             'and print the breakdown to stderr on exit')
+    parser.add_argument('--profile-out', metavar='FILE',
+                        help='also run under cProfile and save the stats (view with snakeviz or pstats)')
+    parser.add_argument('--folded', metavar='FILE',
+                        help='also write the stage timings as folded stacks (flamegraph.pl, speedscope)')
+    sub = parser.add_subparsers(dest='command')
+
+    for name, help_text in (('phone', 'trace a phone number and check the leak database'),
+                            ('vehicle', 'look up a vehicle registration number'),
+                            ('ip', 'look up an IP address'),
+                            ('ifsc', 'look up an IFSC code'),
+                            ('leaks', 'search the leak database (email, phone, username, ...)')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('query')
+        if name in ('ip', 'ifsc'):
+            p.add_argument('--offline', action='store_true', help='only use the local index')
+        p.set_defaults(handler=run_lookup)
+
+    p = sub.add_parser('ifsc-search', help='find branches by bank, branch, city, district or MICR (offline)')
+    p.add_argument('query', help="e.g. 'hdfc andheri mumbai' or 'bank:sbi city:pune'")
+    p.add_argument('--limit', type=int, default=10, help='number of branches to show (default: 10)')
+    p.set_defaults(handler=run_ifsc_search)
+
+    p = sub.add_parser('image', help='EXIF + OCR for one image file')
+    p.add_argument('path')
+    p.add_argument('--no-ocr', action='store_true', help='skip decoding and OCR')
+    p.set_defaults(handler=run_image)
+
+    p = sub.add_parser('bulk-ip', help='enrich IPs from a log file or stdin, writing NDJSON')
+    p.add_argument('input', nargs='?', default='-', help="log file to read (default: '-' for stdin)")
+    p.add_argument('-o', '--output', default='-', help="NDJSON output file (default: stdout)")
+    p.add_argument('--endpoint', default=bulk_ip.IP_API_BATCH_URL, help='ip-api style batch endpoint')
+    p.add_argument('--batch-size', type=int, default=bulk_ip.MAX_BATCH_SIZE, help='IPs per batch request (max 100)')
+    p.add_argument('--concurrency', type=int, default=4, help='batch requests in flight')
+    p.add_argument('--remote-only', action='store_true', help='skip the local IP range index')
+    p.set_defaults(handler=run_bulk_ip)
+
+    p = sub.add_parser('ip-multi', help='query several IP providers at once with a deadline')
+    p.add_argument('ip')
+    p.add_argument('--deadline', type=float, default=3.0, help='overall deadline in seconds (default: 3)')
+    p.add_argument('--json', action='store_true', help='print the raw merged result as JSON')
+    p.set_defaults(handler=run_ip_multi)
+
+    p = sub.add_parser('batch-images', help='EXIF + OCR for a directory of images, as NDJSON')
+    p.add_argument('directory')
+    p.add_argument('-o', '--output', default='-', help="NDJSON output file (default: stdout)")
+    p.add_argument('--workers', type=int, help='worker processes (default: from the tuning profile)')
+    p.add_argument('--no-exif', action='store_true', help='skip EXIF extraction')
+    p.add_argument('--no-ocr', action='store_true', help='skip decoding and OCR')
+    p.set_defaults(handler=run_batch_images)
+
+    p = sub.add_parser('serve', help='run the HTTP/JSON lookup service (IP, IFSC, image analysis)')
+    p.add_argument('--host', default='127.0.0.1', help='bind address (default: 127.0.0.1)')
+    p.add_argument('--port', type=int, default=8787, help='port (default: 8787)')
+    p.add_argument('--io-workers', type=int, help='threads for network/index lookups (default: from the tuning profile)')
+    p.add_argument('--ocr-workers', type=int, help='threads for decode + OCR (default: from the tuning profile)')
+    p.add_argument('--ocr-queue', type=int, help='OCR jobs allowed to wait before answering 503 (default: = workers)')
+    p.add_argument('--per-host-limit', type=int, help='concurrent upstream requests per API host (default: 4)')
+    p.set_defaults(handler=run_serve)
+
+    p = sub.add_parser('image-cache', help='show or clear the image analysis cache')
+    p.add_argument('--clear', action='store_true', help='delete all cached results')
+    p.set_defaults(handler=run_image_cache)
+
+    p = sub.add_parser('near-dup', help='show or clear the near-duplicate OCR index')
+    p.add_argument('--clear', action='store_true', help='delete all indexed images')
+    p.set_defaults(handler=run_near_dup)
+
+    p = sub.add_parser('lookup-cache', help='show, purge or clear the IP/IFSC lookup cache')
+    p.add_argument('--purge', action='store_true', help='delete entries past their stale window')
+    p.add_argument('--clear', action='store_true', help='delete all cached answers')
+    p.set_defaults(handler=run_lookup_cache)
+
+    p = sub.add_parser('tune', help='show the hardware tuning profile used to size pools')
+    p.add_argument('--probe', action='store_true', help=f'measure this machine and rewrite {TUNING_PROFILE_PATH}')
+    p.add_argument('--no-ocr', action='store_true', help='with --probe: skip the cv2/Tesseract benchmark')
+    p.set_defaults(handler=run_tune)
+    return parser
+
+def print_profile(args, profiler=None):
+    """Per-stage breakdown to stderr, plus the optional cProfile / folded-stack dumps."""
+    sys.stderr.write(f"\n{Fore.CYAN}⏱ Stage breakdown (wall time; self = excluding child stages){Style.RESET_ALL}\n")
+    sys.stderr.write(spans.report() + "\n")
+    if profiler is not None:
+        profiler.dump_stats(args.profile_out)
+        sys.stderr.write(f"cProfile stats written to {args.profile_out}\n")
+    if args.folded:
+        spans.write_folded(args.folded)
+        sys.stderr.write(f"Folded stacks written to {args.folded}\n")
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    profiling = args.profile or args.profile_out or args.folded
+    profiler = None
+    if profiling:
+        spans.enable()
+        if args.profile_out:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+    try:
+        if args.command is None:
+            print(f"{Fore.GREEN}✅ Setup Complete. Starting CLI...")
+            run_cli(make_renderer(args))
+        else:
+            args.handler(args)
+    finally:
+        if profiling:
+            if profiler is not None:
+                profiler.disable()
+            print_profile(args, profiler)
+
+
+# STEP 7: EXECUTION
 if __name__ == '__main__':
-    run_cli()
+    main()
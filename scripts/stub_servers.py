@@ -0,0 +1,327 @@
+"""Local stand-ins for the third-party services starkosint.py talks to.
+
+Each stub runs a ThreadingHTTPServer on 127.0.0.1 in a background thread and
+answers with deterministic data, so lookups can be exercised and benchmarked
+without network access or rate limits. Responses for the IFSC, scraped HTML
+and leak APIs are replayed from the recorded pages in fixtures/, with the
+per-query values filled in from a hash of the query.
+
+HOSTS maps every real service host to its stub; point the shared transport at
+running stubs with STARK_HTTP_ROUTES (see transport.py) or Transport.route().
+
+    python scripts/stub_servers.py ip-api --port 8765
+    python scripts/starkosint.py bulk-ip access.log --endpoint http://127.0.0.1:8765/batch
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+COUNTRIES = [
+    ("India", "IN", "MH", "Maharashtra", "Mumbai", "400001", 19.07, 72.87, "Asia/Kolkata"),
+    ("United States", "US", "CA", "California", "San Jose", "95112", 37.33, -121.89, "America/Los_Angeles"),
+    ("Germany", "DE", "HE", "Hesse", "Frankfurt am Main", "60313", 50.11, 8.68, "Europe/Berlin"),
+    ("Singapore", "SG", "01", "Central Singapore", "Singapore", "018989", 1.29, 103.85, "Asia/Singapore"),
+]
+
+
+def fake_ip_record(ip):
+    """Returns a stable ip-api.com style success record for ``ip``."""
+    digest = hashlib.sha1(ip.encode()).digest()
+    country, code, region, region_name, city, zip_code, lat, lon, tz = COUNTRIES[digest[0] % len(COUNTRIES)]
+    asn = 1000 + int.from_bytes(digest[1:3], 'big')
+    return {
+        "status": "success", "country": country, "countryCode": code, "region": region,
+        "regionName": region_name, "city": city, "zip": zip_code, "lat": lat, "lon": lon,
+        "timezone": tz, "isp": f"Stub ISP {asn}", "org": f"Stub Org {asn}",
+        "as": f"AS{asn} Stub Networks", "query": ip,
+    }
+
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Sneha", "Vikram", "Ananya", "Karan", "Meera"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Singh", "Gupta", "Nair", "Das"]
+MODELS = ["MARUTI SWIFT VXI", "HYUNDAI CRETA SX", "HONDA CITY ZX", "TATA NEXON XZ+"]
+OPERATORS = ["Airtel", "Jio", "Vi", "BSNL"]
+
+
+def fake_person(query):
+    """Stable template values (name, address, ...) derived from ``query``."""
+    digest = hashlib.sha1(query.encode()).digest()
+    first = FIRST_NAMES[digest[0] % len(FIRST_NAMES)]
+    last = LAST_NAMES[digest[1] % len(LAST_NAMES)]
+    _, _, _, state, city, zip_code, _, _, _ = COUNTRIES[0]
+    serial = int.from_bytes(digest[2:6], "big")
+    return {
+        "query": query, "number": query, "rc": query,
+        "owner": f"{first} {last}".upper(), "father": f"{FIRST_NAMES[digest[6] % len(FIRST_NAMES)]} {last}".upper(),
+        "nick": f"{first.lower()}{serial % 1000}", "email": f"{first.lower()}.{last.lower()}{serial % 100}@example.com",
+        "address": f"{serial % 900 + 100}, MG Road, {city} {zip_code}", "city": city, "state": state,
+        "operator": OPERATORS[digest[7] % len(OPERATORS)], "model": MODELS[digest[8] % len(MODELS)],
+        "rto": f"{city.upper()} RTO", "reg_date": f"{digest[9] % 28 + 1:02d}-0{digest[10] % 9 + 1}-20{digest[11] % 20 + 5:02d}",
+        "insurance": "31-Dec-2026", "fitness": "14-Mar-2034", "tower": str(serial % 97),
+        "imei": f"35{serial:013d}"[:15], "mac": ":".join(f"{b:02x}" for b in digest[12:18]),
+        "ip": f"{digest[12] % 223 + 1}.{digest[13]}.{digest[14]}.{digest[15]}",
+        "tracker": f"{serial % 1000000:06d}", "sha1": hashlib.sha1(digest).hexdigest(),
+    }
+
+
+_fixtures = {}
+
+
+def load_fixture(name):
+    """Raw text of fixtures/<name>, read once."""
+    if name not in _fixtures:
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            _fixtures[name] = f.read()
+    return _fixtures[name]
+
+
+def render_fixture(name, query):
+    """Fixture text with every {placeholder} replaced by fake_person(query) values."""
+    values = fake_person(query)
+    return re.sub(r"\{(\w+)\}", lambda m: str(values.get(m.group(1), m.group(0))), load_fixture(name))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Base handler: JSON helpers and quiet logging."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # clients stall ~40 ms per request on Nagle + delayed ACK.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_html(self, text, status=200):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length)
+
+    def read_json(self):
+        return json.loads(self.read_body() or b"null")
+
+
+class IPAPIHandler(StubHandler):
+    """Mimics ip-api.com: GET /json/<ip> and POST /batch."""
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.startswith("/json/"):
+            self.send_json(fake_ip_record(path[len("/json/"):]))
+        else:
+            self.send_json({"status": "fail", "message": "invalid query"}, status=404)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/batch":
+            self.send_json({"status": "fail", "message": "invalid query"}, status=404)
+            return
+        items = self.read_json() or []
+        if len(items) > 100:
+            self.send_json({"status": "fail", "message": "batch too large"}, status=422)
+            return
+        queries = [item["query"] if isinstance(item, dict) else item for item in items]
+        self.send_json([fake_ip_record(q) for q in queries])
+
+
+class IFSCHandler(StubHandler):
+    """Mimics ifsc.razorpay.com: GET /<IFSC>, 404 "Not Found" for malformed codes.
+
+    Codes in fixtures/ifsc.json are answered verbatim; other well-formed codes
+    get a copy of one of those records with the code filled in.
+    """
+
+    _records = None
+
+    @classmethod
+    def records(cls):
+        if cls._records is None:
+            cls._records = {r["IFSC"]: r for r in json.loads(load_fixture("ifsc.json"))}
+        return cls._records
+
+    def do_GET(self):
+        code = urlparse(self.path).path.strip("/").upper()
+        records = self.records()
+        if code in records:
+            self.send_json(records[code])
+        elif re.match(r"^[A-Z]{4}0[A-Z0-9]{6}$", code):
+            templates = list(records.values())
+            record = dict(templates[hashlib.sha1(code.encode()).digest()[0] % len(templates)])
+            record.update(IFSC=code, BANKCODE=code[:4])
+            self.send_json(record)
+        else:
+            self.send_json("Not Found", status=404)
+
+
+class CallTracerHandler(StubHandler):
+    """Mimics calltracer.in: form POST to / answered with the result page."""
+
+    def do_POST(self):
+        form = parse_qs(self.read_body().decode())
+        number = form.get("q", [""])[0]
+        self.send_html(render_fixture("calltracer.html", number))
+
+
+class VahanXHandler(StubHandler):
+    """Mimics vahanx.in: GET /rc-search/<RC> answered with the RC details page."""
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.startswith("/rc-search/"):
+            self.send_html(render_fixture("vahanx.html", path[len("/rc-search/"):].upper()))
+        else:
+            self.send_html("<html><body>Not Found</body></html>", status=404)
+
+
+class VahanAPIHandler(StubHandler):
+    """Mimics the vehicle API: GET /api/vehicle/<RC>."""
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.startswith("/api/vehicle/"):
+            self.send_json(json.loads(render_fixture("vahan_api.json", path[len("/api/vehicle/"):].upper())))
+        else:
+            self.send_json({"status": False, "message": "not found"}, status=404)
+
+
+class LeakOSINTHandler(StubHandler):
+    """Mimics the leak database API: POST / with {"token", "request", ...}."""
+
+    def do_POST(self):
+        payload = self.read_json() or {}
+        self.send_json(json.loads(render_fixture("leakosint.json", str(payload.get("request", "")))))
+
+
+STUBS = {
+    "ip-api": IPAPIHandler,
+    "ifsc": IFSCHandler,
+    "calltracer": CallTracerHandler,
+    "vahanx": VahanXHandler,
+    "vahan-api": VahanAPIHandler,
+    "leakosint": LeakOSINTHandler,
+}
+
+# Real host -> stub serving it, for Transport routing.
+HOSTS = {
+    "ip-api.com": "ip-api",
+    "ifsc.razorpay.com": "ifsc",
+    "calltracer.in": "calltracer",
+    "vahanx.in": "vahanx",
+    "vahan-api.vercel.app": "vahan-api",
+    "leakosintapi.com": "leakosint",
+}
+
+
+class StubServer:
+    """Runs a stub handler in a daemon thread; usable as a context manager."""
+
+    def __init__(self, handler, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StubSet:
+    """Starts one StubServer per service in HOSTS; ``routes`` maps real hosts to stub URLs."""
+
+    def __init__(self, host="127.0.0.1", base_port=0):
+        names = sorted(set(HOSTS.values()))
+        self.servers = {name: StubServer(STUBS[name], host, base_port + i if base_port else 0)
+                        for i, name in enumerate(names)}
+
+    @property
+    def routes(self):
+        return {real: self.servers[name].url for real, name in HOSTS.items()}
+
+    def routes_spec(self):
+        """The routes in STARK_HTTP_ROUTES syntax."""
+        return ",".join(f"{real}={url}" for real, url in self.routes.items())
+
+    def start(self):
+        for server in self.servers.values():
+            server.start()
+        return self
+
+    def stop(self):
+        for server in self.servers.values():
+            server.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stub service ('all' runs every one).")
+    parser.add_argument("stub", choices=sorted(STUBS) + ["all"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="port (first of consecutive ports for 'all')")
+    args = parser.parse_args(argv)
+
+    if args.stub == "all":
+        stubs = StubSet(args.host, args.port).start()
+        print("All stubs running (Ctrl+C to stop). Route starkosint.py to them with:")
+        print(f"export STARK_HTTP_ROUTES='{stubs.routes_spec()}'")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stubs.stop()
+        return
+
+    server = StubServer(STUBS[args.stub], args.host, args.port)
+    print(f"{args.stub} stub listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
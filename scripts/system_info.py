@@ -1,12 +1,351 @@
-import sys
+"""System information and the hardware tuning profile for starkosint.py.
+
+probe() measures what the pools should be sized by:
+
+  cpu     logical CPUs, the affinity mask and the cgroup (v2 or v1) CPU quota;
+          the smallest of these is what we may actually use
+  memory  MemTotal / MemAvailable and the cgroup memory limit and usage
+  disk    sequential write (fsync'd) and uncached read throughput of the data
+          directory
+  ocr     cv2 decode time of a photo-sized JPEG, the OCR engine's latency on a
+          small text image, the resident memory one engine costs, and how far
+          OCR scales across threads
+
+derive_tuning() turns a probe into pool sizes (OCR threads, batch worker
+processes, service I/O threads and queue, HTTP connection pool), bounded by
+CPUs and by the memory an OCR worker needs. write_profile() stores both as
+JSON (by default ~/.starkosint/tuning.json), together with a fingerprint of
+the cheap facts (host, CPUs, limits); load_profile() ignores a profile whose
+fingerprint no longer matches, e.g. after the container was given more CPUs.
+
+    python scripts/system_info.py            # system facts + current profile
+    python scripts/system_info.py --probe    # measure and (re)write the profile
+"""
+
+import argparse
+import json
+import math
+import os
 import platform
+import socket
+import sys
+import tempfile
+import time
 from datetime import datetime
 
-print("=== System Information ===")
-print(f"Python Version: {sys.version}")
-print(f"Platform: {platform.platform()}")
-print(f"Machine: {platform.machine()}")
-print(f"Processor: {platform.processor()}")
-print(f"Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print("\n=== Available Modules ===")
-print("sys, platform, datetime, math, random, json")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PROFILE_VERSION = 1
+DEFAULT_PROFILE_PATH = os.path.join(
+    os.environ.get("STARK_DATA_DIR", os.path.join(os.path.expanduser("~"), ".starkosint")), "tuning.json")
+
+# Sizing assumptions, used where the probe has no measurement.
+WORKER_BASE_MB = 120       # a batch worker process with numpy/cv2 loaded, before OCR
+OCR_ENGINE_MB = 80         # one loaded Tesseract engine (eng, fast model)
+MEMORY_HEADROOM = 0.7      # share of available memory the pools may plan for
+IO_WORKERS_PER_CPU = 8
+IO_WORKERS_RANGE = (32, 128)  # service threads mostly wait on the network
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _int_or_none(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def cgroup_cpu_limit():
+    """CPU quota in CPUs (e.g. 1.5) from cgroup v2 cpu.max or v1 cfs quota, or None."""
+    cpu_max = _read('/sys/fs/cgroup/cpu.max')
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and _int_or_none(period):
+            return int(quota) / int(period)
+        return None
+    quota = _int_or_none(_read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us'))
+    period = _int_or_none(_read('/sys/fs/cgroup/cpu/cpu.cfs_period_us'))
+    if quota and quota > 0 and period:
+        return quota / period
+    return None
+
+
+def cgroup_memory():
+    """(limit bytes or None, current usage bytes or None) from cgroup v2 or v1."""
+    limit = _read('/sys/fs/cgroup/memory.max')
+    if limit is not None:
+        return _int_or_none(limit), _int_or_none(_read('/sys/fs/cgroup/memory.current'))
+    limit = _int_or_none(_read('/sys/fs/cgroup/memory/memory.limit_in_bytes'))
+    if limit is not None and limit >= 1 << 60:  # v1 spells "unlimited" as a huge number
+        limit = None
+    return limit, _int_or_none(_read('/sys/fs/cgroup/memory/memory.usage_in_bytes'))
+
+
+def meminfo():
+    """{field: bytes} from /proc/meminfo (empty where unavailable)."""
+    info = {}
+    for line in (_read('/proc/meminfo') or '').splitlines():
+        key, _, value = line.partition(':')
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            info[key] = int(parts[0]) * (1024 if parts[1:] == ['kB'] else 1)
+    return info
+
+
+def cpu_info():
+    from image_batch import available_cpus
+
+    logical = os.cpu_count() or 1
+    affinity = available_cpus()
+    quota = cgroup_cpu_limit()
+    usable = min(affinity, max(1, math.ceil(quota))) if quota else affinity
+    return {"logical": logical, "affinity": affinity, "cgroup_quota": quota, "usable": usable}
+
+
+def memory_info():
+    info = meminfo()
+    limit, usage = cgroup_memory()
+    available = info.get("MemAvailable")
+    if limit is not None:
+        headroom = limit - (usage or 0)
+        available = headroom if available is None else min(available, headroom)
+    return {"total_mb": round(info.get("MemTotal", 0) / 2 ** 20),
+            "available_mb": round(available / 2 ** 20) if available is not None else None,
+            "cgroup_limit_mb": round(limit / 2 ** 20) if limit is not None else None,
+            "cgroup_usage_mb": round(usage / 2 ** 20) if usage is not None else None}
+
+
+def disk_throughput(directory, size_mb=64):
+    """Sequential write (with fsync) and read MB/s of a temporary file in ``directory``."""
+    os.makedirs(directory, exist_ok=True)
+    block = os.urandom(1 << 20)
+    fd, path = tempfile.mkstemp(dir=directory, prefix='.probe-')
+    try:
+        t = time.perf_counter()
+        with os.fdopen(fd, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        write_s = time.perf_counter() - t
+        with open(path, 'rb') as f:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)  # read from disk, not the page cache
+            t = time.perf_counter()
+            while f.read(1 << 20):
+                pass
+            read_s = time.perf_counter() - t
+    finally:
+        os.unlink(path)
+    return {"write_mb_s": round(size_mb / write_s, 1), "read_mb_s": round(size_mb / read_s, 1), "size_mb": size_mb}
+
+
+def _rss_mb():
+    for line in (_read('/proc/self/status') or '').splitlines():
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1]) / 1024
+    return None
+
+
+def ocr_benchmark(threads, images=8):
+    """cv2 decode and OCR timings, the engine's memory cost and OCR scaling over ``threads``."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    import cv2
+    import numpy as np
+
+    import starkosint
+
+    rng = np.random.default_rng(3)
+    photo = rng.integers(0, 255, (1500, 2000, 3), np.uint8)
+    photo = cv2.GaussianBlur(photo, (0, 0), 3)
+    jpeg = cv2.imencode('.jpg', photo, [cv2.IMWRITE_JPEG_QUALITY, 90])[1]
+    t = time.perf_counter()
+    for _ in range(3):
+        cv2.imdecode(jpeg, cv2.IMREAD_GRAYSCALE)
+    decode_ms = (time.perf_counter() - t) / 3 * 1000
+
+    snippets = []
+    for i in range(images):
+        image = np.full((120, 620), 255, np.uint8)
+        cv2.putText(image, f"branch {i} account verified", (15, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        cv2.putText(image, f"invoice {1000 + 37 * i} received", (15, 95), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        snippets.append(image)
+
+    engine = starkosint.get_ocr_engine()
+    rss = _rss_mb()
+    t = time.perf_counter()
+    engine.image_to_string(snippets[0])
+    first_ms = (time.perf_counter() - t) * 1000
+    engine_mb = _rss_mb() - rss if rss is not None else None
+
+    t = time.perf_counter()
+    for image in snippets:
+        engine.image_to_string(image)
+    serial_s = time.perf_counter() - t
+    speedup = 1.0
+    if threads > 1:
+        batch = snippets * threads
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(engine.image_to_string, snippets[:threads]))  # load each thread's engine
+            t = time.perf_counter()
+            list(pool.map(engine.image_to_string, batch))
+            parallel_s = time.perf_counter() - t
+        speedup = serial_s * threads / parallel_s
+    return {"backend": engine.backend(), "decode_12mp_ms": round(decode_ms, 1),
+            "first_ocr_ms": round(first_ms, 1), "ocr_ms": round(serial_s / images * 1000, 1),
+            "engine_mb": round(engine_mb, 1) if engine_mb is not None and engine.backend() == "tesserocr" else None,
+            "threads": threads, "thread_speedup": round(speedup, 2)}
+
+
+def fingerprint(cpu=None, memory=None):
+    """The cheap facts a profile was measured under; a change invalidates it."""
+    cpu = cpu or cpu_info()
+    memory = memory or memory_info()
+    return {"host": socket.gethostname(), "cpus": cpu["usable"], "cgroup_quota": cpu["cgroup_quota"],
+            "memory_total_mb": memory["total_mb"], "cgroup_limit_mb": memory["cgroup_limit_mb"]}
+
+
+def probe(data_dir, ocr=True, disk_mb=64):
+    """Measures this machine (a few seconds; ``ocr`` loads cv2 and Tesseract)."""
+    cpu, memory = cpu_info(), memory_info()
+    result = {"cpu": cpu, "memory": memory, "disk": None, "ocr": None}
+    if disk_mb:
+        try:
+            result["disk"] = disk_throughput(data_dir, disk_mb)
+        except OSError as e:
+            result["disk"] = {"error": str(e)}
+    if ocr:
+        try:
+            result["ocr"] = ocr_benchmark(cpu["usable"])
+        except Exception as e:
+            result["ocr"] = {"error": str(e)}
+    return result
+
+
+def derive_tuning(measured):
+    """Pool sizes for a probe (a partial one without disk/OCR results works too)."""
+    cpus = measured["cpu"]["usable"]
+    ocr = measured.get("ocr") or {}
+    # OCR threads share one process: use as many as the measured thread speedup
+    # justifies. Batch workers are separate processes and start from the CPUs.
+    ocr_workers = cpus
+    if ocr.get("thread_speedup") and ocr.get("threads", 1) > 1 and ocr["thread_speedup"] < 0.6 * ocr["threads"]:
+        ocr_workers = max(1, round(ocr["thread_speedup"]))
+    available = measured["memory"].get("available_mb")
+    engine_mb = ocr.get("engine_mb") or OCR_ENGINE_MB
+    batch_workers = cpus
+    if available:
+        budget = available * MEMORY_HEADROOM
+        ocr_workers = max(1, min(ocr_workers, int(budget // engine_mb)))
+        batch_workers = max(1, min(batch_workers, int(budget // (WORKER_BASE_MB + engine_mb))))
+    io_workers = min(max(cpus * IO_WORKERS_PER_CPU, IO_WORKERS_RANGE[0]), IO_WORKERS_RANGE[1])
+    return {"ocr_workers": ocr_workers, "ocr_queue": ocr_workers, "batch_workers": batch_workers,
+            "io_workers": io_workers, "http_pool_size": max(10, io_workers // 4)}
+
+
+def write_profile(path, measured):
+    """Writes the probe, its tuning and fingerprint to ``path`` atomically; returns the profile."""
+    profile = {
+        "version": PROFILE_VERSION,
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fingerprint": fingerprint(measured["cpu"], measured["memory"]),
+        "probe": measured,
+        "tuning": derive_tuning(measured),
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tuning-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return profile
+
+
+def load_profile(path):
+    """The stored profile if it exists and still matches this machine, else None."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if profile.get("version") != PROFILE_VERSION or profile.get("fingerprint") != fingerprint():
+        return None
+    return profile
+
+
+def get_tuning(path):
+    """(tuning, source): the stored profile's tuning, or one derived from CPUs and memory alone."""
+    profile = load_profile(path)
+    if profile is not None:
+        return profile["tuning"], path
+    return derive_tuning({"cpu": cpu_info(), "memory": memory_info()}), "defaults (no probe)"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="System information and the starkosint tuning profile.")
+    parser.add_argument('--probe', action='store_true', help='measure this machine and (re)write the profile')
+    parser.add_argument('--profile', default=DEFAULT_PROFILE_PATH, help=f'profile path (default: {DEFAULT_PROFILE_PATH})')
+    parser.add_argument('--no-ocr', action='store_true', help='skip the cv2/Tesseract benchmark')
+    parser.add_argument('--disk-mb', type=int, default=64, help='size of the disk test file (0 skips it; default: 64)')
+    parser.add_argument('--json', action='store_true', help='print the profile as JSON')
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        measured = probe(os.path.dirname(os.path.abspath(args.profile)), ocr=not args.no_ocr, disk_mb=args.disk_mb)
+        profile = write_profile(args.profile, measured)
+    else:
+        profile = load_profile(args.profile)
+    if args.json:
+        print(json.dumps(profile, indent=2))
+        return
+
+    print("=== System Information ===")
+    print(f"Python Version: {sys.version}")
+    print(f"Platform: {platform.platform()}")
+    print(f"Machine: {platform.machine()}")
+    print(f"Processor: {platform.processor()}")
+    print(f"Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("\n=== Available Modules ===")
+    print("sys, platform, datetime, math, random, json")
+
+    if profile is None:
+        print(f"\nNo tuning profile at {args.profile}; run with --probe to measure this machine and write one.")
+        return
+
+    measured = profile["probe"]
+    cpu, memory = measured["cpu"], measured["memory"]
+    print(f"\n=== Hardware (probed {profile['created']}) ===")
+    print(f"CPUs: {cpu['usable']} usable ({cpu['logical']} logical, affinity {cpu['affinity']}, "
+          f"cgroup quota {cpu['cgroup_quota'] or 'none'})")
+    print(f"Memory: {memory['available_mb']} MB available of {memory['total_mb']} MB "
+          f"(cgroup limit {memory['cgroup_limit_mb'] or 'none'})")
+    disk = measured.get("disk") or {}
+    if "write_mb_s" in disk:
+        print(f"Disk: {disk['write_mb_s']} MB/s write, {disk['read_mb_s']} MB/s read")
+    ocr = measured.get("ocr") or {}
+    if "ocr_ms" in ocr:
+        print(f"OCR ({ocr['backend']}): {ocr['ocr_ms']} ms per snippet, {ocr['thread_speedup']}x on "
+              f"{ocr['threads']} threads; engine {ocr['engine_mb'] or '?'} MB; cv2 12 MP decode {ocr['decode_12mp_ms']} ms")
+    elif ocr:
+        print(f"OCR: {ocr.get('error')}")
+    print(f"\n=== Tuning ({args.profile}) ===")
+    for key, value in profile["tuning"].items():
+        print(f"{key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""Building the IP range index from headerless integer exports."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ip_geo  # noqa: E402
+
+
+def test_build_skips_rows_beyond_ipv4(tmp_path):
+    csv_path = tmp_path / "ip2location-lite-db1.csv"
+    csv_path.write_text('"16777216","16777471","AU","Australia"\n'
+                        '"281470681743360","281474976710655","-","-"\n')
+    index_path = str(tmp_path / "ipgeo.idx")
+    assert ip_geo.build_index(str(csv_path), index_path) == 1
+    with ip_geo.IPGeoIndex(index_path) as index:
+        assert index.get("1.0.0.1")["countryCode"] == "AU"
+        assert index.get("255.255.255.255") is None
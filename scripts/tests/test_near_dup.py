@@ -0,0 +1,98 @@
+"""Near-duplicate OCR reuse must never hand one screenshot's text to another."""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import near_dup  # noqa: E402
+
+
+def screenshot(amount):
+    """A 1440x3200 receipt-style screenshot whose only variable is the amount."""
+    image = np.full((3200, 1440), 250, np.uint8)
+    cv2.rectangle(image, (0, 0), (1440, 220), 40, -1)
+    cv2.putText(image, "Payment receipt", (60, 140), cv2.FONT_HERSHEY_SIMPLEX, 2.2, 255, 4)
+    for i, y in enumerate(range(330, 3100, 56)):
+        text = (f"ref TXN{8812340 + i} amount {amount} to acct 00{i}7731" if i % 3 == 0
+                else f"line {i} transfer completed by user")
+        cv2.putText(image, text, (60, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 30, 1, cv2.LINE_AA)
+    return image
+
+
+def reencode(gray, ext='.jpg', quality=50):
+    flag = cv2.IMWRITE_JPEG_QUALITY if ext == '.jpg' else cv2.IMWRITE_WEBP_QUALITY
+    return cv2.imdecode(cv2.imencode(ext, gray, [flag, quality])[1], cv2.IMREAD_GRAYSCALE)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = near_dup.NearDuplicateIndex(str(tmp_path / "near-dup.sqlite3"), "test", reuse=True)
+    original = screenshot(4500)
+    index.add("a", near_dup.fingerprint(original, reference=True), "amount 4500", 900.0, name="a.png")
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize("amount", [4501, 9800, 4600])
+def test_one_digit_change_is_grouped_not_reused(index, amount):
+    match = index.lookup(near_dup.fingerprint(screenshot(amount), reference=True))
+    assert match is not None and match.digest == "a"  # looks alike...
+    assert not match.reusable and match.text is None  # ...but the text is not borrowed
+
+
+def test_one_digit_change_survives_reencoding(index):
+    match = index.lookup(near_dup.fingerprint(reencode(screenshot(4501)), reference=True))
+    assert match is not None and not match.reusable
+
+
+@pytest.mark.parametrize("ext,quality", [('.jpg', 30), ('.jpg', 90), ('.webp', 80)])
+def test_reencode_reuses_text(index, ext, quality):
+    match = index.lookup(near_dup.fingerprint(reencode(screenshot(4500), ext, quality), reference=True))
+    assert match.reusable and match.text == "amount 4500"
+
+
+def test_resized_copy_is_only_grouped(index):
+    small = cv2.resize(screenshot(4500), (720, 1600), interpolation=cv2.INTER_AREA)
+    match = index.lookup(near_dup.fingerprint(small, reference=True))
+    assert match is not None and not match.reusable
+
+
+def test_group_mode_never_reuses(tmp_path):
+    index = near_dup.NearDuplicateIndex(str(tmp_path / "near-dup.sqlite3"), "test")
+    original = screenshot(4500)
+    index.add("a", near_dup.fingerprint(original), "amount 4500", 900.0)
+    match = index.lookup(near_dup.fingerprint(reencode(original)))
+    assert match is not None and not match.reusable
+    index.close()
+
+
+def test_borrowed_text_is_not_cached_under_the_new_digest(tmp_path, monkeypatch):
+    import starkosint
+    from image_cache import ImageResultCache
+    from image_source import ImageSource
+
+    cache = ImageResultCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(starkosint, "NEAR_DUP_MODE", "reuse")
+    monkeypatch.setattr(starkosint, "NEAR_DUP_INDEX_PATH", str(tmp_path / "near-dup.sqlite3"))
+    monkeypatch.setattr(starkosint, "_near_dup_index", None)
+    monkeypatch.setattr(starkosint, "get_image_cache", lambda: cache)
+    ocr_calls = []
+    monkeypatch.setattr(starkosint, "ocr_gray", lambda gray: ocr_calls.append(1) or f"ocr #{len(ocr_calls)}")
+
+    def run(gray, ext='.png'):
+        source = ImageSource.from_bytes(cv2.imencode(ext, gray)[1].tobytes())
+        info = {}
+        return starkosint.ocr_image_text(source, near_dup=info), info, source.digest()
+
+    assert run(screenshot(4500))[0] == "ocr #1"
+    text, info, _ = run(screenshot(9800))
+    assert text == "ocr #2" and info["reused"] is False
+    text, info, digest = run(screenshot(4500), '.jpg')
+    assert text == "ocr #1" and info["reused"] is True
+    assert cache.get(ImageResultCache.key(digest, starkosint.OCR_CACHE_CONFIG)) is None
+    starkosint._near_dup_index.close()
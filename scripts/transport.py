@@ -0,0 +1,253 @@
+"""Shared HTTP transport for every network lookup in starkosint.py.
+
+One requests.Session with keep-alive pools per host replaces the scattered
+requests.get/post calls, so repeat lookups reuse TCP/TLS connections. On top
+of the session the transport adds:
+
+  * one default timeout (connect, read) for every call
+  * retries with jittered exponential backoff, honouring a numeric
+    Retry-After header: GET/HEAD are retried on 429/5xx, timeouts and
+    connection errors; other methods (the leakosint/calltracer POSTs) only on
+    429 and when the connection was never made, so a query the upstream may
+    already have accepted is not sent again
+  * a per-host concurrency cap (bounded semaphore per host)
+  * per-host latency and outcome counters, see Transport.stats()
+  * timing spans (see spans.py): http > connect (DNS + TCP + TLS), wait
+    (request sent until response headers) and download (body), plus backoff
+  * host routing: requests for a routed host go to another base URL instead
+    (e.g. a local stub server), set with Transport.route() or the
+    STARK_HTTP_ROUTES variable ("ip-api.com=http://127.0.0.1:8765,...")
+
+Callers get ordinary requests.Response objects back, so raise_for_status(),
+.json() and the requests exception types work as before.
+"""
+
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from lazy_imports import lazy_import
+from spans import current_child_time, record, span
+
+requests = lazy_import('requests')
+
+DEFAULT_TIMEOUT = (5, 20)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+def parse_routes(spec):
+    """Parses "host=base_url,host2=base_url2" into a dict."""
+    routes = {}
+    for item in (spec or '').split(','):
+        host, sep, base = item.strip().partition('=')
+        if sep and host and base:
+            routes[host.strip().lower()] = base.strip().rstrip('/')
+    return routes
+
+
+def _never_sent(error):
+    """True if ``error`` happened before the request reached the server (connect timeout/refused, DNS)."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        from urllib3.exceptions import NewConnectionError
+
+        reason = getattr(error.args[0] if error.args else None, 'reason', None)
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def _traced_pool_classes():
+    """urllib3 pool classes whose new connections are timed as a "connect" span."""
+    from urllib3 import connection, connectionpool
+
+    class HTTPConnection(connection.HTTPConnection):
+        def connect(self):
+            with span('connect'):
+                super().connect()
+
+    class HTTPSConnection(connection.HTTPSConnection):
+        def connect(self):
+            with span('connect'):
+                super().connect()
+
+    class HTTPConnectionPool(connectionpool.HTTPConnectionPool):
+        ConnectionCls = HTTPConnection
+
+    class HTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+        ConnectionCls = HTTPSConnection
+
+    return {'http': HTTPConnectionPool, 'https': HTTPSConnectionPool}
+
+
+class HostStats:
+    """Latency/outcome counters for one host."""
+
+    __slots__ = ('requests', 'errors', 'retries', 'total_s', 'max_s', 'statuses')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.statuses = {}
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(1000 * self.total_s / self.requests, 1) if self.requests else None,
+            "max_ms": round(1000 * self.max_s, 1),
+            "statuses": dict(self.statuses),
+        }
+
+
+class Transport:
+    """Pooled, retrying HTTP client shared by all lookups."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 per_host_limit=4, pool_size=10, routes=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.per_host_limit = per_host_limit
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+        self._host_limits = {}
+        self._stats = {}
+        self.routes = parse_routes(os.environ.get('STARK_HTTP_ROUTES')) if routes is None else dict(routes)
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.pool_size)
+                    adapter.poolmanager.pool_classes_by_scheme = _traced_pool_classes()
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def route(self, host, base_url):
+        """Sends future requests for ``host`` to ``base_url`` (None removes the route)."""
+        if base_url is None:
+            self.routes.pop(host.lower(), None)
+        else:
+            self.routes[host.lower()] = base_url.rstrip('/')
+
+    def _resolve(self, url):
+        """Applies the routing table; returns (url to fetch, host name for stats/limits)."""
+        parts = urlsplit(url)
+        host = parts.netloc
+        base = self.routes.get(parts.hostname or '')
+        if base is None:
+            return url, host
+        target = urlsplit(base)
+        return urlunsplit((target.scheme, target.netloc, target.path + parts.path, parts.query, parts.fragment)), host
+
+    def _host_state(self, host):
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+                self._stats[host] = HostStats()
+            return limit, self._stats[host]
+
+    def _backoff(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(cap / 2, cap)
+
+    def request(self, method, url, **kwargs):
+        """Sends a request with pooling, retries and per-host limits; returns the Response."""
+        kwargs.setdefault('timeout', self.timeout)
+        url, host = self._resolve(url)
+        limit, stats = self._host_state(host)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            response = None
+            start = time.perf_counter()
+            with limit, span('http'):
+                with span('session'):  # first call only: imports requests, builds the pools
+                    session = self.session
+                sent = time.perf_counter()
+                try:
+                    response = session.request(method, url, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    error = True
+                    if attempt >= self.max_retries or not (idempotent or _never_sent(e)):
+                        self._record(stats, start, None, error)
+                        raise
+                else:
+                    error = False
+                    headers_s = response.elapsed.total_seconds()
+                    record('wait', max(0.0, headers_s - current_child_time()))
+                    record('download', max(0.0, time.perf_counter() - sent - headers_s))
+            self._record(stats, start, response, error)
+
+            if response is not None and (attempt >= self.max_retries or response.status_code not in RETRY_STATUSES
+                                         or (response.status_code != 429 and not idempotent)):
+                return response
+            delay = self._backoff(attempt, response)
+            if response is not None:
+                response.close()
+            with self._lock:
+                stats.retries += 1
+            attempt += 1
+            with span('backoff'):
+                time.sleep(delay)
+
+    def _record(self, stats, start, response, error):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats.requests += 1
+            stats.total_s += elapsed
+            stats.max_s = max(stats.max_s, elapsed)
+            if error:
+                stats.errors += 1
+            else:
+                code = response.status_code
+                stats.statuses[code] = stats.statuses.get(code, 0) + 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """Per-host counters: requests, errors, retries, avg/max latency, status codes."""
+        with self._lock:
+            return {host: s.as_dict() for host, s in self._stats.items()}
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+_default = None
+
+
+def get_transport():
+    """Returns the process-wide Transport, creating it on first use."""
+    global _default
+    if _default is None:
+        _default = Transport()
+    return _default